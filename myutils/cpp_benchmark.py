@@ -0,0 +1,437 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from typing import Any, Callable
+
+from myutils.cpp_definition_adder import CppFunctionAdder
+from myutils.script_interface import ScriptInterface, get_peak_rss
+
+LOGGER = logging.getLogger(__name__)
+
+CLASS_TEMPLATE = """
+namespace bench_{index} {{
+// Comment with a fake class Fake{index} {{ void fake(); }};
+class Class{index} : public Base<int> {{
+public:
+    Class{index}();
+    explicit Class{index}(const std::string& name, int count = {index});
+    virtual ~Class{index}();
+    static const std::string& label();
+    void set(const std::map<int, std::string>& values, std::vector<int> v = {{}}) const;
+    int inline_get() const {{ if (m_x) {{ return m_x; }} return 0; }}
+    template <class T> void tmpl(T value);
+    class Nested {{
+    public:
+        unsigned long nested_{index}(const char* buffer, size_t size);
+    }};
+{methods}
+private:
+    int m_x = 0;
+}};
+}}
+"""
+
+# Default spec of the synthetic trees, can be overridden with --spec
+DEFAULT_SPEC: dict[str, Any] = {
+    "pairs": [100, 1000],
+    "classes_per_header": 2,
+    "methods_per_class": 20,
+    "template_ratio": 0.1,
+    "missing_ratio": 0.2,
+    "files_per_directory": 50,
+    "seed": 0,
+}
+
+ARGUMENT_TYPES = [
+    "int",
+    "float",
+    "const std::string&",
+    "const std::vector<int>&",
+    "std::map<int, std::string>*",
+    "unsigned long",
+]
+RETURN_TYPES = ["void", "int", "bool", "double", "std::string", "const Foo&"]
+
+
+def generate_header(size: int) -> str:
+    """
+    Generates a synthetic C++ header with roughly the given size.
+
+    Args:
+        size (int): The size of the header in bytes.
+
+    Returns:
+        str: The content of the header.
+    """
+    methods = "\n".join(
+        f"    virtual double method_{index}(const std::string& a, float b = 1.0f);"
+        for index in range(20)
+    )
+    chunks = ["#pragma once\n#include <string>\n"]
+    total = len(chunks[0])
+    index = 0
+    while total < size:
+        chunk = CLASS_TEMPLATE.format(index=index, methods=methods)
+        chunks.append(chunk)
+        total += len(chunk)
+        index += 1
+    return "".join(chunks)
+
+
+def generate_pair(
+    name: str, spec: dict[str, Any], rng: random.Random
+) -> tuple[str, str, int]:
+    """
+    Generates a header and its cpp file with some definitions missing.
+
+    Args:
+        name (str): The name of the files, used for the namespace.
+        spec (dict[str, Any]): The spec of the synthetic tree.
+        rng (random.Random): The random generator.
+
+    Returns:
+        tuple[str, str, int]: The content of the header, the content of the
+            cpp file and the number of definitions missing.
+    """
+    header = ["#pragma once", "#include <string>", f"namespace {name} {{"]
+    source = [f'#include "{name}.h"', f"namespace {name} {{"]
+    missing = 0
+
+    for class_index in range(spec["classes_per_header"]):
+        class_name = f"Class{class_index}"
+        is_template = rng.random() < spec["template_ratio"]
+        if is_template:
+            header.append("template <typename T>")
+        header.append(f"class {class_name} : public Base {{")
+        header.append("public:")
+        header.append(f"    {class_name}();")
+        header.append(f"    virtual ~{class_name}();")
+        if not is_template:
+            source.append(f"{class_name}::{class_name}() {{}}")
+            source.append(f"{class_name}::~{class_name}() {{}}")
+
+        for method_index in range(spec["methods_per_class"]):
+            return_type = rng.choice(RETURN_TYPES)
+            arguments = ", ".join(
+                f"{rng.choice(ARGUMENT_TYPES)} arg{arg_index}"
+                for arg_index in range(rng.randint(0, 4))
+            )
+            qualifiers = " const" if rng.random() < 0.3 else ""
+            method = f"method_{method_index}({arguments}){qualifiers}"
+            header.append(f"    {return_type} {method};")
+
+            if is_template:
+                continue
+            if rng.random() < spec["missing_ratio"]:
+                missing += 1
+                continue
+            source.append(
+                f"{return_type} {class_name}::{method} {{\n"
+                f"    if (arg_check()) {{ return {{}}; }}\n}}"
+            )
+
+        header.append("private:")
+        header.append("    int m_value = 0;")
+        header.append("};")
+
+    header.append("}")
+    source.append("}")
+    return "\n".join(header) + "\n", "\n".join(source) + "\n", missing
+
+
+def generate_tree(root: str, num_pairs: int, spec: dict[str, Any]) -> int:
+    """
+    Generates a synthetic C++ project with num_pairs header and cpp pairs.
+
+    Args:
+        root (str): The directory where the project is generated.
+        num_pairs (int): The number of header and cpp pairs.
+        spec (dict[str, Any]): The spec of the synthetic tree.
+
+    Returns:
+        int: The number of definitions missing in the project.
+    """
+    rng = random.Random(spec["seed"])
+    missing = 0
+    for index in range(num_pairs):
+        directory = os.path.join(
+            root, f"module_{index // spec['files_per_directory']}"
+        )
+        os.makedirs(directory, exist_ok=True)
+
+        name = f"file_{index}"
+        header, source, file_missing = generate_pair(name, spec, rng)
+        missing += file_missing
+        with open(
+            os.path.join(directory, name + ".h"), "w", encoding="utf-8"
+        ) as file:
+            file.write(header)
+        with open(
+            os.path.join(directory, name + ".cpp"), "w", encoding="utf-8"
+        ) as file:
+            file.write(source)
+    return missing
+
+
+def measure(func: Callable[[], Any], repeat: int) -> tuple[float, int, Any]:
+    """
+    Times a function and measures its peak of allocated memory.
+
+    The time is measured without tracing the memory, since tracemalloc
+    slows down the allocations.
+
+    Args:
+        func (Callable[[], Any]): The function to measure.
+        repeat (int): Number of times the function is timed, the best is kept.
+
+    Returns:
+        tuple[float, int, Any]: The best time in seconds, the peak of memory
+            allocated in bytes and the result of the function.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+class CppBenchmark(ScriptInterface):
+    """
+    This class benchmarks the C++ tooling on synthetic sources.
+    """
+
+    def __init__(self):
+        super().__init__("bench_cpp_tools")
+
+    def add_subparser_args(self, parser: ArgumentParser):
+        """
+        This function ads arguments for the script.
+
+        Args:
+            parser (ArgumentParser): The subparser of the script
+        """
+        parser.add_argument(
+            "-s",
+            "--sizes",
+            type=float,
+            nargs="+",
+            default=[1.0, 4.0, 16.0],
+            help="The sizes in megabytes of the generated headers",
+        )
+        parser.add_argument(
+            "--spec",
+            type=str,
+            default=None,
+            help=f"JSON file overriding the spec of the generated projects, defaults: {json.dumps(DEFAULT_SPEC)}",
+        )
+        parser.add_argument(
+            "-r",
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of times each measure is repeated, the best is kept",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes used by the full add_cpp_definitions run",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            type=str,
+            default=None,
+            help="Write the results as JSON to this file instead of stdout",
+        )
+
+    def bench_header(self, size: int, repeat: int) -> dict:
+        """
+        Times the parsing of a generated header.
+
+        Args:
+            size (int): The size of the header in bytes.
+            repeat (int): Number of times the parse is repeated.
+
+        Returns:
+            dict: The results of the benchmark.
+        """
+        adder = CppFunctionAdder()
+        content = generate_header(size)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            header_file = os.path.join(tmp_dir, "bench.h")
+            with open(header_file, "w", encoding="utf-8") as file:
+                file.write(content)
+
+            seconds, peak, functions = measure(
+                lambda: adder.get_functions_from_header(header_file), repeat
+            )
+
+        return {
+            "bytes": len(content),
+            "functions": len(functions),
+            "seconds": seconds,
+            "megabytes_per_second": len(content) / seconds / 1e6,
+            "peak_memory_bytes": peak,
+        }
+
+    def bench_tree(
+        self, num_pairs: int, spec: dict[str, Any], repeat: int, jobs: int
+    ) -> dict:
+        """
+        Times each stage of add_cpp_definitions on a generated project.
+
+        Args:
+            num_pairs (int): The number of header and cpp pairs.
+            spec (dict[str, Any]): The spec of the synthetic tree.
+            repeat (int): Number of times each stage is repeated.
+            jobs (int): Number of processes used by the full run.
+
+        Returns:
+            dict: The results of the benchmark.
+        """
+        adder = CppFunctionAdder()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            expected_missing = generate_tree(tmp_dir, num_pairs, spec)
+            lst_files = adder.find_files(tmp_dir, ["*"], [])
+            lst_headers = adder.find_header_pairs(lst_files, False)
+            num_bytes = sum(os.path.getsize(path) for path in lst_files)
+
+            def parse_headers():
+                return [
+                    adder.get_functions_from_header(header)
+                    for header, _ in lst_headers
+                ]
+
+            def parse_sources():
+                return [
+                    adder.get_functions_definitions_from_cpp(cpp)
+                    for _, cpp in lst_headers
+                ]
+
+            header_seconds, header_peak, header_functions = measure(
+                parse_headers, repeat
+            )
+            cpp_seconds, cpp_peak, cpp_functions = measure(
+                parse_sources, repeat
+            )
+
+            def compare():
+                return [
+                    adder.compare_functions(header, cpp)
+                    for header, cpp in zip(header_functions, cpp_functions)
+                ]
+
+            compare_seconds, compare_peak, missing = measure(compare, repeat)
+
+            # The full run adds the missing definitions, so it's run once.
+            # Its arguments are parsed like the command line of the script.
+            parser = ArgumentParser()
+            adder.add_subparser_args(parser)
+            args = parser.parse_args(["-p", tmp_dir, "-y", "-j", str(jobs)])
+
+            # Do not time the logging of every missing definition
+            logging.disable(logging.INFO)
+            try:
+                start = time.perf_counter()
+                adder(args)
+                call_seconds = time.perf_counter() - start
+            finally:
+                logging.disable(logging.NOTSET)
+
+        num_missing = sum(len(functions) for functions in missing)
+        if num_missing != expected_missing:
+            LOGGER.warning(
+                "Found %d missing definitions, %d expected",
+                num_missing,
+                expected_missing,
+            )
+
+        # Every stage is measured in files of the pairs, headers and sources
+        num_pair_files = 2 * len(lst_headers)
+
+        def stage(seconds: float, peak: int) -> dict:
+            return {
+                "seconds": seconds,
+                "files_per_second": num_pair_files / seconds,
+                "peak_memory_bytes": peak,
+            }
+
+        return {
+            "files": len(lst_files),
+            "pairs": len(lst_headers),
+            "bytes": num_bytes,
+            "missing": num_missing,
+            "expected_missing": expected_missing,
+            "get_functions_from_header": stage(header_seconds, header_peak),
+            "get_functions_definitions_from_cpp": stage(cpp_seconds, cpp_peak),
+            "compare_functions": stage(compare_seconds, compare_peak),
+            "call": {
+                "seconds": call_seconds,
+                "files_per_second": num_pair_files / call_seconds,
+                "jobs": jobs,
+            },
+        }
+
+    def __call__(self, args: Namespace):
+        """
+        This is the main function of the benchmark script.
+
+        Args:
+            args (Namespace): The arguments of the script
+        """
+        spec = dict(DEFAULT_SPEC)
+        if args.spec:
+            with open(args.spec, "r", encoding="utf-8") as file:
+                spec.update(json.load(file))
+
+        header_results = []
+        for size in args.sizes:
+            result = self.bench_header(int(size * 1e6), args.repeat)
+            LOGGER.info(
+                "Parsed %d bytes in %.3fs (%.2f MB/s)",
+                result["bytes"],
+                result["seconds"],
+                result["megabytes_per_second"],
+            )
+            header_results.append(result)
+
+        tree_results = []
+        for num_pairs in spec["pairs"]:
+            result = self.bench_tree(num_pairs, spec, args.repeat, args.jobs)
+            LOGGER.info(
+                "Checked %d files in %.3fs (%.0f files/s)",
+                2 * result["pairs"],
+                result["call"]["seconds"],
+                result["call"]["files_per_second"],
+            )
+            tree_results.append(result)
+
+        report = {
+            "spec": spec,
+            "headers": header_results,
+            "trees": tree_results,
+            "peak_rss_bytes": get_peak_rss(),
+            "peak_rss_children_bytes": get_peak_rss(children=True),
+        }
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+            LOGGER.info("Results written to %s", args.output)
+        else:
+            print(json.dumps(report, indent=2))
@@ -1,31 +1,63 @@
+import json
 import os
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
+from typing import Any, Optional
 
+from myutils.cpp_definition_adder import CppFunctionAdder
+from myutils.cpp_parser import parse_functions
+from myutils.file_utils import write_file_atomic
 from myutils.script_interface import ScriptInterface
 
-cpp_header_content = """
+try:
+    import yaml
+except ImportError:
+    yaml = None
 
-class <class_name> {
+cpp_header_content = Template(
+    """
+
+${namespace_begin}class ${class_name}${bases} {
     public:
-        <class_name>();
-        ~<class_name>();
-};
-"""
-cpp_source_file = """
-#include "<class_name>.h"
-
-<class_name>::<class_name>(){
+        ${class_name}();
+        ~${class_name}();
+${declarations}};
+${namespace_end}"""
+)
+cpp_source_file = Template(
+    """
+#include "${class_name}.h"
+
+${namespace_begin}${class_name}::${class_name}(){
 }
 
-<class_name>::~<class_name>() {
+${class_name}::~${class_name}() {
 }
 
-"""
+${definitions}${namespace_end}"""
+)
+
+
+def to_camel_case(class_name: str) -> str:
+    """
+    Converts a class name to CamelCase.
+
+    Args:
+        class_name (str): The class name, ex: my_class.
+
+    Returns:
+        str: The class name in CamelCase, ex: MyClass.
+    """
+    class_name = class_name[0].capitalize() + class_name[1:]
+    if "_" in class_name:
+        class_name = class_name.replace("_", " ").title().replace(" ", "")
+    return class_name
 
 
 class CreateCppClass(ScriptInterface):
     def __init__(self):
-        super().__init__("create_cpp_class", "Create a cpp class")
+        super().__init__("create_cpp_class")
 
     def add_subparser_args(self, parser: ArgumentParser):
         """
@@ -34,7 +66,169 @@ class CreateCppClass(ScriptInterface):
         Args:
             parser (ArgumentParser): The subparser of the script
         """
-        parser.add_argument("class_name", type=str)
+        parser.add_argument("class_name", type=str, nargs="?")
+        parser.add_argument(
+            "-s",
+            "--spec",
+            type=str,
+            default=None,
+            help="""JSON or YAML file with a list of classes to create, ex:
+            {"classes": [{"name": "Foo", "namespace": "ns", "directory": "src",
+            "bases": ["public Base"], "methods": ["void run() const"]}]}""",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=8,
+            help="Number of threads writing the files of --spec",
+        )
+
+    def render_class(
+        self,
+        class_name: str,
+        namespace: str = "",
+        bases: Optional[list[str]] = None,
+        methods: Optional[list[str]] = None,
+    ) -> tuple[str, str]:
+        """
+        Renders the header and the source file of a class.
+
+        Args:
+            class_name (str): The name of the class.
+            namespace (str, optional): The namespace of the class, ex: ns::sub. Defaults to "".
+            bases (Optional[list[str]], optional): The base classes, ex: public Base. Defaults to None.
+            methods (Optional[list[str]], optional): The declarations of the methods,
+                ex: int get(int x = 0) const. Defaults to None.
+
+        Returns:
+            tuple[str, str]: The content of the header and of the source file.
+        """
+        methods = methods or []
+        declarations = "".join(
+            f"        {method.strip().rstrip(';')};\n" for method in methods
+        )
+
+        # Parse the declarations to write the definitions without
+        # default values and specifiers such as static or virtual
+        definitions = ""
+        for function in parse_functions(
+            f"class {class_name} {{\n{declarations}}};"
+        ):
+            if function.function_name in (class_name, "~" + class_name):
+                continue
+            cpp_function = CppFunctionAdder.CppFunction(
+                function.return_type,
+                function.function_name,
+                function.arguments,
+                class_name,
+                function.qualifiers,
+            )
+            definitions += f"{cpp_function} {{\n}}\n\n"
+
+        namespace_begin = f"namespace {namespace} {{\n\n" if namespace else ""
+        namespace_end = f"}} // namespace {namespace}\n" if namespace else ""
+
+        header = cpp_header_content.substitute(
+            class_name=class_name,
+            bases=" : " + ", ".join(bases) if bases else "",
+            declarations=declarations,
+            namespace_begin=namespace_begin,
+            namespace_end="\n" + namespace_end if namespace else "",
+        )
+        source = cpp_source_file.substitute(
+            class_name=class_name,
+            definitions=definitions,
+            namespace_begin=namespace_begin,
+            namespace_end=namespace_end,
+        )
+        return header, source
+
+    def load_spec(self, spec_file: str) -> list[dict[str, Any]]:
+        """
+        Loads the classes to create from a JSON or YAML file.
+
+        Args:
+            spec_file (str): The path of the spec file.
+
+        Returns:
+            list[dict[str, Any]]: The classes, with the defaults of the spec applied.
+        """
+        with open(spec_file, "r", encoding="utf-8") as file:
+            if spec_file.endswith((".yaml", ".yml")):
+                if yaml is None:
+                    raise ImportError(
+                        "PyYAML is required to read YAML specs, install it with pip install pyyaml"
+                    )
+                spec = yaml.safe_load(file)
+            else:
+                spec = json.load(file)
+
+        if isinstance(spec, list):
+            spec = {"classes": spec}
+
+        defaults = {
+            "namespace": spec.get("namespace", ""),
+            "directory": spec.get("directory", "."),
+            "bases": spec.get("bases", []),
+            "methods": spec.get("methods", []),
+        }
+        classes = []
+        for class_spec in spec.get("classes", []):
+            if isinstance(class_spec, str):
+                class_spec = {"name": class_spec}
+            classes.append({**defaults, **class_spec})
+        return classes
+
+    def create_classes(self, classes: list[dict[str, Any]], jobs: int):
+        """
+        Creates the header and source files of many classes.
+
+        Args:
+            classes (list[dict[str, Any]]): The classes to create.
+            jobs (int): The number of threads writing the files.
+        """
+        # List each directory once instead of checking every file, keyed by
+        # the normalized path so "src" and "src/" share the same listing
+        existing_files: dict[str, set[str]] = {}
+        for class_spec in classes:
+            directory = os.path.normpath(class_spec["directory"])
+            if directory not in existing_files:
+                os.makedirs(directory, exist_ok=True)
+                existing_files[directory] = {
+                    entry.name for entry in os.scandir(directory)
+                }
+
+        files_to_write: list[tuple[str, str]] = []
+        for class_spec in classes:
+            class_name = to_camel_case(class_spec["name"])
+            directory = os.path.normpath(class_spec["directory"])
+            header_file = class_name + ".h"
+            cpp_file = class_name + ".cpp"
+
+            if (
+                header_file in existing_files[directory]
+                or cpp_file in existing_files[directory]
+            ):
+                print(
+                    f"File already exists for class {class_name} in {directory}. Skipping..."
+                )
+                continue
+            existing_files[directory].update((header_file, cpp_file))
+
+            header, source = self.render_class(
+                class_name,
+                class_spec["namespace"],
+                class_spec["bases"],
+                class_spec["methods"],
+            )
+            files_to_write.append((os.path.join(directory, header_file), header))
+            files_to_write.append((os.path.join(directory, cpp_file), source))
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(lambda item: write_file_atomic(*item), files_to_write))
+
+        print(f"Created {len(files_to_write) // 2} classes successfully")
 
     def __call__(self, args: Namespace):
         """
@@ -44,12 +238,16 @@ class CreateCppClass(ScriptInterface):
             parser (ArgumentParser): The parser of the script
             args_partial (list, optional): The arguments to parse. Defaults to None.
         """
-        class_name: str = args.class_name
+        if args.spec:
+            self.create_classes(self.load_spec(args.spec), args.jobs)
+            return
+
+        if not args.class_name:
+            print("A class name or --spec is required. Aborting...")
+            return
 
         # Enforce CamelCase
-        class_name = class_name[0].capitalize() + class_name[1:]
-        if "_" in class_name:
-            class_name = class_name.replace("_", " ").title().replace(" ", "")
+        class_name = to_camel_case(args.class_name)
 
         # File names
         header_file = class_name + ".h"
@@ -60,14 +258,16 @@ class CreateCppClass(ScriptInterface):
             print("File already exists. Aborting...")
             return
 
+        header, source = self.render_class(class_name)
+
         # Create Header file
         with open(header_file, "w", encoding="utf-8") as file:
-            file.write(cpp_header_content.replace("<class_name>", class_name))
+            file.write(header)
 
         print("Created header file: " + header_file)
 
         with open(cpp_file, "w", encoding="utf-8") as file:
-            file.write(cpp_source_file.replace("<class_name>", class_name))
+            file.write(source)
 
         print("Created cpp file: " + cpp_file)
         print("Files created successfully")
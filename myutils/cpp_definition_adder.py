@@ -1,12 +1,29 @@
+import fnmatch
 import logging
 import os
-import re
+import time
 from argparse import ArgumentParser, Namespace
-
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+from myutils.cpp_parse_cache import ParseCache
+from myutils.cpp_parser import (
+    candidate_class_names,
+    function_key,
+    parse_arguments,
+    parse_functions,
+)
+from myutils.cpp_symbol_index import SymbolIndex
+from myutils.file_watcher import create_watcher
 from myutils.script_interface import ScriptInterface
 
 LOGGER = logging.getLogger(__name__)
 
+HEADER_EXTENSIONS = (".h", ".hpp", ".hh", ".hxx")
+SOURCE_EXTENSIONS = (".cpp", ".cc", ".cxx")
+CACHE_FILE_NAME = ".add_cpp_definitions.cache"
+INDEX_FILE_NAME = ".cpp_symbol_index"
+
 
 class CppFunctionAdder(ScriptInterface):
     """
@@ -20,26 +37,16 @@ class CppFunctionAdder(ScriptInterface):
             function_name: str,
             arguments: str,
             class_name: str,
+            qualifiers: str = "",
         ):
             self.return_type = return_type.strip()
             self.function_name = function_name.strip()
-            self.arguments_str = arguments.strip()
             self.class_name = class_name.strip()
+            self.qualifiers = qualifiers.strip()
 
-            self.arguments_types = []
-
-            # Parse arguments
-            for token in self.arguments_str.split(","):
-                if token.strip() == "":
-                    continue
-
-                variables = token.split(" ")
-                if len(variables) != 2:
-                    raise ValueError(
-                        f"Invalid argument: {token} in function {self.class_name}::{function_name}"
-                    )
-
-                self.arguments_types.append(variables[0])
+            # Parse arguments, default values are not part of the signature
+            arguments_types, self.arguments_str = parse_arguments(arguments)
+            self.arguments_types = list(arguments_types)
 
         def compare(self, other: "CppFunctionAdder.CppFunction") -> bool:
             return (
@@ -47,6 +54,7 @@ class CppFunctionAdder(ScriptInterface):
                 and self.function_name == other.function_name
                 and self.arguments_types == other.arguments_types
                 and self.class_name == other.class_name
+                and self.qualifiers == other.qualifiers
             )
 
         def __eq__(self, __o: object) -> bool:
@@ -63,16 +71,50 @@ class CppFunctionAdder(ScriptInterface):
                     self.function_name,
                     tuple(self.arguments_types),
                     self.class_name,
+                    self.qualifiers,
                 )
             )
 
+        def to_json(self) -> list[Any]:
+            """
+            Returns the fields of the function, as stored in the ParseCache.
+            """
+            return [
+                self.return_type,
+                self.function_name,
+                self.arguments_str,
+                self.arguments_types,
+                self.class_name,
+                self.qualifiers,
+            ]
+
+        @classmethod
+        def from_json(cls, fields: list[Any]) -> "CppFunctionAdder.CppFunction":
+            """
+            Creates a function from the fields returned by to_json, without
+            parsing its arguments again.
+            """
+            function = cls.__new__(cls)
+            (
+                function.return_type,
+                function.function_name,
+                function.arguments_str,
+                function.arguments_types,
+                function.class_name,
+                function.qualifiers,
+            ) = fields
+            return function
+
         def __str__(self) -> str:
-            return f"{self.return_type} {self.class_name}::{self.function_name}({self.arguments_str})"
+            signature = f"{self.class_name}::{self.function_name}({self.arguments_str})"
+            if self.return_type:
+                signature = f"{self.return_type} {signature}"
+            if self.qualifiers:
+                signature = f"{signature} {self.qualifiers}"
+            return signature
 
     def __init__(self):
-        super().__init__(
-            "add_cpp_definitions", "Add cpp definitions to class files"
-        )
+        super().__init__("add_cpp_definitions")
 
     def compare_functions(
         self,
@@ -105,51 +147,26 @@ class CppFunctionAdder(ScriptInterface):
         Returns:
             set[CppFunction]: A set containing the functions found in the header file.
         """
-        file_data: str = ""
         with open(file_path, "r", encoding="utf-8") as file:
-            for line in file:
-                # Read file and skip comments
-                if line.startswith("//"):
-                    continue
-                file_data += line
-
-        # Remove newlines
-        file_data = file_data.replace("\r", "").replace("\n", "")
-
-        # Get classes and functions using regex
-        class_regex = r"class\s+(\w+).*?{([^}]+)}"
-        function_regex = r"(\w+)\s+(\w+)\s*\(([^)]*)\)"
-
-        # Set with all class functions
-        cpp_functions: set[CppFunctionAdder.CppFunction] = set()
-
-        lst_classes = re.findall(class_regex, file_data)
+            file_data = file.read()
 
-        for class_name, class_content in lst_classes:
-
-            logging.debug(
-                "Doing regex on class %s with content (%s)",
-                class_name,
-                class_content,
-            )
-            regex_results: list[tuple[str, str, str]] = re.findall(
-                function_regex, class_content
+        return {
+            CppFunctionAdder.CppFunction(
+                function.return_type,
+                function.function_name,
+                function.arguments,
+                function.class_name,
+                function.qualifiers,
             )
-
-            for return_type, function_name, arguments in regex_results:
-                cpp_functions.add(
-                    CppFunctionAdder.CppFunction(
-                        return_type, function_name, arguments, class_name
-                    )
-                )
-        return cpp_functions
+            for function in parse_functions(file_data)
+        }
 
     def get_functions_definitions_from_cpp(
         self,
         file_path: str,
     ) -> set[CppFunction]:
         """
-        This function extracts the class definitions from the cpp file using regex.
+        This function extracts the class definitions from the cpp file.
 
         Args:
             file_path (str): The path of the cpp file
@@ -158,31 +175,23 @@ class CppFunctionAdder(ScriptInterface):
             set[CppFunction]: A set containing the functions found in the cpp file.
         """
 
-        file_data: str = ""
         with open(file_path, "r", encoding="utf-8") as file:
-            for line in file:
-                # Skip comments
-                if line.startswith("//"):
-                    continue
-
-                file_data += line.strip()
-
-        # Remove newlines
-        file_data = file_data.replace("\r", "").replace("\n", "")
-
-        # Get classes and functions using regex
-        regex_function = r"(\w+)\s+(\w+)::(\w+)\s*\(([^)]*)\)"
-        lst_functions = re.findall(regex_function, file_data)
+            file_data = file.read()
 
-        functions_set = {
+        # A definition in scope of "using namespace" can belong to a class
+        # of any of the namespaces used
+        return {
             CppFunctionAdder.CppFunction(
-                return_type, func_name, arguments, class_name
+                function.return_type,
+                function.function_name,
+                function.arguments,
+                class_name,
+                function.qualifiers,
             )
-            for return_type, class_name, func_name, arguments in lst_functions
+            for function in parse_functions(file_data, definitions=True)
+            for class_name in candidate_class_names(function)
         }
 
-        return functions_set
-
     def add_function_definitions(
         self, cpp_file: str, functions: set[CppFunction]
     ):
@@ -200,7 +209,7 @@ class CppFunctionAdder(ScriptInterface):
             file.seek(0)
             for function in functions:
                 content += "\n"
-                function_definition = f"{function.return_type} {function.class_name}::{function.function_name}({function.arguments_str}) {{\n}}\n"
+                function_definition = f"{function} {{\n}}\n"
                 content += function_definition
 
             file.write(content)
@@ -233,21 +242,353 @@ class CppFunctionAdder(ScriptInterface):
             default=".",
             const=".",
             nargs="?",
-            help="The path",
+            help="The path to scan recursively for headers",
+        )
+        parser.add_argument(
+            "-i",
+            "--include",
+            type=str,
+            nargs="+",
+            default=["*"],
+            help="Glob patterns of the headers to scan, relative to --path",
+        )
+        parser.add_argument(
+            "-e",
+            "--exclude",
+            type=str,
+            nargs="+",
+            default=[],
+            help="Glob patterns of the files and directories to skip, relative to --path",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Cache the parsed files on disk and only parse the changed ones",
+        )
+        parser.add_argument(
+            "--cache_file",
+            type=str,
+            default=None,
+            help=f"The cache used by --incremental. Defaults to {CACHE_FILE_NAME} in --path",
+        )
+        parser.add_argument(
+            "--index",
+            action="store_true",
+            help="Look for the definitions in every file of --path instead of only the matching cpp file",
+        )
+        parser.add_argument(
+            "--index_file",
+            type=str,
+            default=None,
+            help=f"The symbol index used by --index. Defaults to {INDEX_FILE_NAME} in --path",
+        )
+        parser.add_argument(
+            "-y",
+            "--yes",
+            action="store_true",
+            help="Add the missing definitions without asking for confirmation",
+        )
+        parser.add_argument(
+            "-w",
+            "--watch",
+            action="store_true",
+            help="Keep watching --path and check the headers each time they are saved",
+        )
+        parser.add_argument(
+            "--debounce",
+            type=float,
+            default=0.05,
+            help="Time in seconds without changes before checking the saved files",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes used to parse the files",
         )
 
-    def create_cpp_file(self, cpp_file: str):
+    def create_cpp_file(self, cpp_file: str, header_file: str):
         """
         This function creates the cpp file.
 
         Args:
             cpp_file (str): The path of the cpp file.
+            header_file (str): The path of the header included by the cpp file.
         """
 
-        header_name = os.path.basename(cpp_file).replace(".cpp", ".h")
+        header_name = os.path.basename(header_file)
         with open(cpp_file, "w", encoding="utf-8") as file:
             file.write(f'#include "{header_name}"\n')
 
+    def find_source_file(self, header_file: str, files: set[str]) -> str:
+        """
+        Returns the source file paired with a header.
+
+        Args:
+            header_file (str): The path of the header file.
+            files (set[str]): The files in the directory of the header.
+
+        Returns:
+            str: The path of the first existing source file with the same name
+                as the header, or an empty string if there is none.
+        """
+        stem, _ = os.path.splitext(header_file)
+        for extension in SOURCE_EXTENSIONS:
+            if os.path.basename(stem) + extension in files:
+                return stem + extension
+        return ""
+
+    def find_files(
+        self, path: str, include: list[str], exclude: list[str]
+    ) -> list[str]:
+        """
+        Walks recursively a directory looking for headers and source files.
+
+        Args:
+            path (str): The root directory.
+            include (list[str]): Glob patterns of the headers to scan.
+            exclude (list[str]): Glob patterns of the files and directories to skip.
+
+        Returns:
+            list[str]: The paths of the headers and source files found.
+        """
+        lst_files: list[str] = []
+
+        for root, dirs, files in os.walk(path):
+            # Prune excluded directories
+            dirs[:] = sorted(
+                directory
+                for directory in dirs
+                if not self.matches_patterns(
+                    os.path.join(root, directory), path, exclude
+                )
+            )
+
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                if self.is_selected(file_path, path, include, exclude):
+                    lst_files.append(file_path)
+
+        return lst_files
+
+    def matches_patterns(
+        self, file_path: str, path: str, patterns: list[str]
+    ) -> bool:
+        """
+        Returns True if the file matches any of the glob patterns.
+
+        Args:
+            file_path (str): The path of the file.
+            path (str): The root directory the patterns are relative to.
+            patterns (list[str]): The glob patterns, matched against the
+                relative path and the name of the file.
+        """
+        rel_path = os.path.relpath(file_path, path)
+        return any(
+            fnmatch.fnmatch(rel_path, pattern)
+            or fnmatch.fnmatch(os.path.basename(rel_path), pattern)
+            for pattern in patterns
+        )
+
+    def is_selected(
+        self, file_path: str, path: str, include: list[str], exclude: list[str]
+    ) -> bool:
+        """
+        Returns True if the file is a header matching the include patterns or
+        a source file, and it doesn't match the exclude patterns.
+
+        Args:
+            file_path (str): The path of the file.
+            path (str): The root directory the patterns are relative to.
+            include (list[str]): Glob patterns of the headers to scan.
+            exclude (list[str]): Glob patterns of the files and directories to skip.
+        """
+        is_header = file_path.endswith(HEADER_EXTENSIONS)
+        if not is_header and not file_path.endswith(SOURCE_EXTENSIONS):
+            return False
+        if self.matches_patterns(file_path, path, exclude):
+            return False
+        return not is_header or self.matches_patterns(file_path, path, include)
+
+    def find_header_pairs(
+        self, lst_files: list[str], create_cpp: bool
+    ) -> list[tuple[str, str]]:
+        """
+        Pairs the headers with the source file of the same name in the same directory.
+
+        Args:
+            lst_files (list[str]): The paths of the headers and source files.
+            create_cpp (bool): Create the missing source files next to the headers.
+
+        Returns:
+            list[tuple[str, str]]: The pairs of header and source files.
+        """
+        lst_headers: list[tuple[str, str]] = []
+
+        dir_files: dict[str, set[str]] = {}
+        for file_path in lst_files:
+            dir_files.setdefault(os.path.dirname(file_path), set()).add(
+                os.path.basename(file_path)
+            )
+
+        for header_file in lst_files:
+            if not header_file.endswith(HEADER_EXTENSIONS):
+                continue
+
+            cpp_file = self.find_source_file(
+                header_file, dir_files[os.path.dirname(header_file)]
+            )
+
+            if not cpp_file:
+                if create_cpp:
+                    cpp_file = os.path.splitext(header_file)[0] + ".cpp"
+                    LOGGER.info("Creating cpp file %s", cpp_file)
+                    self.create_cpp_file(cpp_file, header_file)
+                else:
+                    LOGGER.debug(
+                        "No cpp file found corresponding to %s. Ignoring.",
+                        header_file,
+                    )
+                    continue
+
+            lst_headers.append((header_file, cpp_file))
+
+        return lst_headers
+
+    def get_missing_functions_from_index(
+        self, lst_headers: list[tuple[str, str]], index: SymbolIndex
+    ) -> list[tuple[str, str, set[CppFunction]]]:
+        """
+        Returns the functions declared in the headers that are not defined
+        in any file of the project.
+
+        Args:
+            lst_headers (list[tuple[str, str]]): The pairs of header and cpp files.
+            index (SymbolIndex): The index of all the files of the project.
+
+        Returns:
+            list[tuple[str, str, set[CppFunction]]]: The pairs with missing
+                functions and the functions missing.
+        """
+        changes_needed = []
+
+        # A function declared in several headers is only added once
+        added_keys: set[str] = set()
+
+        for header_file, cpp_file in lst_headers:
+            file_symbols = index.files.get(os.path.abspath(header_file))
+            if file_symbols is None:
+                continue
+
+            missing_functions = set()
+            for function in file_symbols.declarations:
+                key = function_key(function)
+                if index.is_defined(key) or key in added_keys:
+                    continue
+                added_keys.add(key)
+                missing_functions.add(
+                    CppFunctionAdder.CppFunction(
+                        function.return_type,
+                        function.function_name,
+                        function.arguments,
+                        function.class_name,
+                        function.qualifiers,
+                    )
+                )
+            if len(missing_functions) > 0:
+                changes_needed.append((header_file, cpp_file, missing_functions))
+        return changes_needed
+
+    def get_missing_functions(
+        self, header_file: str, cpp_file: str
+    ) -> set[CppFunction]:
+        """
+        Returns the functions declared in a header but not defined in its cpp file.
+
+        Args:
+            header_file (str): The path of the header file.
+            cpp_file (str): The path of the cpp file.
+
+        Returns:
+            set[CppFunction]: The functions missing in the cpp file.
+        """
+        header_functions = self.get_functions_from_header(header_file)
+        cpp_functions = self.get_functions_definitions_from_cpp(cpp_file)
+        return self.compare_functions(header_functions, cpp_functions)
+
+    def scan_headers(
+        self,
+        lst_headers: list[tuple[str, str]],
+        jobs: int,
+        cache: Optional[ParseCache] = None,
+    ) -> list[tuple[str, str, set[CppFunction]]]:
+        """
+        Parses the pairs of header and cpp files, in parallel if jobs > 1.
+
+        Args:
+            lst_headers (list[tuple[str, str]]): The pairs of header and cpp files.
+            jobs (int): The number of processes to use.
+            cache (Optional[ParseCache], optional): The cache of the results,
+                unchanged pairs found in the cache are not parsed. Defaults to None.
+
+        Returns:
+            list[tuple[str, str, set[CppFunction]]]: The pairs with missing
+                functions and the functions missing.
+        """
+        cached_results: dict[tuple[str, str], set[CppFunctionAdder.CppFunction]] = {}
+        if cache is not None:
+            for pair in lst_headers:
+                result = cache.get(*pair)
+                if result is None:
+                    continue
+                try:
+                    cached_results[pair] = {
+                        self.CppFunction.from_json(fields) for fields in result
+                    }
+                except (TypeError, ValueError):
+                    LOGGER.warning("Ignoring corrupted cache entry of %s", pair[0])
+            LOGGER.info(
+                "%d of %d header files unchanged since the last run",
+                len(cached_results),
+                len(lst_headers),
+            )
+
+        lst_parse = [pair for pair in lst_headers if pair not in cached_results]
+        headers, cpp_files = zip(*lst_parse) if lst_parse else ((), ())
+
+        # Only the pairs missing from the cache are sent to the processes
+        if jobs > 1 and len(lst_parse) > 1:
+            chunksize = max(len(lst_parse) // (jobs * 4), 1)
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(
+                    executor.map(
+                        self.get_missing_functions,
+                        headers,
+                        cpp_files,
+                        chunksize=chunksize,
+                    )
+                )
+        else:
+            results = list(map(self.get_missing_functions, headers, cpp_files))
+
+        for header_file, cpp_file, missing_functions in zip(
+            headers, cpp_files, results
+        ):
+            cached_results[(header_file, cpp_file)] = missing_functions
+            if cache is not None:
+                cache.set(
+                    header_file,
+                    cpp_file,
+                    [function.to_json() for function in missing_functions],
+                )
+
+        return [
+            (header_file, cpp_file, cached_results[(header_file, cpp_file)])
+            for header_file, cpp_file in lst_headers
+            if len(cached_results[(header_file, cpp_file)]) > 0
+        ]
+
     def __call__(self, args: Namespace):
         """
         This is the main function of the cpp_tools script.
@@ -259,19 +600,24 @@ class CppFunctionAdder(ScriptInterface):
         lst_headers: list[tuple[str, str]] = []
 
         if "file" in args and args.file:
-            header_strip = args.file.replace(".h", "")
-            header_file = header_strip + ".h"
-            cpp_file = header_strip + ".cpp"
+            header_file = args.file
+            if not header_file.endswith(HEADER_EXTENSIONS):
+                header_file += ".h"
             if not os.path.isfile(header_file):
                 LOGGER.info(
                     "Header file %s not found. Aborting...", header_file
                 )
                 return
 
-            if not os.path.isfile(cpp_file):
+            header_dir = os.path.dirname(header_file) or "."
+            cpp_file = self.find_source_file(
+                header_file, set(os.listdir(header_dir))
+            )
+            if not cpp_file:
+                cpp_file = os.path.splitext(header_file)[0] + ".cpp"
                 if args.create_cpp:
                     LOGGER.info("Creating cpp file %s", cpp_file)
-                    self.create_cpp_file(cpp_file)
+                    self.create_cpp_file(cpp_file, header_file)
                 else:
                     LOGGER.info("Cpp file %s not found. Aborting...", cpp_file)
                     return
@@ -279,77 +625,223 @@ class CppFunctionAdder(ScriptInterface):
             lst_headers.append((header_file, cpp_file))
 
         elif "path" in args and args.path:
-            files = set(os.listdir(args.path))
-
-            # Search for headers in the path
-            for file in files:
-                if file.endswith(".h"):
-                    cpp_file = file.replace(".h", ".cpp")
-
-                    if cpp_file not in files:
-                        if args.create_cpp:
-                            LOGGER.info("Creating cpp file %s", cpp_file)
-                            self.create_cpp_file(cpp_file)
-                        else:
-                            LOGGER.info(
-                                "No cpp file found corresponding to %s. Ignoring.",
-                                file,
-                            )
-                            continue
-
-                    lst_headers.append((file, cpp_file))
+            with self.stage("find files"):
+                lst_files = self.find_files(
+                    args.path, args.include, args.exclude
+                )
+                lst_headers = self.find_header_pairs(lst_files, args.create_cpp)
 
         else:
             LOGGER.info("No header file or path provided")
             exit(1)
 
         LOGGER.info("Found %d header files to scan", len(lst_headers))
-        changes_needed: list[
-            tuple[str, str, set[CppFunctionAdder.CppFunction]]
-        ] = []
-
-        for header_file, cpp_file in lst_headers:
-            # Get functions from files and compare them
-            LOGGER.info("Scanning header file %s", header_file)
-            header_functions = self.get_functions_from_header(header_file)
-            cpp_functions = self.get_functions_definitions_from_cpp(cpp_file)
-            missing_functions = self.compare_functions(
-                header_functions, cpp_functions
+        index = None
+        if args.index:
+            # Look for the definitions in every file of the project
+            index = SymbolIndex(
+                args.index_file or os.path.join(args.path, INDEX_FILE_NAME)
             )
-
-            # Save the files that need changes and display a message
-            if len(missing_functions) > 0:
-                LOGGER.info(
-                    "The following functions are missing in %s", cpp_file
+            with self.stage("index"):
+                index.update(
+                    self.find_files(args.path, ["*"], args.exclude), args.jobs
                 )
-                LOGGER.info(
-                    "-------------------------------------------------"
+                index.save()
+            with self.stage("scan"):
+                changes_needed = self.get_missing_functions_from_index(
+                    lst_headers, index
                 )
-                for func in missing_functions:
-                    LOGGER.info(func)
-                LOGGER.info(
-                    "-------------------------------------------------"
+        else:
+            cache = None
+            if args.incremental:
+                cache = ParseCache(
+                    args.cache_file or os.path.join(args.path, CACHE_FILE_NAME)
                 )
-
-                changes_needed.append(
-                    (header_file, cpp_file, missing_functions)
+            with self.stage("scan"):
+                changes_needed = self.scan_headers(
+                    lst_headers, args.jobs, cache
                 )
+                if cache is not None:
+                    cache.save()
+
+        self.log_changes(changes_needed)
+
+        # Prompt user for confirmation
+        proceed = len(changes_needed) > 0
+        if proceed and not args.yes:
+            var_input = input("Do you want to proceed? (y/n)")
+            if var_input.lower() != "y":
+                LOGGER.info("Skipping the changes")
+                proceed = False
+
+        if proceed:
+            # Make changes to the files
+            with self.stage("write"):
+                self.apply_changes(changes_needed, index)
 
-        # LOGGER.infos a summary of changes needed
+        if args.watch:
+            self.watch(args, index, lst_headers)
+
+    def log_changes(
+        self, changes_needed: list[tuple[str, str, set[CppFunction]]]
+    ):
+        """
+        Logs a summary of the functions missing in each cpp file.
+
+        Args:
+            changes_needed (list[tuple[str, str, set[CppFunction]]]): The pairs
+                of header and cpp files and the functions missing.
+        """
         LOGGER.info("--------------------SUMMARY----------------------")
         LOGGER.info("%d files with changes needed", len(changes_needed))
         for header_file, cpp_file, missing_functions in changes_needed:
             LOGGER.info(
-                "Header file requires %d changes", len(missing_functions)
+                "%s requires %d changes in %s",
+                header_file,
+                len(missing_functions),
+                cpp_file,
             )
+            for func in sorted(map(str, missing_functions)):
+                LOGGER.info("    %s", func)
+        LOGGER.info("-------------------------------------------------")
 
-        # Prompt user for confirmation
-        if len(changes_needed) > 0:
-            var_input = input("Do you want to proceed? (y/n)")
-            if var_input.lower() != "y":
-                LOGGER.info("Aborting...")
-                return
+    def apply_changes(
+        self,
+        changes_needed: list[tuple[str, str, set[CppFunction]]],
+        index: Optional[SymbolIndex] = None,
+    ):
+        """
+        Adds the missing functions to the cpp files.
 
-            # Make changes to the files
-            for header_file, cpp_file, missing_functions in changes_needed:
-                self.add_function_definitions(cpp_file, missing_functions)
+        Args:
+            changes_needed (list[tuple[str, str, set[CppFunction]]]): The pairs
+                of header and cpp files and the functions missing.
+            index (Optional[SymbolIndex], optional): The index to update with
+                the new definitions. Defaults to None.
+        """
+        for _, cpp_file, missing_functions in changes_needed:
+            self.add_function_definitions(cpp_file, missing_functions)
+
+        if index is not None:
+            index.refresh([cpp_file for _, cpp_file, _ in changes_needed])
+            index.save()
+
+    def get_changed_pairs(
+        self, changed_files: set[str], lst_files: set[str]
+    ) -> list[tuple[str, str]]:
+        """
+        Returns the pairs of header and cpp files affected by changed files.
+
+        Args:
+            changed_files (set[str]): The paths of the changed files.
+            lst_files (set[str]): The paths of all the headers and source files.
+
+        Returns:
+            list[tuple[str, str]]: The pairs of header and source files.
+        """
+        headers = set()
+        for file_path in changed_files:
+            stem = os.path.splitext(file_path)[0]
+            for extension in HEADER_EXTENSIONS:
+                if stem + extension in lst_files:
+                    headers.add(stem + extension)
+
+        dir_files: dict[str, set[str]] = {}
+        lst_headers = []
+        for header_file in sorted(headers):
+            directory = os.path.dirname(header_file)
+            if directory not in dir_files:
+                dir_files[directory] = set(os.listdir(directory or "."))
+            cpp_file = self.find_source_file(header_file, dir_files[directory])
+            if cpp_file:
+                lst_headers.append((header_file, cpp_file))
+        return lst_headers
+
+    def watch(
+        self,
+        args: Namespace,
+        index: Optional[SymbolIndex],
+        lst_headers: list[tuple[str, str]],
+    ):
+        """
+        Watches --path, or only the selected pair with --file, and checks
+        again the pairs of header and cpp files each time a file is saved,
+        until interrupted.
+
+        Args:
+            args (Namespace): The arguments of the script.
+            index (Optional[SymbolIndex]): The index of the project, if --index is used.
+            lst_headers (list[tuple[str, str]]): The pairs of header and cpp files scanned.
+        """
+        pair_files: Optional[set[str]] = None
+        if "file" in args and args.file:
+            # Watch the directory of the pair without its subdirectories
+            watch_path = os.path.dirname(lst_headers[0][0]) or "."
+            pair_files = {
+                os.path.join(watch_path, os.path.basename(file_path))
+                for file_path in lst_headers[0]
+            }
+            lst_files = set(pair_files)
+            watcher = create_watcher(watch_path, lambda directory: False)
+        else:
+            watch_path = args.path
+            lst_files = set(
+                self.find_files(args.path, args.include, args.exclude)
+            )
+            watcher = create_watcher(
+                args.path,
+                lambda directory: not self.matches_patterns(
+                    directory, args.path, args.exclude
+                ),
+            )
+
+        def is_watched(file_path: str, include: list[str]) -> bool:
+            if pair_files is not None:
+                return file_path in pair_files
+            return self.is_selected(file_path, args.path, include, args.exclude)
+
+        LOGGER.info("Watching %s for changes, press Ctrl+C to stop", watch_path)
+
+        with watcher:
+            try:
+                while True:
+                    changed_files = {
+                        file_path
+                        for file_path in watcher.wait_debounced(args.debounce)
+                        if is_watched(file_path, ["*"])
+                    }
+                    if not changed_files:
+                        continue
+
+                    start = time.perf_counter()
+                    for file_path in changed_files:
+                        if os.path.isfile(file_path) and is_watched(
+                            file_path, args.include
+                        ):
+                            lst_files.add(file_path)
+                        else:
+                            lst_files.discard(file_path)
+
+                    lst_headers = self.get_changed_pairs(
+                        changed_files, lst_files
+                    )
+                    if index is not None:
+                        index.refresh(list(changed_files))
+                        index.save()
+                        changes_needed = self.get_missing_functions_from_index(
+                            lst_headers, index
+                        )
+                    else:
+                        changes_needed = self.scan_headers(lst_headers, 1)
+
+                    if len(changes_needed) > 0:
+                        self.log_changes(changes_needed)
+                        if args.yes:
+                            self.apply_changes(changes_needed, index)
+                    LOGGER.debug(
+                        "Checked %d files in %.1fms",
+                        len(changed_files),
+                        (time.perf_counter() - start) * 1000,
+                    )
+            except KeyboardInterrupt:
+                LOGGER.info("Stopped watching %s", watch_path)
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Optional
+
+from myutils.cpp_parser import PARSER_VERSION
+from myutils.file_utils import write_file_atomic
+
+LOGGER = logging.getLogger(__name__)
+
+# Bump whenever the layout of the cache changes
+CACHE_VERSION = 2
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Returns the hash of the content of a file.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest of the content.
+    """
+    with open(file_path, "rb") as file:
+        return hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+
+
+class ParseCache:
+    """
+    This class stores on disk the results of parsing pairs of header and cpp
+    files, so unchanged pairs are not parsed again.
+
+    The cache is written as JSON rather than pickled, since it usually lives
+    in the scanned tree and loading a pickle can run arbitrary code.
+
+    A file is considered unchanged if its size and modification time did
+    not change. Otherwise its content is hashed, so files that are touched
+    without being modified are not parsed again either.
+    """
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self.version = (CACHE_VERSION, PARSER_VERSION)
+
+        # absolute path -> (size, mtime_ns, digest)
+        self.files: dict[str, tuple[int, int, str]] = {}
+
+        # (header, cpp) -> (header digest, cpp digest, result)
+        self.pairs: dict[tuple[str, str], tuple[str, str, Any]] = {}
+
+        self.modified = False
+        self.load()
+
+    def load(self):
+        """
+        Loads the cache from disk, discarding it if it was written by
+        another version of the parser.
+        """
+        if not os.path.isfile(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            LOGGER.warning("Ignoring corrupted cache %s", self.cache_file)
+            self.modified = True
+            return
+
+        if not isinstance(data, dict) or data.get("version") != list(
+            self.version
+        ):
+            LOGGER.info("Ignoring cache %s of another version", self.cache_file)
+            self.modified = True
+            return
+
+        try:
+            files = {
+                path: (size, mtime_ns, digest)
+                for path, size, mtime_ns, digest in data["files"]
+            }
+            pairs = {
+                (entry[0], entry[1]): (entry[2], entry[3], entry[4])
+                for entry in data["pairs"]
+            }
+        except (KeyError, IndexError, TypeError, ValueError):
+            LOGGER.warning("Ignoring corrupted cache %s", self.cache_file)
+            self.modified = True
+            return
+
+        self.files = files
+        self.pairs = pairs
+
+    def save(self):
+        """
+        Writes the cache to disk if it was modified, removing the entries of
+        files that no longer exist.
+        """
+        stale_pairs = [
+            pair
+            for pair in self.pairs
+            if not (os.path.isfile(pair[0]) and os.path.isfile(pair[1]))
+        ]
+        for pair in stale_pairs:
+            del self.pairs[pair]
+        stale_files = [path for path in self.files if not os.path.isfile(path)]
+        for path in stale_files:
+            del self.files[path]
+
+        if not self.modified and not stale_pairs and not stale_files:
+            return
+
+        write_file_atomic(
+            self.cache_file,
+            json.dumps(
+                {
+                    "version": self.version,
+                    "files": [
+                        [path, *values] for path, values in self.files.items()
+                    ],
+                    "pairs": [
+                        [*pair, *values] for pair, values in self.pairs.items()
+                    ],
+                }
+            ),
+        )
+        self.modified = False
+
+    def get_digest(self, file_path: str) -> str:
+        """
+        Returns the digest of a file, only reading it if its size or
+        modification time changed since it was cached.
+
+        Args:
+            file_path (str): The path of the file.
+
+        Returns:
+            str: The hexadecimal digest of the content.
+        """
+        stat = os.stat(file_path)
+        cached = self.files.get(file_path)
+        if (
+            cached is not None
+            and cached[0] == stat.st_size
+            and cached[1] == stat.st_mtime_ns
+        ):
+            return cached[2]
+
+        digest = file_digest(file_path)
+        self.files[file_path] = (stat.st_size, stat.st_mtime_ns, digest)
+        self.modified = True
+        return digest
+
+    def get(self, header_file: str, cpp_file: str) -> Optional[Any]:
+        """
+        Returns the cached result of a pair of files if none of them changed.
+
+        Args:
+            header_file (str): The path of the header file.
+            cpp_file (str): The path of the cpp file.
+
+        Returns:
+            Optional[Any]: The cached result, or None if not cached.
+        """
+        header_file = os.path.abspath(header_file)
+        cpp_file = os.path.abspath(cpp_file)
+        header_digest = self.get_digest(header_file)
+        cpp_digest = self.get_digest(cpp_file)
+
+        cached = self.pairs.get((header_file, cpp_file))
+        if (
+            cached is None
+            or cached[0] != header_digest
+            or cached[1] != cpp_digest
+        ):
+            return None
+
+        return cached[2]
+
+    def set(self, header_file: str, cpp_file: str, result: Any):
+        """
+        Stores the result of parsing a pair of files.
+        The files are identified by the digests computed in the last call to get,
+        before they were parsed.
+
+        Args:
+            header_file (str): The path of the header file.
+            cpp_file (str): The path of the cpp file.
+            result (Any): The result to store, it must be serializable to JSON.
+        """
+        header_file = os.path.abspath(header_file)
+        cpp_file = os.path.abspath(cpp_file)
+        self.pairs[(header_file, cpp_file)] = (
+            self.files[header_file][2],
+            self.files[cpp_file][2],
+            result,
+        )
+        self.modified = True
@@ -0,0 +1,821 @@
+import bisect
+import functools
+import re
+from typing import Iterator, NamedTuple, Optional
+
+# Bump whenever the output of the parser changes for the same input
+PARSER_VERSION = 3
+
+# Each match consumes the whitespace, comments and preprocessor lines
+# before a single token
+TOKEN_REGEX = re.compile(
+    r"""
+    (?:\s+|//[^\n]*|/\*.*?(?:\*/|\Z)|\#(?:\\.|[^\n\\])*)*
+    (?P<token>
+        "(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'
+        | [A-Za-z_]\w*
+        | \.?\d[\w.']*
+        | ::|->|&&|\.\.\.|\S
+    )?
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+ACCESS_SPECIFIERS = {
+    "public",
+    "private",
+    "protected",
+    "signals",
+    "slots",
+    "Q_SIGNALS",
+    "Q_SLOTS",
+}
+
+# Qt signals are implemented by moc, they are never defined by hand
+SIGNAL_SPECIFIERS = {"signals", "Q_SIGNALS"}
+
+# Identifiers allowed after the arguments of a declaration, any other
+# identifier follows a function-like macro without a semicolon
+TRAILING_SPECIFIERS = {
+    "const",
+    "volatile",
+    "noexcept",
+    "throw",
+    "override",
+    "final",
+    "try",
+    "requires",
+}
+
+# Specifiers that are only allowed on the declaration
+DECLARATION_SPECIFIERS = {
+    "static",
+    "virtual",
+    "inline",
+    "explicit",
+    "extern",
+    "constexpr",
+    "consteval",
+    "mutable",
+}
+
+SIGNATURE_QUALIFIERS = {"const", "volatile", "&", "&&"}
+
+BUILTIN_TYPES = {
+    "void",
+    "bool",
+    "char",
+    "short",
+    "int",
+    "long",
+    "float",
+    "double",
+    "signed",
+    "unsigned",
+    "auto",
+    "wchar_t",
+    "char8_t",
+    "char16_t",
+    "char32_t",
+}
+
+
+class ParsedFunction(NamedTuple):
+    return_type: str
+    function_name: str
+    arguments: str
+    class_name: str
+    qualifiers: str
+    line: int
+
+    # Namespaces of the "using namespace" directives in scope of a definition
+    using_namespaces: tuple[str, ...] = ()
+
+
+def tokenize(text: str) -> Iterator[tuple[str, int]]:
+    """
+    Splits C++ source code into tokens, skipping comments and preprocessor lines.
+
+    Args:
+        text (str): The C++ source code.
+
+    Yields:
+        tuple[str, int]: The tokens of the source code and their offset.
+    """
+    for match in TOKEN_REGEX.finditer(text):
+        token = match.group("token")
+        if token:
+            yield token, match.start("token")
+
+
+def signature_key(
+    class_name: str,
+    function_name: str,
+    arguments_types: tuple[str, ...],
+    qualifiers: str,
+) -> str:
+    """
+    Returns the key identifying a member function, which doesn't depend on
+    the return type, the argument names or the default values.
+
+    Args:
+        class_name (str): The qualified name of the class.
+        function_name (str): The name of the function.
+        arguments_types (tuple[str, ...]): The type of each argument.
+        qualifiers (str): The qualifiers after the arguments, ex: const.
+
+    Returns:
+        str: The key, ex: "ns::Foo::bar(int, const std::string&) const".
+    """
+    key = f"{class_name}::{function_name}({', '.join(arguments_types)})"
+    if qualifiers:
+        key = f"{key} {qualifiers}"
+    return key
+
+
+def function_key(function: ParsedFunction) -> str:
+    """
+    Returns the key identifying a parsed member function.
+
+    Args:
+        function (ParsedFunction): The parsed function.
+
+    Returns:
+        str: The key of the function, see signature_key.
+    """
+    return signature_key(
+        function.class_name,
+        function.function_name,
+        parse_arguments(function.arguments)[0],
+        function.qualifiers,
+    )
+
+
+def candidate_class_names(function: ParsedFunction) -> list[str]:
+    """
+    Returns the names the class of a definition can refer to, the class
+    name as written first, then the class name in each namespace used by
+    a "using namespace" directive.
+
+    Args:
+        function (ParsedFunction): The parsed function.
+
+    Returns:
+        list[str]: The qualified class names, ex: ["Foo", "ns::Foo"].
+    """
+    names = [function.class_name]
+    for namespace in function.using_namespaces:
+        name = f"{namespace}::{function.class_name.rsplit('::', 1)[-1]}"
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def candidate_keys(function: ParsedFunction) -> list[str]:
+    """
+    Returns the keys a definition can match, see candidate_class_names.
+
+    Args:
+        function (ParsedFunction): The parsed function.
+
+    Returns:
+        list[str]: The keys, the key of the class name as written first.
+    """
+    arguments_types = parse_arguments(function.arguments)[0]
+    return [
+        signature_key(
+            class_name,
+            function.function_name,
+            arguments_types,
+            function.qualifiers,
+        )
+        for class_name in candidate_class_names(function)
+    ]
+
+
+def is_identifier(token: str) -> bool:
+    return token[0].isalpha() or token[0] == "_"
+
+
+def join_tokens(tokens: list[str]) -> str:
+    """
+    Joins tokens into a normalized string, only keeping spaces between words.
+
+    Args:
+        tokens (list[str]): The tokens to join.
+
+    Returns:
+        str: The normalized string, ex: "const std::map<int, int>&".
+    """
+    result = ""
+    prev = ""
+    prev_prev = ""
+    for token in tokens:
+        is_word = token[0].isalnum() or token[0] == "_"
+        if prev and (
+            prev in (",", "=")
+            or token == "="
+            or (is_word and (prev[-1].isalnum() or prev[-1] == "_"))
+            or (
+                is_word
+                and prev in ("*", "&", "&&", ">")
+                # Declarators of function pointers, ex: void (*callback)(int)
+                and prev_prev != "("
+            )
+        ):
+            result += " "
+        result += token
+        prev_prev = prev
+        prev = token
+    return result
+
+
+def split_top_level(tokens: list[str], separator: str) -> list[list[str]]:
+    """
+    Splits tokens by a separator that is not enclosed in brackets.
+
+    Args:
+        tokens (list[str]): The tokens to split.
+        separator (str): The separator token.
+
+    Returns:
+        list[list[str]]: The groups of tokens.
+    """
+    groups: list[list[str]] = [[]]
+    depth = 0
+
+    # "<" is only a bracket after a name outside of parenthesis, ex: the
+    # template std::map<int, int>, not the comparison (1 < 2)
+    angle_depth = 0
+    prev = ""
+    for token in tokens:
+        if token in ("(", "[", "{"):
+            depth += 1
+        elif token in (")", "]", "}"):
+            depth -= 1
+        elif token == "<" and depth == 0 and prev and is_identifier(prev):
+            angle_depth += 1
+        elif token == ">" and depth == 0 and angle_depth > 0:
+            angle_depth -= 1
+        if token == separator and depth == 0 and angle_depth == 0:
+            groups.append([])
+        else:
+            groups[-1].append(token)
+        prev = token
+    return groups
+
+
+def strip_argument_name(argument: list[str]) -> list[str]:
+    """
+    Removes the name of an argument, keeping only its type.
+
+    Args:
+        argument (list[str]): The tokens of the argument, without default value.
+
+    Returns:
+        list[str]: The tokens of the type, ex: int[3] for int values[3] or
+            void(*)(int) for void (*callback)(int).
+    """
+    # Function pointers and references to arrays, ex: void (*callback)(int)
+    if "(" in argument:
+        open_index = argument.index("(")
+        close_index = find_closing(argument, open_index)
+        inner = argument[open_index + 1 : close_index]
+        if (
+            len(inner) >= 2
+            and is_identifier(inner[-1])
+            and inner[-2] in ("*", "&", "&&")
+        ):
+            return argument[: close_index - 1] + argument[close_index:]
+
+    # The name is before the array brackets, ex: int values[3]
+    end = argument.index("[") if "[" in argument else len(argument)
+    head = argument[:end]
+    if (
+        len(head) > 1
+        and is_identifier(head[-1])
+        and head[-1] not in BUILTIN_TYPES
+        and head[-1] not in SIGNATURE_QUALIFIERS
+        and head[-2] != "::"
+    ):
+        return head[:-1] + argument[end:]
+    return argument
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_arguments(arguments: str) -> tuple[tuple[str, ...], str]:
+    """
+    Parses the arguments of a function.
+    The results are cached since the same signatures repeat a lot in a project.
+
+    Args:
+        arguments (str): The arguments as written between the parenthesis.
+
+    Returns:
+        tuple[tuple[str, ...], str]: The type of each argument and the arguments
+            without default values.
+    """
+    tokens = [token for token, _ in tokenize(arguments)]
+    if tokens == ["void"]:
+        return (), ""
+
+    types = []
+    declarations = []
+    for argument in split_top_level(tokens, ","):
+        if not argument:
+            continue
+
+        # Remove default value
+        argument = split_top_level(argument, "=")[0]
+        declarations.append(join_tokens(argument))
+
+        # Remove the argument name if present
+        types.append(join_tokens(strip_argument_name(argument)))
+
+    return tuple(types), ", ".join(declarations)
+
+
+def find_closing(tokens: list[str], start: int) -> int:
+    """
+    Returns the index of the bracket closing the one at start.
+
+    Args:
+        tokens (list[str]): The tokens.
+        start (int): The index of the opening bracket.
+
+    Returns:
+        int: The index of the closing bracket, or len(tokens) if not closed.
+    """
+    opening = tokens[start]
+    closing = {"(": ")", "<": ">", "[": "]", "{": "}"}[opening]
+    depth = 0
+    for index in range(start, len(tokens)):
+        if tokens[index] == opening:
+            depth += 1
+        elif tokens[index] == closing:
+            depth -= 1
+            if depth == 0:
+                return index
+        elif opening == "<" and tokens[index] == ">>":
+            depth -= 2
+            if depth <= 0:
+                return index
+    return len(tokens)
+
+
+def parse_function(
+    tokens: list[str], definition: bool
+) -> Optional[tuple[str, str, str, list[str], str, bool]]:
+    """
+    Parses a function declaration or definition.
+
+    Args:
+        tokens (list[str]): The tokens of the statement.
+        definition (bool): True if the statement is followed by a function body.
+
+    Returns:
+        Optional[tuple[str, str, str, list[str], str, bool]]: The return type, the name,
+            the arguments, the class qualifier, the signature qualifiers and if the
+            function needs a definition outside of the class. None if the
+            statement is not a function.
+    """
+    is_template = False
+
+    # Remove templates and attributes
+    while tokens and tokens[0] in ("template", "["):
+        if tokens[0] == "template":
+            is_template = True
+            if len(tokens) < 2 or tokens[1] != "<":
+                return None
+            tokens = tokens[find_closing(tokens, 1) + 1 :]
+        else:
+            tokens = tokens[find_closing(tokens, 0) + 1 :]
+
+    if not tokens or tokens[0] in ("friend", "typedef", "using"):
+        return None
+
+    # Find the parenthesis of the arguments
+    if "operator" in tokens:
+        operator_index = tokens.index("operator")
+        if tokens[operator_index + 1 : operator_index + 3] == ["(", ")"]:
+            open_index = operator_index + 3
+        else:
+            open_index = operator_index + 1
+            while open_index < len(tokens) and tokens[open_index] != "(":
+                open_index += 1
+        name_start = operator_index
+    else:
+        open_index = 0
+        depth = 0
+        while open_index < len(tokens):
+            token = tokens[open_index]
+            if token == "<":
+                depth += 1
+            elif token == ">":
+                depth -= 1
+            elif token == ">>":
+                depth -= 2
+            elif token == "(" and depth <= 0:
+                break
+            open_index += 1
+        name_start = open_index - 1
+        if name_start >= 1 and tokens[name_start - 1] == "~":
+            name_start -= 1
+
+    if open_index >= len(tokens) or name_start < 0:
+        return None
+
+    name_tokens = tokens[name_start:open_index]
+    if not name_tokens or not (
+        name_tokens[-1][0].isalpha() or name_tokens[-1][0] == "_"
+    ):
+        if name_tokens[:1] != ["operator"]:
+            return None
+    if name_tokens[0] in BUILTIN_TYPES or name_tokens[0] in (
+        "return",
+        "if",
+        "while",
+        "for",
+        "switch",
+        "sizeof",
+        "decltype",
+        "alignas",
+        "static_assert",
+    ):
+        return None
+
+    # Class qualifier of the name, ex: Outer::Inner::
+    qualifier_start = name_start
+    while (
+        qualifier_start >= 2
+        and tokens[qualifier_start - 1] == "::"
+        and (
+            tokens[qualifier_start - 2][0].isalpha()
+            or tokens[qualifier_start - 2][0] == "_"
+            or tokens[qualifier_start - 2] == ">"
+        )
+    ):
+        if tokens[qualifier_start - 2] == ">":
+            # Member of a class template, defined in the header
+            is_template = True
+            depth = 0
+            index = qualifier_start - 2
+            while index >= 0:
+                if tokens[index] == ">":
+                    depth += 1
+                elif tokens[index] == "<":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                index -= 1
+            qualifier_start = index - 1
+        else:
+            qualifier_start -= 2
+    if qualifier_start > 0 and tokens[qualifier_start - 1] == "::":
+        qualifier_start -= 1
+    qualifier = join_tokens(tokens[qualifier_start:name_start])
+    if qualifier.endswith("::"):
+        qualifier = qualifier[:-2]
+    qualifier = qualifier.lstrip(":")
+
+    # Return type without the declaration specifiers
+    return_tokens = [
+        token
+        for token in tokens[:qualifier_start]
+        if token not in DECLARATION_SPECIFIERS
+    ]
+    if return_tokens and return_tokens[-1] in ("=", ",", "(", ":", "."):
+        return None
+
+    close_index = find_closing(tokens, open_index)
+    if close_index >= len(tokens):
+        return None
+    arguments = join_tokens(tokens[open_index + 1 : close_index])
+
+    # Function pointers, ex: void (*callback)(int);
+    if arguments.startswith("*") or arguments.startswith("^"):
+        return None
+
+    # Qualifiers after the arguments
+    qualifiers = []
+    needs_definition = not definition
+    index = close_index + 1
+    while index < len(tokens):
+        token = tokens[index]
+        if token in SIGNATURE_QUALIFIERS:
+            qualifiers.append(token)
+        elif token == "->":
+            if return_tokens == ["auto"]:
+                return_tokens = [
+                    tok
+                    for tok in tokens[index + 1 :]
+                    if tok not in ("override", "final")
+                ]
+                if "=" in return_tokens:
+                    needs_definition = False
+                    return_tokens = return_tokens[: return_tokens.index("=")]
+            break
+        elif token == "=":
+            # Pure virtual, defaulted and deleted functions
+            needs_definition = False
+            break
+        elif token == ":":
+            # Constructor initializer list
+            break
+        elif token in ("noexcept", "throw"):
+            # Exception specifications must be repeated in the definition
+            end = index
+            if index + 1 < len(tokens) and tokens[index + 1] == "(":
+                end = find_closing(tokens, index + 1)
+            qualifiers.append(join_tokens(tokens[index : end + 1]))
+            index = end
+        index += 1
+
+    if is_template:
+        needs_definition = False
+
+    # Operator names are written without spaces, ex: operator==
+    name = "".join(
+        " " + token
+        if index > 0 and token[0].isalpha() and name_tokens[index - 1][0].isalpha()
+        else token
+        for index, token in enumerate(name_tokens)
+    )
+
+    return (
+        join_tokens(return_tokens),
+        name,
+        arguments,
+        [qualifier] if qualifier else [],
+        " ".join(qualifiers),
+        needs_definition,
+    )
+
+
+class _Scope:
+    def __init__(self, kind: str, name: str = "", is_template=False):
+        self.kind = kind
+        self.name = name
+        self.is_template = is_template
+
+        # True in the signals section of a Qt class
+        self.in_signals = False
+
+        # Namespaces of the "using namespace" directives of the scope
+        self.using_namespaces: list[str] = []
+
+
+def _declaration_scope(statement: list[str]) -> Optional[_Scope]:
+    """
+    Returns the scope opened by a statement followed by "{", if it's a
+    namespace or a class.
+    """
+    if not statement:
+        return None
+
+    if statement[0] == "inline" and statement[1:2] == ["namespace"]:
+        statement = statement[1:]
+    if statement[0] == "namespace":
+        return _Scope("namespace", join_tokens(statement[1:]))
+    if statement[0] == "extern" and len(statement) == 2:
+        return _Scope("namespace")
+
+    is_template = False
+    if statement[0] == "template" and statement[1:2] == ["<"]:
+        is_template = True
+        statement = statement[find_closing(statement, 1) + 1 :]
+
+    if (
+        not statement
+        or statement[0] not in ("class", "struct", "union")
+        or "(" in statement
+        or "=" in statement
+    ):
+        return None
+
+    # Class name is the last identifier before the inheritance list
+    head = split_top_level(statement[1:], ":")[0]
+    head = [token for token in head if token != "final"]
+    if head and head[-1] == ">":
+        # Template specialization, ex: class Foo<int>
+        is_template = True
+        head = head[: head.index("<")]
+    name = head[-1] if head else ""
+    if not name or not (name[0].isalpha() or name[0] == "_"):
+        name = ""
+    return _Scope("class", name, is_template)
+
+
+def _is_member_function(return_type: str, name: str, class_name: str) -> bool:
+    """
+    Returns False for the function-like macros of a class body, ex:
+    DISALLOW_COPY_AND_ASSIGN(Foo);, which parse as functions without a
+    return type. Only constructors, destructors and conversion operators
+    have none.
+    """
+    return (
+        bool(return_type)
+        or name in (class_name, "~" + class_name)
+        or name.startswith("operator")
+    )
+
+
+def _ends_macro_call(statement: list[str], token: str, class_name: str) -> bool:
+    """
+    Returns True if the statement is a call of a function-like macro and
+    the token starts the next statement, ex: Q_DISABLE_COPY(Foo) void bar();
+    """
+    return (
+        is_identifier(token)
+        and token not in TRAILING_SPECIFIERS
+        and len(statement) >= 3
+        and is_identifier(statement[0])
+        and statement[0] != class_name
+        and statement[0] not in DECLARATION_SPECIFIERS
+        and statement[1] == "("
+        and find_closing(statement, 1) == len(statement) - 1
+    )
+
+
+def _qualified_name(scopes: list[_Scope], qualifier: list[str]) -> str:
+    names = [scope.name for scope in scopes if scope.name] + qualifier
+    return "::".join(names)
+
+
+def _using_namespaces(scopes: list[_Scope]) -> tuple[str, ...]:
+    return tuple(
+        namespace for scope in scopes for namespace in scope.using_namespaces
+    )
+
+
+def parse_functions(text: str, definitions: bool = False) -> list[ParsedFunction]:
+    """
+    Extracts the member functions of classes from C++ source code.
+
+    Args:
+        text (str): The C++ source code.
+        definitions (bool, optional): If True extracts the member functions
+            defined with a body outside of the classes (.cpp files), else
+            extracts the member functions declared in the classes that need
+            a definition (header files). Defaults to False.
+
+    Returns:
+        list[ParsedFunction]: The functions found, with the class name fully
+            qualified by the namespaces and outer classes.
+    """
+    declarations_found, definitions_found = _scan(
+        text, declarations=not definitions, definitions=definitions
+    )
+    return definitions_found if definitions else declarations_found
+
+
+def parse_symbols(
+    text: str,
+) -> tuple[list[ParsedFunction], list[ParsedFunction]]:
+    """
+    Extracts both the declarations and the definitions of member functions
+    from C++ source code in a single pass.
+
+    Args:
+        text (str): The C++ source code.
+
+    Returns:
+        tuple[list[ParsedFunction], list[ParsedFunction]]: The member functions
+            declared in classes that need a definition and the member functions
+            defined outside of the classes.
+    """
+    return _scan(text, declarations=True, definitions=True)
+
+
+def _scan(
+    text: str, declarations: bool, definitions: bool
+) -> tuple[list[ParsedFunction], list[ParsedFunction]]:
+    """
+    Scans C++ source code for declarations and definitions of member functions.
+
+    The source code is scanned once, keeping a stack of the namespaces and
+    classes, so the time is linear to the size of the source code.
+    """
+    newlines = [match.start() for match in re.finditer("\n", text)]
+
+    def line_of(offset: int) -> int:
+        return bisect.bisect_left(newlines, offset) + 1
+
+    declarations_found: list[ParsedFunction] = []
+    definitions_found: list[ParsedFunction] = []
+
+    # The file scope holds the "using namespace" directives outside of namespaces
+    scopes: list[_Scope] = [_Scope("file")]
+    statement: list[str] = []
+    statement_offset = 0
+    paren_depth = 0
+    block_depth = 0
+
+    for match in TOKEN_REGEX.finditer(text):
+        value = match.group(1)
+        if not value:
+            continue
+
+        # Skip the content of function bodies and initializers
+        if block_depth > 0:
+            if value == "{":
+                block_depth += 1
+            elif value == "}":
+                block_depth -= 1
+            continue
+
+        if value in ("(", "["):
+            paren_depth += 1
+        elif value in (")", "]"):
+            paren_depth -= 1
+        elif paren_depth > 0:
+            # Default arguments with braces, ex: f(std::vector<int> v = {})
+            statement.append(value)
+            continue
+
+        if value == "{":
+            scope = _declaration_scope(statement)
+            if scope is not None:
+                if any(s.is_template for s in scopes):
+                    scope.is_template = True
+                scopes.append(scope)
+            else:
+                in_class = scopes[-1].kind == "class"
+                if definitions and not in_class and "(" in statement:
+                    parsed = parse_function(statement, definition=True)
+                    if parsed is not None and parsed[3]:
+                        return_type, name, arguments, qualifier, quals, _ = parsed
+                        if "<" not in qualifier[0]:
+                            definitions_found.append(
+                                ParsedFunction(
+                                    return_type,
+                                    name,
+                                    arguments,
+                                    _qualified_name(scopes, qualifier),
+                                    quals,
+                                    line_of(statement_offset),
+                                    _using_namespaces(scopes),
+                                )
+                            )
+                block_depth = 1
+            statement = []
+            paren_depth = 0
+        elif value == "}":
+            if len(scopes) > 1:
+                scopes.pop()
+            statement = []
+            paren_depth = 0
+        elif value == ";":
+            if statement[:2] == ["using", "namespace"] and len(statement) > 2:
+                scopes[-1].using_namespaces.append(
+                    join_tokens(statement[2:]).lstrip(":")
+                )
+            in_class = scopes[-1].kind == "class"
+            if (
+                declarations
+                and in_class
+                and scopes[-1].name
+                and not scopes[-1].is_template
+                and not scopes[-1].in_signals
+                and "(" in statement
+            ):
+                parsed = parse_function(statement, definition=False)
+                if (
+                    parsed is not None
+                    and parsed[5]
+                    and not parsed[3]
+                    and _is_member_function(parsed[0], parsed[1], scopes[-1].name)
+                ):
+                    return_type, name, arguments, _, quals, _ = parsed
+                    declarations_found.append(
+                        ParsedFunction(
+                            return_type,
+                            name,
+                            arguments,
+                            _qualified_name(scopes, []),
+                            quals,
+                            line_of(statement_offset),
+                        )
+                    )
+            statement = []
+        elif (
+            value == ":"
+            and statement
+            and statement[-1] in ACCESS_SPECIFIERS
+            and paren_depth == 0
+        ):
+            scopes[-1].in_signals = statement[-1] in SIGNAL_SPECIFIERS
+            statement = []
+        else:
+            if (
+                statement
+                and statement[-1] == ")"
+                and paren_depth == 0
+                and _ends_macro_call(statement, value, scopes[-1].name)
+            ):
+                statement = []
+            if not statement:
+                statement_offset = match.start(1)
+            statement.append(value)
+
+    return declarations_found, definitions_found
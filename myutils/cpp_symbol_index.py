@@ -0,0 +1,388 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, NamedTuple, Optional
+
+from myutils.cpp_parse_cache import CACHE_VERSION, file_digest
+from myutils.cpp_parser import (
+    PARSER_VERSION,
+    ParsedFunction,
+    candidate_keys,
+    function_key,
+    parse_symbols,
+)
+from myutils.file_utils import write_file_atomic
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Location(NamedTuple):
+    file_path: str
+    line: int
+    function: ParsedFunction
+
+
+class FileSymbols(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: str
+    declarations: list[ParsedFunction]
+    definitions: list[ParsedFunction]
+
+    def to_json(self) -> list[Any]:
+        """
+        Returns the symbols of the file, as stored in the index file.
+        """
+        return list(self)
+
+    @classmethod
+    def from_json(cls, fields: list[Any]) -> "FileSymbols":
+        """
+        Creates the symbols of a file from the fields returned by to_json.
+        """
+        size, mtime_ns, digest, declarations, definitions = fields
+        return cls(
+            int(size),
+            int(mtime_ns),
+            str(digest),
+            [parsed_function_from_json(function) for function in declarations],
+            [parsed_function_from_json(function) for function in definitions],
+        )
+
+
+def parsed_function_from_json(fields: list[Any]) -> ParsedFunction:
+    """
+    Creates a ParsedFunction from its fields, as loaded from JSON.
+    """
+    *fields, using_namespaces = fields
+    return ParsedFunction(*fields, tuple(using_namespaces))
+
+
+class Symbol:
+    """
+    This class holds the locations where a member function is declared and defined.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.declarations: list[Location] = []
+        self.definitions: list[Location] = []
+
+    def __str__(self) -> str:
+        return self.key
+
+
+def parse_file_symbols(
+    file_path: str,
+) -> tuple[list[ParsedFunction], list[ParsedFunction]]:
+    """
+    Parses the declarations and definitions of a C++ file.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        tuple[list[ParsedFunction], list[ParsedFunction]]: The declarations
+            and definitions found in the file.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        return parse_symbols(file.read())
+
+
+class SymbolIndex:
+    """
+    This class indexes the declarations and definitions of the member
+    functions of all the files of a project, by their signature key
+    (see cpp_parser.signature_key).
+
+    The parsed files are persisted on disk as JSON, so only the files that
+    changed since the last update are parsed again.
+    """
+
+    def __init__(self, index_file: Optional[str] = None):
+        self.index_file = index_file
+        self.version = (CACHE_VERSION, PARSER_VERSION)
+
+        # absolute path -> symbols of the file
+        self.files: dict[str, FileSymbols] = {}
+
+        # signature key -> symbol
+        self.symbols: dict[str, Symbol] = {}
+
+        # Keys a definition in scope of "using namespace" can also match ->
+        # keys of these definitions as written, see cpp_parser.candidate_keys
+        self.aliases: dict[str, list[str]] = {}
+
+        self.modified = False
+        if self.index_file:
+            self.load()
+
+    def load(self):
+        """
+        Loads the index from disk, discarding it if it was written by
+        another version of the parser.
+        """
+        if not self.index_file or not os.path.isfile(self.index_file):
+            return
+
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            LOGGER.warning("Ignoring corrupted index %s", self.index_file)
+            self.modified = True
+            return
+
+        if not isinstance(data, dict) or data.get("version") != list(
+            self.version
+        ):
+            LOGGER.info("Ignoring index %s of another version", self.index_file)
+            self.modified = True
+            return
+
+        try:
+            files = {
+                file_path: FileSymbols.from_json(fields)
+                for file_path, fields in data["files"].items()
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            LOGGER.warning("Ignoring corrupted index %s", self.index_file)
+            self.modified = True
+            return
+
+        for file_path, file_symbols in files.items():
+            self.add_file(file_path, file_symbols)
+        self.modified = False
+
+    def save(self):
+        """
+        Writes the index to disk if it was modified.
+        """
+        if not self.index_file or not self.modified:
+            return
+
+        write_file_atomic(
+            self.index_file,
+            json.dumps(
+                {
+                    "version": self.version,
+                    "files": {
+                        file_path: file_symbols.to_json()
+                        for file_path, file_symbols in self.files.items()
+                    },
+                }
+            ),
+        )
+        self.modified = False
+
+    def get_symbol(self, key: str) -> Symbol:
+        """
+        Returns the symbol of a key, creating it if it doesn't exist.
+        """
+        symbol = self.symbols.get(key)
+        if symbol is None:
+            symbol = Symbol(key)
+            self.symbols[key] = symbol
+        return symbol
+
+    def add_file(self, file_path: str, file_symbols: FileSymbols):
+        """
+        Adds the symbols of a file to the index, replacing the previous ones.
+
+        Args:
+            file_path (str): The absolute path of the file.
+            file_symbols (FileSymbols): The symbols of the file.
+        """
+        self.remove_file(file_path)
+        self.files[file_path] = file_symbols
+        for function in file_symbols.declarations:
+            self.get_symbol(function_key(function)).declarations.append(
+                Location(file_path, function.line, function)
+            )
+        for function in file_symbols.definitions:
+            key, *alias_keys = candidate_keys(function)
+            self.get_symbol(key).definitions.append(
+                Location(file_path, function.line, function)
+            )
+            for alias_key in alias_keys:
+                self.aliases.setdefault(alias_key, []).append(key)
+        self.modified = True
+
+    def remove_file(self, file_path: str):
+        """
+        Removes the symbols of a file from the index.
+
+        Args:
+            file_path (str): The absolute path of the file.
+        """
+        file_symbols = self.files.pop(file_path, None)
+        if file_symbols is None:
+            return
+
+        for function in file_symbols.definitions:
+            key, *alias_keys = candidate_keys(function)
+            for alias_key in alias_keys:
+                keys = self.aliases.get(alias_key, [])
+                if key in keys:
+                    keys.remove(key)
+                if not keys:
+                    self.aliases.pop(alias_key, None)
+
+        for function in file_symbols.declarations + file_symbols.definitions:
+            key = function_key(function)
+            symbol = self.symbols.get(key)
+            if symbol is None:
+                continue
+            symbol.declarations = [
+                loc for loc in symbol.declarations if loc.file_path != file_path
+            ]
+            symbol.definitions = [
+                loc for loc in symbol.definitions if loc.file_path != file_path
+            ]
+            if not symbol.declarations and not symbol.definitions:
+                del self.symbols[key]
+        self.modified = True
+
+    def update(self, file_paths: list[str], jobs: int = 1):
+        """
+        Updates the index with a list of files, parsing only the files that
+        changed. Files previously indexed and not in the list are removed.
+
+        Args:
+            file_paths (list[str]): The paths of all the files of the project.
+            jobs (int, optional): Number of processes used to parse the files.
+                Defaults to 1.
+        """
+        abs_paths = [os.path.abspath(file_path) for file_path in file_paths]
+
+        for file_path in set(self.files) - set(abs_paths):
+            self.remove_file(file_path)
+
+        self.refresh(abs_paths, jobs)
+
+    def refresh(self, file_paths: list[str], jobs: int = 1):
+        """
+        Parses again the files of a list that changed, and removes the ones
+        that no longer exist. The other files of the index are not checked.
+
+        Args:
+            file_paths (list[str]): The paths of the files to check.
+            jobs (int, optional): Number of processes used to parse the files.
+                Defaults to 1.
+        """
+        abs_paths = []
+        for file_path in map(os.path.abspath, file_paths):
+            if os.path.isfile(file_path):
+                abs_paths.append(file_path)
+            else:
+                self.remove_file(file_path)
+
+        changed: list[tuple[str, int, int, str]] = []
+        for file_path in abs_paths:
+            stat = os.stat(file_path)
+            cached = self.files.get(file_path)
+            if (
+                cached is not None
+                and cached.size == stat.st_size
+                and cached.mtime_ns == stat.st_mtime_ns
+            ):
+                continue
+
+            digest = file_digest(file_path)
+            if cached is not None and cached.digest == digest:
+                self.files[file_path] = cached._replace(
+                    size=stat.st_size, mtime_ns=stat.st_mtime_ns
+                )
+                self.modified = True
+                continue
+
+            changed.append((file_path, stat.st_size, stat.st_mtime_ns, digest))
+
+        LOGGER.info(
+            "%d of %d files changed since the index was built",
+            len(changed),
+            len(abs_paths),
+        )
+
+        paths = [file_path for file_path, _, _, _ in changed]
+        if jobs > 1 and len(paths) > 1:
+            chunksize = max(len(paths) // (jobs * 4), 1)
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(
+                    executor.map(parse_file_symbols, paths, chunksize=chunksize)
+                )
+        else:
+            results = list(map(parse_file_symbols, paths))
+
+        for (file_path, size, mtime_ns, digest), (
+            declarations,
+            definitions,
+        ) in zip(changed, results):
+            self.add_file(
+                file_path,
+                FileSymbols(size, mtime_ns, digest, declarations, definitions),
+            )
+
+    def is_defined(self, key: str) -> bool:
+        """
+        Returns True if the function is defined in any file of the index.
+
+        Args:
+            key (str): The signature key of the function.
+        """
+        symbol = self.symbols.get(key)
+        if symbol is not None and len(symbol.definitions) > 0:
+            return True
+        return any(
+            self.symbols[alias].definitions
+            for alias in self.aliases.get(key, ())
+            if alias in self.symbols
+        )
+
+    def is_declared(self, symbol: Symbol) -> bool:
+        """
+        Returns True if the function is declared in any file of the index,
+        with the key of its definitions or with one of their alias keys.
+
+        Args:
+            symbol (Symbol): The symbol of the function.
+        """
+        if symbol.declarations:
+            return True
+        for location in symbol.definitions:
+            for key in candidate_keys(location.function)[1:]:
+                alias = self.symbols.get(key)
+                if alias is not None and alias.declarations:
+                    return True
+        return False
+
+    def get_undefined(self) -> list[Symbol]:
+        """
+        Returns the functions declared but not defined in any file.
+        """
+        return [
+            symbol
+            for symbol in self.symbols.values()
+            if symbol.declarations and not self.is_defined(symbol.key)
+        ]
+
+    def get_orphaned(self) -> list[Symbol]:
+        """
+        Returns the functions defined but not declared in any class.
+        """
+        return [
+            symbol
+            for symbol in self.symbols.values()
+            if symbol.definitions and not self.is_declared(symbol)
+        ]
+
+    def get_duplicates(self) -> list[Symbol]:
+        """
+        Returns the functions defined more than once.
+        """
+        return [
+            symbol
+            for symbol in self.symbols.values()
+            if len(symbol.definitions) > 1
+        ]
@@ -0,0 +1,123 @@
+import logging
+import os
+from argparse import ArgumentParser, Namespace
+
+from myutils.cpp_definition_adder import INDEX_FILE_NAME, CppFunctionAdder
+from myutils.cpp_symbol_index import Location, Symbol, SymbolIndex
+from myutils.script_interface import ScriptInterface
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CppSymbolQuery(ScriptInterface):
+    """
+    This class queries the project-wide index of C++ member functions.
+    """
+
+    def __init__(self):
+        super().__init__("query_cpp_symbols")
+
+    def add_subparser_args(self, parser: ArgumentParser):
+        """
+        This function ads arguments for the script.
+
+        Args:
+            parser (ArgumentParser): The subparser of the script
+        """
+        parser.add_argument(
+            "query",
+            type=str,
+            choices=["undefined", "orphaned", "duplicate", "symbol"],
+            help="""undefined: declared but not defined, orphaned: defined but not declared,
+            duplicate: defined more than once, symbol: locations of --symbol""",
+        )
+        parser.add_argument(
+            "-s",
+            "--symbol",
+            type=str,
+            default=None,
+            help="The key of the function for the symbol query, ex: 'ns::Foo::bar(int) const'",
+        )
+        parser.add_argument(
+            "-p",
+            "--path",
+            type=str,
+            default=".",
+            const=".",
+            nargs="?",
+            help="The path to scan recursively",
+        )
+        parser.add_argument(
+            "-e",
+            "--exclude",
+            type=str,
+            nargs="+",
+            default=[],
+            help="Glob patterns of the files and directories to skip, relative to --path",
+        )
+        parser.add_argument(
+            "--index_file",
+            type=str,
+            default=None,
+            help=f"The symbol index. Defaults to {INDEX_FILE_NAME} in --path",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes used to parse the files",
+        )
+
+    def format_location(self, location: Location) -> str:
+        """
+        Returns the location as path:line, relative to the current directory.
+        """
+        return f"{os.path.relpath(location.file_path)}:{location.line}"
+
+    def print_symbol(self, symbol: Symbol):
+        """
+        Prints a symbol with its declarations and definitions.
+        """
+        print(symbol.key)
+        for location in symbol.declarations:
+            print(f"    declared at {self.format_location(location)}")
+        for location in symbol.definitions:
+            print(f"    defined at {self.format_location(location)}")
+
+    def __call__(self, args: Namespace):
+        """
+        This is the main function of the query script.
+
+        Args:
+            args (Namespace): The arguments of the script
+        """
+        if args.query == "symbol" and not args.symbol:
+            raise ValueError("The symbol query requires --symbol")
+
+        index = SymbolIndex(
+            args.index_file or os.path.join(args.path, INDEX_FILE_NAME)
+        )
+        lst_files = CppFunctionAdder().find_files(
+            args.path, ["*"], args.exclude
+        )
+        index.update(lst_files, args.jobs)
+        index.save()
+
+        if args.query == "symbol":
+            symbol = index.symbols.get(args.symbol)
+            if symbol is None:
+                LOGGER.info("Symbol %s not found", args.symbol)
+                return
+            symbols = [symbol]
+        elif args.query == "undefined":
+            symbols = index.get_undefined()
+        elif args.query == "orphaned":
+            symbols = index.get_orphaned()
+        else:
+            symbols = index.get_duplicates()
+
+        for symbol in sorted(symbols, key=str):
+            self.print_symbol(symbol)
+
+        LOGGER.info("%d symbols found", len(symbols))
@@ -1,16 +1,83 @@
+import json
 import logging
-from argparse import ArgumentParser, Namespace
-from typing import Optional
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from typing import Iterator, Optional
 
 import cv2
 import numpy as np
 import onnxruntime as ort
 
+from myutils.frame_ring_buffer import FrameRingWriter
 from myutils.script_interface import ScriptInterface
+from myutils.window_capture import WindowCapture
 
 LOGGER = logging.getLogger(__name__)
 
 
+def parse_roi(value: str) -> tuple[int, int, int, int]:
+    """
+    Parses a region of interest given as x,y,width,height.
+
+    Args:
+        value (str): The region, ex: 100,50,640,480.
+
+    Returns:
+        tuple[int, int, int, int]: The x, y, width and height of the region.
+    """
+    try:
+        x, y, width, height = (int(part) for part in value.split(","))
+    except ValueError as error:
+        raise ArgumentTypeError(
+            f"Invalid region {value}, expected x,y,width,height"
+        ) from error
+    if width <= 0 or height <= 0:
+        raise ArgumentTypeError(f"Invalid region {value}, empty size")
+    return x, y, width, height
+
+
+def load_roi_polygons(mask_file: str) -> list[np.ndarray]:
+    """
+    Loads the polygons of a mask file, a JSON list of polygons given as lists
+    of x,y points, ex: {"polygons": [[[0, 0], [100, 0], [100, 80]]]}.
+
+    Args:
+        mask_file (str): The path of the mask file.
+
+    Returns:
+        list[np.ndarray]: The points of each polygon.
+    """
+    with open(mask_file, "r", encoding="utf-8") as file:
+        polygons = json.load(file)
+    if isinstance(polygons, dict):
+        polygons = polygons["polygons"]
+    return [
+        np.array(polygon, dtype=np.int32).reshape(-1, 2)
+        for polygon in polygons
+    ]
+
+
+def get_overlapping_rects(
+    rects: list[tuple[int, int, int, int]]
+) -> np.ndarray:
+    """
+    Finds the rectangles that overlap at least another one.
+
+    Args:
+        rects (list[tuple[int, int, int, int]]): The rectangles, as x0, y0, x1, y1.
+
+    Returns:
+        np.ndarray: True for each rectangle overlapping another one.
+    """
+    boxes = np.array(rects, dtype=np.int64).reshape(-1, 4)
+    x0 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y0 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x1 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y1 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    overlaps = (x1 > x0) & (y1 > y0)
+    np.fill_diagonal(overlaps, False)
+    return overlaps.any(axis=1)
+
+
 # pylint: disable=attribute-defined-outside-init
 class CVInference(ScriptInterface):
     """
@@ -18,12 +85,14 @@ class CVInference(ScriptInterface):
     """
 
     def __init__(self):
-        super().__init__(
-            "cv_inference",
-            """Runs inference using ONNX runtime on a video or window.
-            Either a -v or -wnd needs to be provided.
-            """,
-        )
+        super().__init__("cv_inference")
+        self.show = True
+
+        # Name of the shared memory the frames are published to, if any
+        self.publish_name: Optional[str] = None
+        self.publish_slots = 8
+        self.max_detections = 100
+        self.ring_writer: Optional[FrameRingWriter] = None
 
     def init(
         self,
@@ -34,15 +103,27 @@ class CVInference(ScriptInterface):
         iou_tresh: float = 0.5,
         input_shape: Optional[tuple[int, int]] = None,
         use_gpu=True,
+        rois: Optional[list[tuple[int, int, int, int]]] = None,
+        roi_polygons: Optional[list[np.ndarray]] = None,
     ):
         """
         Initializes the inference engine.
+
+        Only the regions of interest of the frames are given to the model,
+        if any. The regions are the rectangles x, y, width, height of rois and
+        the bounding rectangles of roi_polygons, the detections outside of
+        the polygons are dropped.
         """
         self.weights_path = weights_path
         self.format = model_format
         self.conf_tresh = conf_tresh
         self.iou_tresh = iou_tresh
         self.colors_array: dict[int, tuple[int, int, int]] = {}
+        self.rois = rois or []
+        self.roi_polygons = roi_polygons or []
+
+        # Mask of the polygons, created for the size of the frames
+        self.roi_mask: Optional[np.ndarray] = None
 
         if class_names:
             self.class_names = class_names
@@ -62,13 +143,19 @@ class CVInference(ScriptInterface):
         self.outname = [i.name for i in self.session.get_outputs()]
         self.inname = [i.name for i in self.session.get_inputs()]
 
+        model_input_shape = self.session.get_inputs()[0].shape
         if input_shape is None:
             # Get input shape from the model
-            model_input_shape = self.session.get_inputs()[0].shape
             self.input_shape = (model_input_shape[2], model_input_shape[3])
         else:
             self.input_shape = input_shape
 
+        # Models exported with a dynamic batch size have a named dimension
+        if isinstance(model_input_shape[0], int):
+            self.max_batch_size = model_input_shape[0]
+        else:
+            self.max_batch_size = None
+
     def get_color(self, class_id: int) -> tuple[int, int, int]:
         """
         Generates a random color for each class id and caches it.
@@ -163,9 +250,52 @@ class CVInference(ScriptInterface):
             list[tuple[int batch_id, float x0, float y0, float x1, float y1, int class_id, float score]]
         """
 
+        if resize and (self.rois or self.roi_polygons):
+            return self.run_inference_rois(img)
+
         if self.format == "yolo":
-            img_tmp = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            img_tmp, r, dwdh = self.preprocess(img, resize)
+
+            # Yolo requires the image to be in the format (N, C, H, W)
+            img_tmp = np.expand_dims(img_tmp, 0)
+
+            with self.stage("inference"):
+                out = self.session.run(
+                    self.outname, {self.inname[0]: img_tmp}
+                )
+
+            detections = out[0][out[0][:, 6] >= self.conf_tresh]
+
+            # Match the box coordinates to the resized image
+            if resize:
+                detections[:, 1:5] = (
+                    detections[:, 1:5] - np.array(dwdh * 2)
+                ) / r
+            return detections
+
+        raise ValueError(f"Unknown format {self.format}")
+
+    def preprocess(
+        self, img: np.ndarray, resize: bool = True
+    ) -> tuple[np.ndarray, float, tuple[float, float]]:
+        """
+        Converts an image to the input of the model.
+
+        Args:
+            img (np.ndarray): The BGR image, or BGRX as captured from a window.
+            resize (bool, optional): Letterbox the image to the input shape. Defaults to True.
 
+        Returns:
+            tuple[np.ndarray, float, tuple[float, float]]: The normalized (C, H, W) image,
+                the resize ratio and the padding.
+        """
+        with self.stage("preprocess"):
+            img_tmp = cv2.cvtColor(
+                img,
+                cv2.COLOR_BGRA2RGB if img.shape[2] == 4 else cv2.COLOR_BGR2RGB,
+            )
+
+            r, dwdh = 1.0, (0.0, 0.0)
             if resize:
                 img_tmp, r, dwdh = self.letterbox(
                     img_tmp, new_shape=self.input_shape, auto=False
@@ -175,30 +305,183 @@ class CVInference(ScriptInterface):
             # Yolo requires the image to be in the format (C, H, W)
             img_tmp = img_tmp.transpose((2, 0, 1))
 
-            # Yolo requires the image to be in the format (N, C, H, W)
-            img_tmp = np.expand_dims(img_tmp, 0)
-
             # Yolo requires the image to be contiguous
             img_tmp = np.ascontiguousarray(img_tmp)
 
             # Normalize the bytes of the image
-            img_tmp = img_tmp / 255.0
+            img_tmp /= 255.0
+        return img_tmp, r, dwdh
 
-            out = self.session.run(self.outname, {self.inname[0]: img_tmp})
+    def run_inference_batch(self, imgs: list[np.ndarray]) -> list[np.ndarray]:
+        """
+        Runs inference on a batch of images with a single call to the model,
+        or with chunks of the batch size of the model if it's not dynamic.
+        The last chunk is then padded to the batch size of the model.
+        The output is expressed in absolute coordinates of each image.
 
-            # Match the box coordinates to the resized image
-            if resize:
-                out[0][:, 1:5] = (out[0][:, 1:5] - np.array(dwdh * 2)) / r
-            return out[0]
+        Args:
+            imgs (list[np.ndarray]): Images to run inference on.
 
-        raise ValueError(f"Unknown format {self.format}")
+        Returns:
+            list[np.ndarray]: The detections of each image, in the format of run_inference.
+        """
+        if self.format != "yolo":
+            raise ValueError(f"Unknown format {self.format}")
+
+        chunk_size = self.max_batch_size or len(imgs)
+        results: list[np.ndarray] = []
+        for first in range(0, len(imgs), max(chunk_size, 1)):
+            chunk = imgs[first : first + chunk_size]
+            inputs = [self.preprocess(img) for img in chunk]
+            batch = np.stack([img_tmp for img_tmp, _, _ in inputs])
+            if len(chunk) < chunk_size:
+                # Models with a fixed batch size need the full batch
+                batch = np.concatenate(
+                    (
+                        batch,
+                        np.zeros(
+                            (chunk_size - len(chunk), *batch.shape[1:]),
+                            dtype=batch.dtype,
+                        ),
+                    )
+                )
+            ratios = np.array([r for _, r, _ in inputs], dtype=np.float32)
+            pads = np.array(
+                [dwdh * 2 for _, _, dwdh in inputs], dtype=np.float32
+            )
 
-    def draw_run_inference(self, img: np.ndarray):
+            with self.stage("inference"):
+                out = self.session.run(self.outname, {self.inname[0]: batch})
+            detections = out[0]
+
+            # Drop the detections of the padding and the low confidence ones
+            keep = detections[:, 6] >= self.conf_tresh
+            if len(chunk) < chunk_size:
+                keep &= detections[:, 0] < len(chunk)
+            detections = detections[keep]
+            batch_ids = detections[:, 0].astype(np.int64)
+
+            # Match the box coordinates to each image, by the batch id of each detection
+            detections[:, 1:5] = (
+                detections[:, 1:5] - pads[batch_ids]
+            ) / ratios[batch_ids, None]
+
+            results.extend(
+                detections[batch_ids == batch_id]
+                for batch_id in range(len(chunk))
+            )
+        return results
+
+    def get_roi_rects(
+        self, shape: tuple[int, ...]
+    ) -> list[tuple[int, int, int, int]]:
+        """
+        Returns the regions of interest clipped to the frame, as x0, y0, x1, y1.
+
+        Args:
+            shape (tuple[int, ...]): The shape of the frame.
+        """
+        height, width = shape[:2]
+        rects = list(self.rois) + [
+            cv2.boundingRect(polygon) for polygon in self.roi_polygons
+        ]
+        clipped = []
+        for x, y, rect_width, rect_height in rects:
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + rect_width, width), min(y + rect_height, height)
+            if x1 > x0 and y1 > y0:
+                clipped.append((x0, y0, x1, y1))
+        return clipped
+
+    def get_roi_mask(self, shape: tuple[int, ...]) -> Optional[np.ndarray]:
+        """
+        Returns the mask of the polygons for the frame, None if there are no polygons.
+
+        Args:
+            shape (tuple[int, ...]): The shape of the frame.
+        """
+        if not self.roi_polygons:
+            return None
+        if self.roi_mask is None or self.roi_mask.shape != shape[:2]:
+            self.roi_mask = np.zeros(shape[:2], dtype=np.uint8)
+            cv2.fillPoly(self.roi_mask, self.roi_polygons, 1)
+        return self.roi_mask
+
+    def run_inference_rois(self, img: np.ndarray) -> np.ndarray:
+        """
+        Runs inference on the regions of interest of the image in a single batch.
+        The output is expressed in absolute coordinates of the image size.
+
+        Args:
+            img (ndarray): Image to run inference on.
+
+        Returns:
+            np.ndarray: The detections, in the format of run_inference.
+        """
+        rects = self.get_roi_rects(img.shape)
+        if not rects:
+            return np.zeros((0, 7), dtype=np.float32)
+
+        crops = [img[y0:y1, x0:x1] for x0, y0, x1, y1 in rects]
+        lst_detections = self.run_inference_batch(crops)
+
+        # Move the boxes of each crop to the position of its region
+        detections = np.concatenate(lst_detections).reshape(-1, 7)
+        roi_ids = np.repeat(
+            np.arange(len(rects)), [len(dets) for dets in lst_detections]
+        )
+        offsets = np.array(rects, dtype=detections.dtype)[:, [0, 1, 0, 1]]
+        detections[:, 1:5] += offsets[roi_ids]
+        detections[:, 0] = 0
+
+        # Drop the detections with the center outside of the polygons
+        mask = self.get_roi_mask(img.shape)
+        if mask is not None and len(detections):
+            height, width = mask.shape
+            centers_x = ((detections[:, 1] + detections[:, 3]) / 2).astype(
+                np.int64
+            )
+            centers_y = ((detections[:, 2] + detections[:, 4]) / 2).astype(
+                np.int64
+            )
+            inside = mask[
+                centers_y.clip(0, height - 1), centers_x.clip(0, width - 1)
+            ].astype(bool)
+            detections = detections[inside]
+            roi_ids = roi_ids[inside]
+
+        # The same object can be detected by overlapping regions, only the
+        # detections of these regions are suppressed, class by class
+        candidates = get_overlapping_rects(rects)[roi_ids]
+        if np.count_nonzero(candidates) > 1:
+            boxes = detections[candidates, 1:5].copy()
+            boxes[:, 2:] -= boxes[:, :2]
+            keep = cv2.dnn.NMSBoxesBatched(
+                boxes.tolist(),
+                detections[candidates, 6].tolist(),
+                detections[candidates, 5].astype(np.int64).tolist(),
+                0.0,
+                self.iou_tresh,
+            )
+            kept = ~candidates
+            kept[
+                np.flatnonzero(candidates)[
+                    np.array(keep, dtype=np.int64).reshape(-1)
+                ]
+            ] = True
+            detections = detections[kept]
+
+        return detections
+
+    def draw_run_inference(self, img: np.ndarray) -> np.ndarray:
         """
         This function runs and draws the inference boxes on the image.
 
         Args:
             img (np.ndarray): Image to run inference on.
+
+        Returns:
+            np.ndarray: The detections, in the format of run_inference.
         """
 
         vals = self.run_inference(img)
@@ -221,6 +504,90 @@ class CVInference(ScriptInterface):
                 [225, 255, 255],
                 thickness=2,
             )
+        return vals
+
+    def publish(self, frame: np.ndarray, detections: np.ndarray):
+        """
+        Publishes an annotated frame and its detections to the shared memory
+        ring buffer, created with the shape of the first frame.
+
+        Args:
+            frame (np.ndarray): The annotated frame
+            detections (np.ndarray): The detections of the frame
+        """
+        if self.ring_writer is None:
+            self.ring_writer = FrameRingWriter(
+                self.publish_name,
+                frame.shape,
+                self.publish_slots,
+                self.max_detections,
+            )
+            LOGGER.info(
+                "Publishing frames of shape %s to shared memory %s",
+                frame.shape,
+                self.publish_name,
+            )
+
+        if frame.shape != self.ring_writer.frame_shape:
+            LOGGER.warning(
+                "Skipping frame of shape %s, the readers expect frames of shape %s",
+                frame.shape,
+                self.ring_writer.frame_shape,
+            )
+            return
+        self.ring_writer.publish(frame, detections)
+
+    def run_frames(self, frames: Iterator[np.ndarray]):
+        """
+        Runs inference on each frame, shows it and publishes it if enabled,
+        until the frames end or q is pressed.
+
+        Args:
+            frames (Iterator[np.ndarray]): The BGR or BGRX frames
+        """
+        if self.show:
+            cv2.namedWindow("Inference Window", cv2.WINDOW_NORMAL)
+        try:
+            for frame in frames:
+                if not self.show and not self.publish_name:
+                    # Nothing is drawn, the frame is only read by preprocess
+                    self.run_inference(frame)
+                    continue
+
+                if frame.shape[2] == 4:
+                    # Window captures are views of the shared memory
+                    with self.stage("copy"):
+                        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+                detections = self.draw_run_inference(frame)
+                if self.publish_name:
+                    with self.stage("publish"):
+                        self.publish(frame, detections)
+                if self.show:
+                    cv2.imshow("Inference Window", frame)
+                    if cv2.waitKey(1) & 0xFF == ord("q"):
+                        break
+        finally:
+            if self.ring_writer is not None:
+                self.ring_writer.close()
+                self.ring_writer = None
+
+    def read_video(self, video_file: str) -> Iterator[np.ndarray]:
+        """
+        Yields the frames of a video file.
+
+        Args:
+            video_file (str): Path to the video file
+        """
+        cap = cv2.VideoCapture(video_file)
+        try:
+            while True:
+                with self.stage("decode"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
 
     def run_video(self, video_file: str):
         """
@@ -229,16 +596,37 @@ class CVInference(ScriptInterface):
         Args:
             video_file (str): Path to the video file
         """
-        cv2.namedWindow("Inference Window", cv2.WINDOW_NORMAL)
-        cap = cv2.VideoCapture(video_file)
+        self.run_frames(self.read_video(video_file))
+
+    def read_window(
+        self, capture: WindowCapture, fps: float
+    ) -> Iterator[np.ndarray]:
+        """
+        Yields the captures of a window.
+
+        Args:
+            capture (WindowCapture): The capture of the window
+            fps (float): The maximum number of captures per second, 0 for no limit
+        """
+        frames = capture.frames(fps)
         while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            self.draw_run_inference(frame)
-            cv2.imshow("Inference Window", frame)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
+            with self.stage("capture"):
+                frame = next(frames, None)
+            if frame is None:
                 break
+            yield frame
+
+    def run_window(self, window_name: str, fps: float = 0):
+        """
+        Runs inference on the content of a X11 window
+
+        Args:
+            window_name (str): A part of the title of the window
+            fps (float, optional): The maximum number of captures per second, 0 for no limit. Defaults to 0.
+        """
+        # Find the window before the inference window is created
+        with WindowCapture(window_name) as capture:
+            self.run_frames(self.read_window(capture, fps))
 
     def add_subparser_args(self, parser: ArgumentParser):
         """
@@ -279,9 +667,15 @@ class CVInference(ScriptInterface):
             default=None,
             const=None,
             nargs="?",
-            help="Name of the window to run inference on, cannot be combined with option --video_file. CURRENTLY NOT IMPLEMENTED",
+            help="Part of the title of the X11 window to run inference on, cannot be combined with option --video_file",
             required=False,
         )
+        parser.add_argument(
+            "--fps",
+            type=float,
+            default=30.0,
+            help="Maximum number of captures per second of --window_name, 0 for no limit",
+        )
 
         parser.add_argument(
             "-c",
@@ -308,6 +702,51 @@ class CVInference(ScriptInterface):
             "--cpu", help="Do not use GPU", action="store_true"
         )
 
+        parser.add_argument(
+            "--roi",
+            type=parse_roi,
+            action="append",
+            default=None,
+            metavar="X,Y,WIDTH,HEIGHT",
+            help="Only run inference on this region of the frames, can be repeated",
+        )
+
+        parser.add_argument(
+            "--publish",
+            type=str,
+            default=None,
+            metavar="NAME",
+            help="Publish the annotated frames and detections to a shared memory ring buffer with this name",
+        )
+
+        parser.add_argument(
+            "--publish_slots",
+            type=int,
+            default=8,
+            help="Number of frames kept in the ring buffer of --publish",
+        )
+
+        parser.add_argument(
+            "--max_detections",
+            type=int,
+            default=100,
+            help="Maximum number of detections published for each frame",
+        )
+
+        parser.add_argument(
+            "--no_display",
+            action="store_true",
+            help="Do not show the inference window",
+        )
+
+        parser.add_argument(
+            "--roi_mask",
+            type=str,
+            default=None,
+            help="""JSON file with polygons, only the detections inside them are kept,
+            ex: {"polygons": [[[0, 0], [100, 0], [100, 80]]]}""",
+        )
+
         parser.add_argument(
             "-nc",
             "--nc_path",
@@ -355,10 +794,21 @@ class CVInference(ScriptInterface):
 
         kwargs["model_format"] = args.model_format
 
+        if args.roi:
+            kwargs["rois"] = args.roi
+
+        if args.roi_mask:
+            kwargs["roi_polygons"] = load_roi_polygons(args.roi_mask)
+
         self.init(model_path, **kwargs)
 
+        self.show = not args.no_display
+        self.publish_name = args.publish
+        self.publish_slots = args.publish_slots
+        self.max_detections = args.max_detections
+
         if args.video_file:
             self.run_video(args.video_file)
 
         if args.window_name:
-            raise NotImplementedError("Not implemented yet")
+            self.run_window(args.window_name, args.fps)
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# Read once, os.umask can only be read by setting it, which is not thread safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_file_atomic(file_path: str, content: str):
+    """
+    Writes a file through a temporary file of the same directory, which then
+    replaces it, so the file is never left half written. Each call writes its
+    own temporary file, so concurrent runs don't write to the same one.
+
+    Args:
+        file_path (str): The path of the file.
+        content (str): The content of the file.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    with tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        dir=directory,
+        prefix=os.path.basename(file_path) + ".",
+        suffix=".tmp",
+        delete=False,
+    ) as file:
+        tmp_file = file.name
+        try:
+            file.write(content)
+        except BaseException:
+            file.close()
+            os.remove(tmp_file)
+            raise
+
+    try:
+        # Temporary files are only readable by their owner
+        os.chmod(tmp_file, 0o666 & ~_UMASK)
+        os.replace(tmp_file, file_path)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
@@ -0,0 +1,282 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+from typing import Callable, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# Flags from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """
+    This class watches a directory recursively for changed files.
+
+    Args:
+        path (str): The directory to watch.
+        dir_filter (Callable[[str], bool], optional): Returns False for the
+            directories that must not be watched. Defaults to None.
+    """
+
+    def __init__(
+        self, path: str, dir_filter: Optional[Callable[[str], bool]] = None
+    ):
+        self.path = path
+        self.dir_filter = dir_filter or (lambda _: True)
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        """
+        Blocks until files change or the timeout expires.
+
+        Args:
+            timeout (Optional[float], optional): The timeout in seconds,
+                None waits forever. Defaults to None.
+
+        Returns:
+            set[str]: The paths of the files created, modified or deleted.
+        """
+        raise NotImplementedError()
+
+    def wait_debounced(self, debounce: float) -> set[str]:
+        """
+        Blocks until files change, and keeps collecting the changes until
+        no file changed during the debounce time, so a burst of saves is
+        returned at once.
+
+        Args:
+            debounce (float): The debounce time in seconds.
+
+        Returns:
+            set[str]: The paths of the files created, modified or deleted.
+        """
+        changed = self.wait()
+        while True:
+            more = self.wait(debounce)
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self):
+        """
+        Releases the resources of the watcher.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class InotifyWatcher(FileWatcher):
+    """
+    This class watches a directory with the Linux inotify API,
+    so it uses no CPU while no file changes.
+    """
+
+    def __init__(
+        self, path: str, dir_filter: Optional[Callable[[str], bool]] = None
+    ):
+        super().__init__(path, dir_filter)
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not supported")
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Watch descriptor -> directory
+        self.watches: dict[int, str] = {}
+        self.add_tree(path)
+
+    def add_watch(self, directory: str):
+        """
+        Watches a single directory.
+        """
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), WATCH_MASK
+        )
+        if wd < 0:
+            LOGGER.warning(
+                "Cannot watch %s: %s",
+                directory,
+                os.strerror(ctypes.get_errno()),
+            )
+            return
+        self.watches[wd] = directory
+
+    def add_tree(self, path: str):
+        """
+        Watches a directory and its subdirectories.
+        """
+        for root, dirs, _ in os.walk(path):
+            dirs[:] = [
+                directory
+                for directory in dirs
+                if self.dir_filter(os.path.join(root, directory))
+            ]
+            self.add_watch(root)
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed: set[str] = set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                LOGGER.warning("Too many changes, some events were lost")
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+
+            file_path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and self.dir_filter(
+                    file_path
+                ):
+                    self.add_tree(file_path)
+                    for root, _, files in os.walk(file_path):
+                        changed.update(os.path.join(root, f) for f in files)
+                continue
+
+            changed.add(file_path)
+
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """
+    This class watches a directory by comparing the modification times
+    of its files periodically.
+
+    Args:
+        path (str): The directory to watch.
+        dir_filter (Callable[[str], bool], optional): Returns False for the
+            directories that must not be watched. Defaults to None.
+        interval (float, optional): The time between scans in seconds.
+            Defaults to 0.5.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dir_filter: Optional[Callable[[str], bool]] = None,
+        interval: float = 0.5,
+    ):
+        super().__init__(path, dir_filter)
+        self.interval = interval
+        self.mtimes = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        """
+        Returns the size and modification time of every file of the tree.
+        """
+        mtimes = {}
+        for root, dirs, files in os.walk(self.path):
+            dirs[:] = [
+                directory
+                for directory in dirs
+                if self.dir_filter(os.path.join(root, directory))
+            ]
+            for file in files:
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                mtimes[file_path] = (stat.st_size, stat.st_mtime_ns)
+        return mtimes
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            mtimes = self.scan()
+            changed = {
+                file_path
+                for file_path in mtimes.keys() | self.mtimes.keys()
+                if mtimes.get(file_path) != self.mtimes.get(file_path)
+            }
+            self.mtimes = mtimes
+            if changed:
+                return changed
+
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+
+
+def create_watcher(
+    path: str, dir_filter: Optional[Callable[[str], bool]] = None
+) -> FileWatcher:
+    """
+    Returns an inotify watcher if supported, else a polling watcher.
+
+    Args:
+        path (str): The directory to watch.
+        dir_filter (Callable[[str], bool], optional): Returns False for the
+            directories that must not be watched. Defaults to None.
+
+    Returns:
+        FileWatcher: The watcher.
+    """
+    try:
+        return InotifyWatcher(path, dir_filter)
+    except (OSError, AttributeError) as error:
+        LOGGER.info("inotify not available (%s), polling the files", error)
+        return PollingWatcher(path, dir_filter)
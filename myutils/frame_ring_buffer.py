@@ -0,0 +1,446 @@
+import logging
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+RING_MAGIC = 0x4D59465252494E47  # "MYFRRING"
+RING_VERSION = 2
+
+# Header: magic, version, num_slots, height, width, channels,
+# max_detections, slot_size, last published sequence, closed by the
+# writer, process id of the writer
+HEADER_FIELDS = 11
+HEADER_SIZE = 128
+LAST_SEQUENCE = 8
+CLOSED = 9
+WRITER_PID = 10
+
+# Slot header: sequence, timestamp, number of detections
+SLOT_HEADER_SIZE = 64
+
+# batch_id, x0, y0, x1, y1, class_id, score, as returned by CVInference
+DETECTION_SIZE = 7
+
+
+class FrameSlot(NamedTuple):
+    """
+    A frame read from the ring buffer. The arrays are views of the shared
+    memory, they are only valid while FrameRingReader.is_valid returns True.
+    """
+
+    sequence: int
+    timestamp: float
+    frame: np.ndarray
+    detections: np.ndarray
+
+
+def get_slot_size(
+    frame_shape: tuple[int, int, int], max_detections: int
+) -> int:
+    """
+    Returns the size of a slot, aligned to 64 bytes.
+    """
+    size = (
+        SLOT_HEADER_SIZE
+        + int(np.prod(frame_shape))
+        + max_detections * DETECTION_SIZE * 4
+    )
+    return (size + 63) // 64 * 64
+
+
+def open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Opens an existing shared memory without tracking it, so it's not
+    removed when this process exits.
+
+    Args:
+        name (str): The name of the shared memory.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 every process opening the segment registers it to
+    # the resource tracker. Unregistering it afterwards would also drop the
+    # registration of the writer when both share the tracker.
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def is_process_alive(pid: int) -> bool:
+    """
+    Returns True if a process is running, or if it can't be checked.
+    """
+    if os.name != "posix":
+        # Windows removes the shared memory with its last process
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_stale_ring(name: str):
+    """
+    Removes a ring buffer left by a writer that exited without closing it.
+
+    Args:
+        name (str): The name of the shared memory.
+
+    Raises:
+        FileExistsError: If the shared memory is not a ring buffer of this
+            version or its writer is still running.
+    """
+    shm = open_shared_memory(name)
+    try:
+        writer_pid = None
+        if shm.size >= HEADER_SIZE:
+            header = np.ndarray(
+                (HEADER_FIELDS,), dtype=np.uint64, buffer=shm.buf
+            )
+            if int(header[0]) == RING_MAGIC and int(header[1]) == RING_VERSION:
+                writer_pid = int(header[WRITER_PID])
+            del header
+    finally:
+        shm.close()
+
+    if writer_pid is None:
+        raise FileExistsError(
+            f"The shared memory {name} exists and is not a frame ring buffer"
+        )
+    if is_process_alive(writer_pid):
+        raise FileExistsError(
+            f"The shared memory {name} is used by the process {writer_pid}"
+        )
+
+    LOGGER.warning(
+        "Removing the ring buffer %s left by the process %d", name, writer_pid
+    )
+    # Opened with tracking, so unlinking it unregisters it
+    stale = shared_memory.SharedMemory(name=name)
+    stale.close()
+    stale.unlink()
+
+
+class FrameRing:
+    """
+    This class maps a ring buffer of frames and detections in shared memory.
+
+    Each slot holds the sequence number of its frame, which is set to 0
+    while the slot is written, so readers can detect torn reads.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        self.shm = shm
+        self.header = np.ndarray(
+            (HEADER_FIELDS,), dtype=np.uint64, buffer=shm.buf
+        )
+        (
+            self.num_slots,
+            height,
+            width,
+            channels,
+            self.max_detections,
+            self.slot_size,
+        ) = (int(value) for value in self.header[2:LAST_SEQUENCE])
+        self.frame_shape = (height, width, channels)
+
+        self.slot_headers = []
+        self.frames = []
+        self.detections = []
+        frame_size = height * width * channels
+        for slot in range(self.num_slots):
+            offset = HEADER_SIZE + slot * self.slot_size
+            self.slot_headers.append(
+                np.ndarray((3,), dtype=np.uint64, buffer=shm.buf, offset=offset)
+            )
+            offset += SLOT_HEADER_SIZE
+            self.frames.append(
+                np.ndarray(
+                    self.frame_shape,
+                    dtype=np.uint8,
+                    buffer=shm.buf,
+                    offset=offset,
+                )
+            )
+            offset += frame_size
+            self.detections.append(
+                np.ndarray(
+                    (self.max_detections, DETECTION_SIZE),
+                    dtype=np.float32,
+                    buffer=shm.buf,
+                    offset=offset,
+                )
+            )
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def last_sequence(self) -> int:
+        """
+        Returns the sequence number of the last published frame, 0 if none.
+        """
+        return int(self.header[LAST_SEQUENCE])
+
+    def is_closed(self) -> bool:
+        """
+        Returns True once the writer closed the ring buffer.
+        """
+        return bool(self.header[CLOSED])
+
+    def slot_index(self, sequence: int) -> int:
+        return (sequence - 1) % self.num_slots
+
+    def release(self):
+        """
+        Drops the views of the shared memory so it can be closed.
+        """
+        self.header = None
+        self.slot_headers = []
+        self.frames = []
+        self.detections = []
+
+
+class FrameRingWriter(FrameRing):
+    """
+    This class publishes frames and their detections to a shared memory
+    ring buffer, readers in other processes map the same memory.
+
+    Publishing never waits for the readers: a reader that is more than
+    num_slots frames late skips the overwritten frames.
+
+    A ring buffer left by a writer that crashed is replaced, the name of a
+    running writer can't be reused.
+
+    Args:
+        name (str): The name of the shared memory, ex: cv_inference.
+        frame_shape (tuple[int, int, int]): The shape of the BGR frames.
+        num_slots (int, optional): The number of frames kept. Defaults to 8.
+        max_detections (int, optional): The maximum number of detections
+            kept for each frame. Defaults to 100.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        frame_shape: tuple[int, int, int],
+        num_slots: int = 8,
+        max_detections: int = 100,
+    ):
+        slot_size = get_slot_size(frame_shape, max_detections)
+        size = HEADER_SIZE + num_slots * slot_size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            remove_stale_ring(name)
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=shm.buf)
+        header[:] = (
+            RING_MAGIC,
+            RING_VERSION,
+            num_slots,
+            *frame_shape,
+            max_detections,
+            slot_size,
+            0,
+            0,
+            os.getpid(),
+        )
+        del header
+        super().__init__(shm)
+        self.sequence = 0
+
+    def publish(
+        self,
+        frame: np.ndarray,
+        detections: np.ndarray,
+        timestamp: Optional[float] = None,
+    ) -> int:
+        """
+        Copies a frame and its detections to the next slot.
+
+        Args:
+            frame (np.ndarray): The BGR frame, of the shape of the ring.
+            detections (np.ndarray): The detections of the frame, in the
+                format of CVInference.run_inference.
+            timestamp (Optional[float], optional): The time of the frame.
+                Defaults to the current time.
+
+        Returns:
+            int: The sequence number of the frame.
+        """
+        if frame.shape != self.frame_shape:
+            raise ValueError(
+                f"Frame of shape {frame.shape} doesn't match the ring "
+                f"of shape {self.frame_shape}"
+            )
+
+        self.sequence += 1
+        index = self.slot_index(self.sequence)
+        slot_header = self.slot_headers[index]
+        num_detections = min(len(detections), self.max_detections)
+
+        # Readers of the previous frame of the slot see it's being replaced
+        slot_header[0] = 0
+        self.frames[index][...] = frame
+        self.detections[index][:num_detections] = detections[
+            :num_detections
+        ]
+        slot_header[1] = np.float64(
+            time.time() if timestamp is None else timestamp
+        ).view(np.uint64)
+        slot_header[2] = num_detections
+        slot_header[0] = self.sequence
+
+        self.header[LAST_SEQUENCE] = self.sequence
+        return self.sequence
+
+    def close(self):
+        """
+        Removes the ring buffer, readers keep their mapping until they close
+        it and stop reading once they read the last frame.
+        """
+        self.header[CLOSED] = 1
+        self.release()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FrameRingReader(FrameRing):
+    """
+    This class reads the frames published by a FrameRingWriter in another
+    process, without copying them.
+
+    Args:
+        name (str): The name of the shared memory given to the writer.
+    """
+
+    def __init__(self, name: str):
+        shm = open_shared_memory(name)
+
+        header = np.ndarray((2,), dtype=np.uint64, buffer=shm.buf)
+        magic, version = int(header[0]), int(header[1])
+        del header
+        if magic != RING_MAGIC or version != RING_VERSION:
+            shm.close()
+            raise ValueError(f"{name} is not a frame ring buffer")
+
+        super().__init__(shm)
+        self.next_sequence = self.last_sequence() + 1
+        self.dropped = 0
+
+    def get(self, sequence: int) -> Optional[FrameSlot]:
+        """
+        Returns the frame of a sequence number, None if it was overwritten
+        or is being written.
+
+        Args:
+            sequence (int): The sequence number of the frame.
+        """
+        index = self.slot_index(sequence)
+        slot_header = self.slot_headers[index]
+        if int(slot_header[0]) != sequence:
+            return None
+
+        slot = FrameSlot(
+            sequence,
+            float(slot_header[1:2].view(np.float64)[0]),
+            self.frames[index],
+            self.detections[index][: int(slot_header[2])],
+        )
+        return slot if self.is_valid(slot) else None
+
+    def is_valid(self, slot: FrameSlot) -> bool:
+        """
+        Returns True if the frame was not overwritten since it was read,
+        check it after using the arrays of the slot.
+
+        Args:
+            slot (FrameSlot): The slot returned by get.
+        """
+        return (
+            int(self.slot_headers[self.slot_index(slot.sequence)][0])
+            == slot.sequence
+        )
+
+    def read(self, timeout: Optional[float] = None) -> Optional[FrameSlot]:
+        """
+        Waits for the next frame. If the reader fell behind by more than the
+        size of the ring, it skips to the oldest frame still available.
+
+        Args:
+            timeout (Optional[float], optional): The maximum time to wait in
+                seconds, None waits until the writer is closed. Defaults to None.
+
+        Returns:
+            Optional[FrameSlot]: The frame, None on timeout or once the last
+                frame of a closed writer was read, see is_closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Read before the last sequence, the frames published before
+            # closing are still returned
+            closed = self.is_closed()
+            last_sequence = self.last_sequence()
+            if last_sequence >= self.next_sequence:
+                oldest = max(last_sequence - self.num_slots + 1, 1)
+                if self.next_sequence < oldest:
+                    self.dropped += oldest - self.next_sequence
+                    self.next_sequence = oldest
+
+                slot = self.get(self.next_sequence)
+                self.next_sequence += 1
+                if slot is not None:
+                    return slot
+                self.dropped += 1
+                continue
+
+            if closed:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            # Frames arrive every few ms, polling is cheaper than a lock
+            time.sleep(0.0005)
+
+    def __iter__(self) -> Iterator[FrameSlot]:
+        """
+        Yields the frames until the writer is closed.
+        """
+        while True:
+            slot = self.read()
+            if slot is None:
+                return
+            yield slot
+
+    def close(self):
+        """
+        Unmaps the ring buffer.
+        """
+        self.release()
+        self.shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
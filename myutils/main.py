@@ -1,40 +1,83 @@
 import logging
+import sys
 from argparse import ArgumentParser
+from typing import Optional
 
-from myutils.cpp_class_creator import CreateCppClass
-from myutils.cpp_definition_adder import CppFunctionAdder
-from myutils.cv_inference import CVInference
-from myutils.script_interface import ScriptInterface
-from myutils.video_img_grabber import VideoImgSplit
+from myutils.script_registry import get_scripts
 
-scripts_list: list[ScriptInterface] = [
-    CppFunctionAdder(),
-    CreateCppClass(),
-    VideoImgSplit(),
-    CVInference(),
-]
+
+def add_global_args(parser: ArgumentParser):
+    """
+    Adds the arguments shared by all the scripts, given before the script name.
+
+    Args:
+        parser (ArgumentParser): The main parser
+    """
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Log the wall time, cpu time and peak memory of the script and its stages",
+    )
+    parser.add_argument(
+        "--trace-malloc",
+        action="store_true",
+        help="Log the lines of code that allocated the most memory",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the script with cProfile and log the slowest functions",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        default=None,
+        help="File where the profile is written, defaults to <script>.prof",
+    )
 
 
-def main():
+def main(argv: Optional[list[str]] = None):
     """
     This is the main function of the script.
+
+    Only the module of the selected script is imported, so the dependencies
+    of the other scripts are not loaded.
     """
     logging.basicConfig(
         level=logging.DEBUG, format="[%(levelname)s] %(message)s"
     )
 
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # The first positional argument after the global arguments is the name of the script
+    global_parser = ArgumentParser(add_help=False, allow_abbrev=False)
+    add_global_args(global_parser)
+    _, remaining = global_parser.parse_known_args(argv)
+    selected = next((arg for arg in remaining if not arg.startswith("-")), None)
+
     parser = ArgumentParser()
+    add_global_args(parser)
     subparsers = parser.add_subparsers()
 
-    # Create a subparser for each script and store it in the scripts_dict
-    for script in scripts_list:
+    # Create a subparser for each script, only the selected one gets its arguments
+    for spec in get_scripts():
+        if spec.name != selected:
+            subparsers.add_parser(
+                spec.name, description=spec.description, help=spec.description
+            )
+            continue
+
+        script = spec.load()
         script_parser = subparsers.add_parser(
-            script.get_name(), description=script.get_description()
+            script.get_name(),
+            description=script.get_description(),
+            help=spec.description,
         )
         script.add_subparser_args(script_parser)
-        script_parser.set_defaults(func=script.__call__)
+        script_parser.set_defaults(func=script.run)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if "func" in args:
         args.func(args)  # pylint: disable=no-member
@@ -1,4 +1,48 @@
+import cProfile
+import logging
+import pstats
+import sys
+import time
+import tracemalloc
 from argparse import ArgumentParser, Namespace
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+LOGGER = logging.getLogger(__name__)
+
+
+class StageTiming:
+    """
+    This class accumulates the time spent in a named stage of a script.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+
+
+def get_peak_rss(children: bool = False) -> int:
+    """
+    Returns the peak resident memory of the process in bytes, or 0 if unknown.
+
+    Args:
+        children (bool, optional): Returns the peak of the largest terminated
+            child process instead. Defaults to False.
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(
+        resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    ).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
 
 
 class ScriptInterface:
@@ -9,6 +53,7 @@ class ScriptInterface:
     def __init__(self, name: str, description: str = ""):
         self.name = name
         self.description = description
+        self.stages: dict[str, StageTiming] = {}
 
     def get_name(self):
         """
@@ -41,6 +86,117 @@ class ScriptInterface:
         """
         raise NotImplementedError()
 
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Measures the time spent in a named stage of the script, the time
+        of all the runs of the same stage is accumulated and shown by --timings.
+
+        Args:
+            name (str): The name of the stage.
+        """
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            timing = self.stages.get(name)
+            if timing is None:
+                timing = self.stages[name] = StageTiming()
+            timing.count += 1
+            timing.wall_time += time.perf_counter() - start_wall
+            timing.cpu_time += time.process_time() - start_cpu
+
+    def run(self, args: Namespace):
+        """
+        Calls the script, measuring it as requested by the global arguments
+        --timings, --trace-malloc and --profile.
+
+        Args:
+            args (Namespace): The arguments of the script
+        """
+        timings = getattr(args, "timings", False)
+        trace_malloc = getattr(args, "trace_malloc", False)
+        profile = getattr(args, "profile", False)
+        profile_output = getattr(args, "profile_output", None)
+
+        if trace_malloc:
+            tracemalloc.start()
+        profiler = cProfile.Profile() if profile else None
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            if profiler is not None:
+                profiler.runcall(self.__call__, args)
+            else:
+                self(args)
+        finally:
+            wall_time = time.perf_counter() - start_wall
+            cpu_time = time.process_time() - start_cpu
+
+            if timings:
+                self.log_timings(wall_time, cpu_time)
+            if trace_malloc:
+                self.log_allocations()
+                tracemalloc.stop()
+            if profiler is not None:
+                self.log_profile(profiler, profile_output)
+
+    def log_timings(self, wall_time: float, cpu_time: float):
+        """
+        Logs the time and memory used by the script and its stages.
+        The peak memory of the worker processes is reported separately,
+        it's the peak of the largest one.
+        """
+        LOGGER.info("--------------------TIMINGS----------------------")
+        LOGGER.info(
+            "%s: wall %.3fs, cpu %.3fs, peak rss %.1fMB, "
+            "peak rss of the workers %.1fMB",
+            self.name,
+            wall_time,
+            cpu_time,
+            get_peak_rss() / 1e6,
+            get_peak_rss(children=True) / 1e6,
+        )
+        for name, timing in self.stages.items():
+            LOGGER.info(
+                "    %s: %d calls, wall %.3fs, cpu %.3fs",
+                name,
+                timing.count,
+                timing.wall_time,
+                timing.cpu_time,
+            )
+        LOGGER.info("-------------------------------------------------")
+
+    def log_allocations(self, limit: int = 10):
+        """
+        Logs the lines of code that allocated the most memory still in use.
+        """
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        LOGGER.info("------------------ALLOCATIONS--------------------")
+        LOGGER.info("Peak of traced memory %.1fMB", peak / 1e6)
+        for stat in snapshot.statistics("lineno")[:limit]:
+            LOGGER.info("    %s", stat)
+        LOGGER.info("-------------------------------------------------")
+
+    def log_profile(
+        self,
+        profiler: cProfile.Profile,
+        output: Optional[str],
+        limit: int = 20,
+    ):
+        """
+        Dumps the profile of the script and logs the slowest functions.
+        """
+        output = output or f"{self.name}.prof"
+        profiler.dump_stats(output)
+        LOGGER.info("Profile written to %s", output)
+
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+
     def __str__(self):
         return self.name
 
@@ -0,0 +1,198 @@
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+from typing import NamedTuple
+
+from myutils.file_utils import write_file_atomic
+from myutils.script_interface import ScriptInterface
+
+LOGGER = logging.getLogger(__name__)
+
+# Entry point group used by other packages to add scripts, ex in setup.cfg:
+# [options.entry_points]
+# myutils.scripts =
+#     my_script = my_package.my_module:MyScript
+ENTRY_POINT_GROUP = "myutils.scripts"
+
+
+class ScriptSpec(NamedTuple):
+    """
+    Describes a script without importing its implementation.
+    """
+
+    name: str
+    description: str
+    target: str
+
+    def load(self) -> ScriptInterface:
+        """
+        Imports the module of the script and instantiates it.
+
+        Returns:
+            ScriptInterface: The script.
+        """
+        module_name, class_name = self.target.split(":")
+        script = getattr(importlib.import_module(module_name), class_name)()
+
+        # Builtin scripts take their description from their spec
+        if not script.get_description():
+            script.description = self.description
+        return script
+
+
+# The name must match the one given by each script, the description of the
+# builtin scripts is only defined here
+BUILTIN_SCRIPTS = [
+    ScriptSpec(
+        "add_cpp_definitions",
+        "Add cpp definitions to class files",
+        "myutils.cpp_definition_adder:CppFunctionAdder",
+    ),
+    ScriptSpec(
+        "create_cpp_class",
+        "Create a cpp class",
+        "myutils.cpp_class_creator:CreateCppClass",
+    ),
+    ScriptSpec(
+        "video_img_split",
+        "This script grabs images from a video file",
+        "myutils.video_img_grabber:VideoImgSplit",
+    ),
+    ScriptSpec(
+        "cv_inference",
+        "Runs inference using ONNX runtime on a video or window. Either a -v or -wnd needs to be provided",
+        "myutils.cv_inference:CVInference",
+    ),
+    ScriptSpec(
+        "video_inference",
+        "Sample frames from a video and run inference on them without intermediate images",
+        "myutils.video_inference_pipeline:VideoInferencePipeline",
+    ),
+    ScriptSpec(
+        "bench_cpp_tools",
+        "Benchmark the C++ tooling on synthetic headers and projects",
+        "myutils.cpp_benchmark:CppBenchmark",
+    ),
+    ScriptSpec(
+        "query_cpp_symbols",
+        "List undefined, orphaned or duplicated C++ member functions of a project",
+        "myutils.cpp_symbol_query:CppSymbolQuery",
+    ),
+]
+
+
+def get_cache_file() -> str:
+    """
+    Returns the path of the cached index of the scripts of other packages.
+    """
+    cache_dir = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_dir, "myutils", "entry_points.json")
+
+
+def get_environment_key() -> str:
+    """
+    Returns a key that changes when packages are installed or removed,
+    based on sys.path and the modification time of the site-packages
+    directories, where the metadata of the installed packages is written.
+    """
+    stamps = []
+    for path in sys.path:
+        if not path or os.path.basename(path) not in (
+            "site-packages",
+            "dist-packages",
+        ):
+            stamps.append(path)
+            continue
+        try:
+            stamps.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            stamps.append(path)
+    return hashlib.blake2b(
+        "\n".join(stamps).encode(), digest_size=16
+    ).hexdigest()
+
+
+def find_entry_point_scripts() -> list[ScriptSpec]:
+    """
+    Finds the scripts registered by other packages with entry points.
+    Each script is imported to get its description.
+
+    Returns:
+        list[ScriptSpec]: The scripts found.
+    """
+    # Imported here since it's slow and only needed when the cache is outdated
+    from importlib.metadata import (  # pylint: disable=import-outside-toplevel
+        entry_points,
+    )
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        group = found.select(group=ENTRY_POINT_GROUP)
+    else:
+        # Python 3.9 returns a dict of groups
+        group = found.get(ENTRY_POINT_GROUP, [])  # type: ignore
+
+    scripts = []
+    for entry_point in group:
+        try:
+            script = entry_point.load()()
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.warning("Cannot load script %s: %s", entry_point.name, error)
+            continue
+        scripts.append(
+            ScriptSpec(
+                entry_point.name, script.get_description(), entry_point.value
+            )
+        )
+    return scripts
+
+
+def get_entry_point_scripts() -> list[ScriptSpec]:
+    """
+    Returns the scripts registered by other packages, using a cached index
+    while no package is installed or removed.
+
+    Returns:
+        list[ScriptSpec]: The scripts found.
+    """
+    cache_file = get_cache_file()
+    key = get_environment_key()
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+        if cache["key"] == key:
+            return [ScriptSpec(*script) for script in cache["scripts"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    scripts = find_entry_point_scripts()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        write_file_atomic(
+            cache_file, json.dumps({"key": key, "scripts": scripts})
+        )
+    except OSError as error:
+        LOGGER.debug("Cannot write %s: %s", cache_file, error)
+    return scripts
+
+
+def get_scripts() -> list[ScriptSpec]:
+    """
+    Returns the builtin scripts and the scripts registered by other packages.
+
+    Returns:
+        list[ScriptSpec]: The scripts, builtin scripts take precedence on name clashes.
+    """
+    scripts = list(BUILTIN_SCRIPTS)
+    names = {script.name for script in scripts}
+    for script in get_entry_point_scripts():
+        if script.name not in names:
+            scripts.append(script)
+            names.add(script.name)
+    return scripts
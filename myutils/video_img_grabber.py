@@ -1,23 +1,173 @@
 import logging
+import math
 import os
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
 
 import cv2
+import numpy as np
 
 from myutils.script_interface import ScriptInterface
 
 LOGGER = logging.getLogger(__name__)
 
 
+def frame_timestamp(index: int, delay: float) -> float:
+    """
+    Returns the timestamp in seconds of the index-th sampled frame.
+
+    The timestamp is computed from the index instead of being accumulated,
+    so every process computes exactly the same value for the same frame.
+
+    Args:
+        index (int): The index of the sampled frame, starting at 1.
+        delay (float): The delay between frames in seconds.
+
+    Returns:
+        float: The timestamp in seconds.
+    """
+    return index * delay
+
+
+def frame_image_name(timestamp: float) -> str:
+    """
+    Returns the file name of the image sampled at the given timestamp.
+
+    Args:
+        timestamp (float): The timestamp in seconds.
+
+    Returns:
+        str: The image file name.
+    """
+    return f"{int(timestamp*1000)}.jpg"
+
+
+def frame_index(timestamp: float, fps: float) -> int:
+    """
+    Returns the index of the frame shown at the given timestamp.
+
+    Both the serial and the parallel extraction use this mapping, so they
+    save the same frame for the same timestamp.
+
+    Args:
+        timestamp (float): The timestamp in seconds.
+        fps (float): The frame rate of the video.
+
+    Returns:
+        int: The index of the frame, starting at 0.
+    """
+    return int(timestamp * fps + 0.5)
+
+
+def iter_sampled_frames(
+    video: cv2.VideoCapture,
+    delay: float,
+    first_index: int = 1,
+    last_index: Optional[int] = None,
+) -> Iterator[tuple[float, np.ndarray]]:
+    """
+    Yields the sampled frames with index in [first_index, last_index) of a video.
+
+    The video is seeked once to the first frame and then decoded
+    sequentially, the frames between two samples are grabbed but not
+    decoded into images. When two samples fall on the same frame, the
+    same image is yielded again.
+
+    Args:
+        video (cv2.VideoCapture): The opened video.
+        delay (float): The delay between frames in seconds.
+        first_index (int, optional): The index of the first sampled frame. Defaults to 1.
+        last_index (Optional[int], optional): The index after the last sampled frame,
+            None to sample until the end of the video. Defaults to None.
+
+    Yields:
+        tuple[float, np.ndarray]: The timestamp in seconds and the image of each frame.
+    """
+    fps = video.get(cv2.CAP_PROP_FPS)
+    first_frame = frame_index(frame_timestamp(first_index, delay), fps)
+    video.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+
+    # Index of the next frame to decode
+    curr_frame = first_frame
+    img = None
+    index = first_index
+    while last_index is None or index < last_index:
+        curr_time = frame_timestamp(index, delay)
+        target_frame = frame_index(curr_time, fps)
+
+        # The delay is shorter than a frame, reuse the last decoded frame
+        if target_frame < curr_frame and img is not None:
+            yield curr_time, img
+            index += 1
+            continue
+
+        # Decode and discard the frames between two samples
+        success = True
+        while curr_frame < target_frame and success:
+            success = video.grab()
+            curr_frame += 1
+        if not success:
+            return
+
+        success, img = video.read()
+        curr_frame += 1
+        if not success:
+            return
+
+        yield curr_time, img
+        index += 1
+
+
+def extract_segment(
+    video_file: str,
+    save_images_path: str,
+    delay: float,
+    first_index: int,
+    last_index: Optional[int],
+) -> int:
+    """
+    Saves the sampled frames with index in [first_index, last_index) of a video.
+
+    The video is opened by this function, so it can run in a separate
+    process for each segment of the video.
+
+    Args:
+        video_file (str): Path to the video file.
+        save_images_path (str): The path where the images will be saved.
+        delay (float): The delay between frames in seconds.
+        first_index (int): The index of the first sampled frame of the segment.
+        last_index (Optional[int]): The index after the last sampled frame of the segment,
+            None to sample until the end of the video.
+
+    Returns:
+        int: The number of images saved.
+    """
+    video = cv2.VideoCapture(video_file)
+    if not video.isOpened():
+        LOGGER.error("Error opening video file %s", video_file)
+        return 0
+
+    counter = 0
+    for curr_time, img in iter_sampled_frames(
+        video, delay, first_index, last_index
+    ):
+        img_path = os.path.join(save_images_path, frame_image_name(curr_time))
+        cv2.imwrite(img_path, img)
+        counter += 1
+        LOGGER.debug("Saved image %s", img_path)
+
+    video.release()
+    return counter
+
+
 class VideoImgSplit(ScriptInterface):
     """
     This class grabs images from a video file and saves them to a folder.
     """
 
     def __init__(self):
-        super().__init__(
-            "video_img_split", "This script grabs images from a video file"
-        )
+        super().__init__("video_img_split")
 
     def add_subparser_args(self, parser: ArgumentParser):
         """
@@ -49,40 +199,150 @@ class VideoImgSplit(ScriptInterface):
             nargs="?",
             help="The delay between frames in seconds",
         )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            const=os.cpu_count(),
+            default=1,
+            nargs="?",
+            help="Split the video in segments decoded by this number of processes",
+        )
 
-    def __call__(self, args: Namespace):
+    def run_serial(self, args: Namespace) -> int:
         """
-        This is the main function of the cpp_tools script.
+        Saves the sampled frames by seeking the video to each timestamp.
 
         Args:
-            args (Namespace): _description_
-        """
-
-        # Check if img paths exists
-        img_path = args.save_images_path
-        if not os.path.isdir(img_path) and img_path != "":
-            LOGGER.info("Creating directory %s", img_path)
-            os.makedirs(img_path)
+            args (Namespace): The arguments of the script
 
+        Returns:
+            int: The number of images saved.
+        """
         # Open video file
         video = cv2.VideoCapture(args.video_file)
         if not video.isOpened():
             LOGGER.error("Error opening video file %s", args.video_file)
-            return
+            return 0
+
+        # Seek to the same frames as the parallel extraction
+        fps = video.get(cv2.CAP_PROP_FPS)
 
         # Loop trough video by delay
-        curr_time = args.delay
+        index = 1
         counter = 0
+        last_frame = -1
+        img = None
         while video.isOpened():
-            video.set(cv2.CAP_PROP_POS_MSEC, curr_time * 1000)
-            success, img = video.read()
-            if not success:
-                break
-            img_name = f"{int(curr_time*1000)}.jpg"
-            img_path = os.path.join(args.save_images_path, img_name)
-            cv2.imwrite(img_path, img)
-            curr_time += args.delay
+            curr_time = frame_timestamp(index, args.delay)
+            target_frame = frame_index(curr_time, fps) if fps > 0 else -1
+            if target_frame < 0 or target_frame != last_frame:
+                with self.stage("decode"):
+                    if target_frame < 0:
+                        video.set(cv2.CAP_PROP_POS_MSEC, curr_time * 1000)
+                    else:
+                        video.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
+                    success, img = video.read()
+                if not success:
+                    break
+                last_frame = target_frame
+            img_path = os.path.join(
+                args.save_images_path, frame_image_name(curr_time)
+            )
+            with self.stage("write"):
+                cv2.imwrite(img_path, img)
+            index += 1
             counter += 1
             LOGGER.debug("Saved image %s", img_path)
 
+        video.release()
+        return counter
+
+    def run_parallel(self, args: Namespace) -> int:
+        """
+        Splits the sampled frames in contiguous segments, one per worker.
+
+        The segments are computed over the indices of the sampled frames,
+        so each frame belongs to exactly one segment. The frame count is
+        often estimated from the duration, so the last segment runs until
+        the end of the video instead of stopping at the estimated count.
+
+        Args:
+            args (Namespace): The arguments of the script
+
+        Returns:
+            int: The number of images saved.
+        """
+        video = cv2.VideoCapture(args.video_file)
+        if not video.isOpened():
+            LOGGER.error("Error opening video file %s", args.video_file)
+            return 0
+        fps = video.get(cv2.CAP_PROP_FPS)
+        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        video.release()
+
+        if fps <= 0 or frame_count <= 0:
+            LOGGER.warning(
+                "Unknown length of video %s, falling back to a single process",
+                args.video_file,
+            )
+            return self.run_serial(args)
+
+        # Number of sampled frames inside the video
+        duration = frame_count / fps
+        num_samples = max(math.ceil(duration / args.delay) - 1, 0)
+        while (
+            num_samples > 0
+            and frame_index(frame_timestamp(num_samples, args.delay), fps)
+            >= frame_count
+        ):
+            num_samples -= 1
+        if num_samples == 0:
+            return self.run_serial(args)
+
+        num_segments = max(min(args.workers, num_samples), 1)
+        segment_size = math.ceil(num_samples / num_segments)
+        LOGGER.info(
+            "Splitting %d frames in %d segments", num_samples, num_segments
+        )
+
+        counter = 0
+        with ProcessPoolExecutor(max_workers=num_segments) as executor:
+            futures = [
+                executor.submit(
+                    extract_segment,
+                    args.video_file,
+                    args.save_images_path,
+                    args.delay,
+                    first_index,
+                    first_index + segment_size
+                    if first_index + segment_size <= num_samples
+                    else None,
+                )
+                for first_index in range(1, num_samples + 1, segment_size)
+            ]
+            for future in futures:
+                counter += future.result()
+
+        return counter
+
+    def __call__(self, args: Namespace):
+        """
+        This is the main function of the cpp_tools script.
+
+        Args:
+            args (Namespace): _description_
+        """
+
+        # Check if img paths exists
+        img_path = args.save_images_path
+        if not os.path.isdir(img_path) and img_path != "":
+            LOGGER.info("Creating directory %s", img_path)
+            os.makedirs(img_path)
+
+        if args.workers > 1:
+            counter = self.run_parallel(args)
+        else:
+            counter = self.run_serial(args)
+
         LOGGER.info("Saved %d images", counter)
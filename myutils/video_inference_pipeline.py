@@ -0,0 +1,359 @@
+import csv
+import logging
+import os
+import queue
+import threading
+from argparse import ArgumentParser, Namespace
+from typing import Any, Optional
+
+import cv2
+import numpy as np
+
+from myutils.cv_inference import CVInference
+from myutils.script_interface import ScriptInterface
+from myutils.video_img_grabber import frame_image_name, iter_sampled_frames
+
+LOGGER = logging.getLogger(__name__)
+
+# Marks the end of the frames in the queues
+END_OF_STREAM = None
+
+DETECTIONS_HEADER = [
+    "image",
+    "timestamp",
+    "class_id",
+    "class_name",
+    "score",
+    "x0",
+    "y0",
+    "x1",
+    "y1",
+]
+
+
+class VideoInferencePipeline(ScriptInterface):
+    """
+    This class samples the frames of a video and runs inference on them in
+    the same process, without writing the frames to disk in between.
+
+    The frames are decoded by a reader thread, batched for the model by the
+    main thread and saved by a writer thread, connected by bounded queues.
+    """
+
+    def __init__(self):
+        super().__init__("video_inference")
+
+    def add_subparser_args(self, parser: ArgumentParser):
+        """
+        This function ads arguments for the script.
+
+        Args:
+            parser (ArgumentParser): The subparser of the script
+        """
+        parser.add_argument(
+            "video_file",
+            type=str,
+            help="Path to the video file",
+        )
+        parser.add_argument(
+            "model_weights_path",
+            type=str,
+            help="The path to the weights of the model",
+        )
+        parser.add_argument(
+            "-d",
+            "--delay",
+            type=float,
+            default=5.0,
+            help="The delay between sampled frames in seconds",
+        )
+        parser.add_argument(
+            "-f",
+            "--model_format",
+            default="yolo",
+            type=str,
+            choices=["yolo"],
+            help="The format of the model",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=8,
+            help="Maximum number of frames given to the model at once",
+        )
+        parser.add_argument(
+            "-q",
+            "--queue_size",
+            type=int,
+            default=32,
+            help="Maximum number of frames waiting in each queue",
+        )
+        parser.add_argument(
+            "-s",
+            "--save_images_path",
+            type=str,
+            default=None,
+            help="Save the frames with detections to this path",
+        )
+        parser.add_argument(
+            "-o",
+            "--detections_file",
+            type=str,
+            default=None,
+            help="Write the detections to this CSV file",
+        )
+        parser.add_argument(
+            "-c",
+            "--conf_tresh",
+            type=float,
+            default=None,
+            help="The confidence threshold for the model",
+        )
+        parser.add_argument(
+            "-i",
+            "--iou_tresh",
+            type=float,
+            default=None,
+            help="The IoU threshold for the model",
+        )
+        parser.add_argument(
+            "--cpu", help="Do not use GPU", action="store_true"
+        )
+        parser.add_argument(
+            "-nc",
+            "--nc_path",
+            type=str,
+            default=None,
+            help="Path to the class names file",
+        )
+
+    def read_frames(
+        self,
+        video_file: str,
+        delay: float,
+        frames: "queue.Queue[Any]",
+        errors: list[Exception],
+    ):
+        """
+        Decodes the sampled frames of a video into a queue, ended by END_OF_STREAM.
+        On error the stream is ended, the error is re-raised by the main thread.
+
+        Args:
+            video_file (str): Path to the video file.
+            delay (float): The delay between sampled frames in seconds.
+            frames (queue.Queue): The queue of (timestamp, image).
+            errors (list[Exception]): The list the error is added to.
+        """
+        video = cv2.VideoCapture(video_file)
+        try:
+            if not video.isOpened():
+                LOGGER.error("Error opening video file %s", video_file)
+                return
+            for frame in iter_sampled_frames(video, delay):
+                frames.put(frame)
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(error)
+        finally:
+            video.release()
+            frames.put(END_OF_STREAM)
+
+    def write_results(
+        self,
+        results: "queue.Queue[Any]",
+        save_images_path: Optional[str],
+        detections_file: Optional[str],
+        class_names: list[str],
+        errors: list[Exception],
+    ):
+        """
+        Saves the frames with detections and their detections, until END_OF_STREAM.
+        On error the thread stops, the error is re-raised by the main thread.
+
+        Args:
+            results (queue.Queue): The queue of (timestamp, image, detections).
+            save_images_path (Optional[str]): The path where the images are saved, None to not save them.
+            detections_file (Optional[str]): The CSV file of the detections, None to not write it.
+            class_names (list[str]): The names of the classes.
+            errors (list[Exception]): The list the error is added to.
+        """
+        file = None
+        writer = None
+        try:
+            if detections_file:
+                file = open(  # pylint: disable=consider-using-with
+                    detections_file, "w", encoding="utf-8", newline=""
+                )
+                writer = csv.writer(file)
+                writer.writerow(DETECTIONS_HEADER)
+
+            while True:
+                result = results.get()
+                if result is END_OF_STREAM:
+                    break
+                timestamp, img, detections = result
+
+                image_name = frame_image_name(timestamp)
+                if save_images_path is not None:
+                    cv2.imwrite(os.path.join(save_images_path, image_name), img)
+
+                if writer is not None:
+                    for _, x0, y0, x1, y1, cls_id, score in detections.tolist():
+                        cls_int_id = int(cls_id)
+                        writer.writerow(
+                            [
+                                image_name,
+                                timestamp,
+                                cls_int_id,
+                                class_names[cls_int_id]
+                                if len(class_names) > cls_int_id
+                                else "",
+                                f"{score:.4f}",
+                                f"{x0:.1f}",
+                                f"{y0:.1f}",
+                                f"{x1:.1f}",
+                                f"{y1:.1f}",
+                            ]
+                        )
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(error)
+        finally:
+            if file is not None:
+                file.close()
+
+    def put_result(
+        self, results: "queue.Queue[Any]", result: Any, writer: threading.Thread
+    ) -> bool:
+        """
+        Waits for room in the results queue, as long as the writer thread runs.
+
+        Args:
+            results (queue.Queue): The queue of (timestamp, image, detections).
+            result (Any): The result to add, or END_OF_STREAM.
+            writer (threading.Thread): The writer thread consuming the queue.
+
+        Returns:
+            bool: False if the writer stopped before the result was added.
+        """
+        while writer.is_alive():
+            try:
+                results.put(result, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get_batch(
+        self, frames: "queue.Queue[Any]", batch_size: int
+    ) -> tuple[list[tuple[float, np.ndarray]], bool]:
+        """
+        Waits for a frame and takes the frames already decoded, up to batch_size.
+
+        Args:
+            frames (queue.Queue): The queue of (timestamp, image).
+            batch_size (int): The maximum number of frames.
+
+        Returns:
+            tuple[list[tuple[float, np.ndarray]], bool]: The frames and
+                whether the end of the stream was reached.
+        """
+        batch = []
+        frame = frames.get()
+        while frame is not END_OF_STREAM:
+            batch.append(frame)
+            if len(batch) >= batch_size:
+                return batch, False
+            try:
+                frame = frames.get_nowait()
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def __call__(self, args: Namespace):
+        """
+        This is the main function of the video_inference script.
+
+        Args:
+            args (Namespace): The arguments of the script
+        """
+        if args.save_images_path and not os.path.isdir(args.save_images_path):
+            LOGGER.info("Creating directory %s", args.save_images_path)
+            os.makedirs(args.save_images_path)
+
+        kwargs: dict[str, Any] = {
+            "model_format": args.model_format,
+            "use_gpu": not args.cpu,
+        }
+        if args.conf_tresh:
+            kwargs["conf_tresh"] = args.conf_tresh
+        if args.iou_tresh:
+            kwargs["iou_tresh"] = args.iou_tresh
+        if args.nc_path:
+            with open(args.nc_path, "r", encoding="utf-8") as file:
+                kwargs["class_names"] = file.read().splitlines()
+
+        inference = CVInference()
+        # Report the stages of the inference with the ones of the pipeline
+        inference.stages = self.stages
+        inference.init(args.model_weights_path, **kwargs)
+
+        frames: "queue.Queue[Any]" = queue.Queue(maxsize=args.queue_size)
+        results: "queue.Queue[Any]" = queue.Queue(maxsize=args.queue_size)
+        reader_errors: list[Exception] = []
+        writer_errors: list[Exception] = []
+
+        reader = threading.Thread(
+            target=self.read_frames,
+            args=(args.video_file, args.delay, frames, reader_errors),
+            daemon=True,
+        )
+        writer = threading.Thread(
+            target=self.write_results,
+            args=(
+                results,
+                args.save_images_path,
+                args.detections_file,
+                inference.class_names,
+                writer_errors,
+            ),
+            daemon=True,
+        )
+        reader.start()
+        writer.start()
+
+        num_frames = 0
+        num_detected = 0
+        try:
+            finished = False
+            # The writer only stops early on error
+            while not finished and writer.is_alive():
+                with self.stage("wait frames"):
+                    batch, finished = self.get_batch(frames, args.batch_size)
+                if not batch:
+                    continue
+
+                lst_detections = inference.run_inference_batch(
+                    [img for _, img in batch]
+                )
+                for (timestamp, img), detections in zip(batch, lst_detections):
+                    num_frames += 1
+                    if len(detections) == 0:
+                        continue
+                    num_detected += 1
+                    with self.stage("wait writer"):
+                        if not self.put_result(
+                            results, (timestamp, img, detections), writer
+                        ):
+                            break
+        finally:
+            self.put_result(results, END_OF_STREAM, writer)
+            writer.join()
+
+        if reader_errors:
+            raise reader_errors[0]
+        if writer_errors:
+            raise writer_errors[0]
+
+        LOGGER.info(
+            "Found detections in %d of %d frames", num_detected, num_frames
+        )
@@ -0,0 +1,521 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+# Constants from <X11/X.h>, <X11/Xlib.h> and <sys/ipc.h>
+Z_PIXMAP = 2
+IS_VIEWABLE = 2
+ANY_PROPERTY_TYPE = 0
+ALL_PLANES = ctypes.c_ulong(-1).value
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XImage(ctypes.Structure):
+    # Only the fields used are declared, the image is allocated by Xlib
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+class XWindowAttributes(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int),
+        ("y", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("border_width", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("visual", ctypes.c_void_p),
+        ("root", ctypes.c_ulong),
+        ("class", ctypes.c_int),
+        ("bit_gravity", ctypes.c_int),
+        ("win_gravity", ctypes.c_int),
+        ("backing_store", ctypes.c_int),
+        ("backing_planes", ctypes.c_ulong),
+        ("backing_pixel", ctypes.c_ulong),
+        ("save_under", ctypes.c_int),
+        ("colormap", ctypes.c_ulong),
+        ("map_installed", ctypes.c_int),
+        ("map_state", ctypes.c_int),
+        ("all_event_masks", ctypes.c_long),
+        ("your_event_mask", ctypes.c_long),
+        ("do_not_propagate_mask", ctypes.c_long),
+        ("override_redirect", ctypes.c_int),
+        ("screen", ctypes.c_void_p),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ("type", ctypes.c_int),
+        ("display", ctypes.c_void_p),
+        ("resourceid", ctypes.c_ulong),
+        ("serial", ctypes.c_ulong),
+        ("error_code", ctypes.c_ubyte),
+        ("request_code", ctypes.c_ubyte),
+        ("minor_code", ctypes.c_ubyte),
+    ]
+
+
+X_ERROR_HANDLER = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent)
+)
+
+# Errors reported by the X server, the default handler of Xlib exits the process
+X_ERRORS: list[int] = []
+
+
+@X_ERROR_HANDLER
+def record_x_error(_display, event) -> int:
+    X_ERRORS.append(event.contents.error_code)
+    return 0
+
+
+def load_library(name: str) -> ctypes.CDLL:
+    """
+    Loads a shared library by its short name, ex: X11.
+    """
+    library_name = ctypes.util.find_library(name)
+    if library_name is None:
+        raise OSError(f"lib{name} not found")
+    return ctypes.CDLL(library_name, use_errno=True)
+
+
+def bind_x11(xlib: ctypes.CDLL, xext: ctypes.CDLL, libc: ctypes.CDLL):
+    """
+    Declares the signatures of the functions used, so the 64 bits pointers
+    and XIDs are not truncated to int.
+    """
+    c_void_p = ctypes.c_void_p
+    c_ulong = ctypes.c_ulong
+    c_int = ctypes.c_int
+    c_uint = ctypes.c_uint
+
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = c_void_p
+    xlib.XCloseDisplay.argtypes = [c_void_p]
+    xlib.XDefaultRootWindow.argtypes = [c_void_p]
+    xlib.XDefaultRootWindow.restype = c_ulong
+    xlib.XInternAtom.argtypes = [c_void_p, ctypes.c_char_p, c_int]
+    xlib.XInternAtom.restype = c_ulong
+    xlib.XGetWindowProperty.argtypes = [
+        c_void_p,
+        c_ulong,
+        c_ulong,
+        ctypes.c_long,
+        ctypes.c_long,
+        c_int,
+        c_ulong,
+        ctypes.POINTER(c_ulong),
+        ctypes.POINTER(c_int),
+        ctypes.POINTER(c_ulong),
+        ctypes.POINTER(c_ulong),
+        ctypes.POINTER(c_void_p),
+    ]
+    xlib.XQueryTree.argtypes = [
+        c_void_p,
+        c_ulong,
+        ctypes.POINTER(c_ulong),
+        ctypes.POINTER(c_ulong),
+        ctypes.POINTER(ctypes.POINTER(c_ulong)),
+        ctypes.POINTER(c_uint),
+    ]
+    xlib.XFetchName.argtypes = [c_void_p, c_ulong, ctypes.POINTER(c_void_p)]
+    xlib.XFree.argtypes = [c_void_p]
+    xlib.XGetWindowAttributes.argtypes = [
+        c_void_p,
+        c_ulong,
+        ctypes.POINTER(XWindowAttributes),
+    ]
+    xlib.XSync.argtypes = [c_void_p, c_int]
+    xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+    xlib.XSetErrorHandler.argtypes = [X_ERROR_HANDLER]
+    xlib.XSetErrorHandler.restype = c_void_p
+
+    xext.XShmQueryExtension.argtypes = [c_void_p]
+    xext.XShmCreateImage.argtypes = [
+        c_void_p,
+        c_void_p,
+        c_uint,
+        c_int,
+        c_void_p,
+        ctypes.POINTER(XShmSegmentInfo),
+        c_uint,
+        c_uint,
+    ]
+    xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+    xext.XShmAttach.argtypes = [c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+    xext.XShmDetach.argtypes = [c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+    xext.XShmGetImage.argtypes = [
+        c_void_p,
+        c_ulong,
+        ctypes.POINTER(XImage),
+        c_int,
+        c_int,
+        c_ulong,
+    ]
+
+    libc.shmget.argtypes = [c_int, ctypes.c_size_t, c_int]
+    libc.shmat.argtypes = [c_int, c_void_p, c_int]
+    libc.shmat.restype = c_void_p
+    libc.shmdt.argtypes = [c_void_p]
+    libc.shmctl.argtypes = [c_int, c_int, c_void_p]
+
+
+class WindowCapture:
+    """
+    This class captures the content of a X11 window, or of the whole screen,
+    with the MIT-SHM extension: the X server writes each frame directly into
+    a shared memory segment mapped as a NumPy array, instead of sending it
+    through the X connection.
+
+    Args:
+        window_name (Optional[str], optional): A part of the title of the
+            window, None captures the whole screen. Defaults to None.
+        display_name (Optional[str], optional): The X display, ex: :99.
+            Defaults to the DISPLAY environment variable.
+    """
+
+    def __init__(
+        self,
+        window_name: Optional[str] = None,
+        display_name: Optional[str] = None,
+    ):
+        self.xlib = load_library("X11")
+        self.xext = load_library("Xext")
+        self.libc = load_library("c")
+        bind_x11(self.xlib, self.xext, self.libc)
+
+        display_name = display_name or os.environ.get("DISPLAY")
+        self.display = self.xlib.XOpenDisplay(
+            display_name.encode() if display_name else None
+        )
+        if not self.display:
+            raise OSError(f"Cannot open the X display {display_name}")
+        self.xlib.XSetErrorHandler(record_x_error)
+
+        # Pointer to the XImage created by XShmCreateImage
+        self.image = None
+        self.shm_info = XShmSegmentInfo()
+        self.bgra: Optional[np.ndarray] = None
+        self.closed = False
+
+        try:
+            if not self.xext.XShmQueryExtension(self.display):
+                raise OSError("The X server doesn't support MIT-SHM")
+
+            root = self.xlib.XDefaultRootWindow(self.display)
+            if window_name is None:
+                self.window = root
+            else:
+                window = self.find_window(root, window_name)
+                if window is None:
+                    raise ValueError(f"Window {window_name} not found")
+                self.window = window
+        except Exception:
+            self.close()
+            raise
+
+    def get_window_name(self, window: int) -> str:
+        """
+        Returns the title of a window, or an empty string if it has none.
+        """
+        # _NET_WM_NAME is UTF-8, WM_NAME is only used by old clients
+        net_wm_name = self.xlib.XInternAtom(self.display, b"_NET_WM_NAME", 1)
+        if net_wm_name:
+            name = self.get_property(window, net_wm_name)
+            if name:
+                return name.decode("utf-8", "replace")
+
+        name_ptr = ctypes.c_void_p()
+        if self.xlib.XFetchName(self.display, window, ctypes.byref(name_ptr)):
+            if name_ptr.value:
+                name = ctypes.string_at(name_ptr.value)
+                self.xlib.XFree(name_ptr)
+                return name.decode("latin-1")
+        return ""
+
+    def get_property(self, window: int, atom: int) -> bytes:
+        """
+        Returns the raw value of a property of a window.
+        """
+        actual_type = ctypes.c_ulong()
+        actual_format = ctypes.c_int()
+        num_items = ctypes.c_ulong()
+        bytes_after = ctypes.c_ulong()
+        data = ctypes.c_void_p()
+        status = self.xlib.XGetWindowProperty(
+            self.display,
+            window,
+            atom,
+            0,
+            1 << 16,
+            0,
+            ANY_PROPERTY_TYPE,
+            ctypes.byref(actual_type),
+            ctypes.byref(actual_format),
+            ctypes.byref(num_items),
+            ctypes.byref(bytes_after),
+            ctypes.byref(data),
+        )
+        if status != 0 or not data.value:
+            return b""
+
+        # Items of format 32 are stored as longs by Xlib
+        item_size = {8: 1, 16: 2, 32: ctypes.sizeof(ctypes.c_long)}.get(
+            actual_format.value, 1
+        )
+        value = ctypes.string_at(data.value, num_items.value * item_size)
+        self.xlib.XFree(data)
+        return value
+
+    def list_windows(self, root: int) -> list[int]:
+        """
+        Returns the top level windows, from the window manager if there is one,
+        otherwise all the windows of the tree.
+        """
+        client_list = self.xlib.XInternAtom(
+            self.display, b"_NET_CLIENT_LIST", 1
+        )
+        if client_list:
+            value = self.get_property(root, client_list)
+            if value:
+                num_windows = len(value) // ctypes.sizeof(ctypes.c_ulong)
+                return list(
+                    (ctypes.c_ulong * num_windows).from_buffer_copy(value)
+                )
+
+        windows = []
+        stack = [root]
+        while stack:
+            window = stack.pop()
+            root_return = ctypes.c_ulong()
+            parent_return = ctypes.c_ulong()
+            children = ctypes.POINTER(ctypes.c_ulong)()
+            num_children = ctypes.c_uint()
+            if not self.xlib.XQueryTree(
+                self.display,
+                window,
+                ctypes.byref(root_return),
+                ctypes.byref(parent_return),
+                ctypes.byref(children),
+                ctypes.byref(num_children),
+            ):
+                continue
+            if children:
+                stack.extend(children[: num_children.value])
+                self.xlib.XFree(children)
+            if window != root:
+                windows.append(window)
+        return windows
+
+    def find_window(self, root: int, window_name: str) -> Optional[int]:
+        """
+        Finds the first window with a title that contains window_name.
+
+        Args:
+            root (int): The root window of the screen.
+            window_name (str): A part of the title of the window.
+
+        Returns:
+            Optional[int]: The window, or None if not found.
+        """
+        for window in self.list_windows(root):
+            name = self.get_window_name(int(window))
+            if window_name in name:
+                LOGGER.info("Capturing window %s (0x%x)", name, int(window))
+                return int(window)
+        return None
+
+    def create_image(self, attributes: XWindowAttributes):
+        """
+        Creates the shared memory image with the size of the window.
+        """
+        self.destroy_image()
+
+        image = self.xext.XShmCreateImage(
+            self.display,
+            attributes.visual,
+            attributes.depth,
+            Z_PIXMAP,
+            None,
+            ctypes.byref(self.shm_info),
+            attributes.width,
+            attributes.height,
+        )
+        if not image:
+            raise OSError("XShmCreateImage failed")
+        if image.contents.bits_per_pixel != 32:
+            self.xlib.XDestroyImage(image)
+            raise OSError(
+                f"Unsupported {image.contents.bits_per_pixel} bits per pixel"
+            )
+
+        bytes_per_line = image.contents.bytes_per_line
+        size = bytes_per_line * image.contents.height
+        shmid = self.libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if shmid < 0:
+            self.xlib.XDestroyImage(image)
+            raise OSError(ctypes.get_errno(), "shmget failed")
+        shmaddr = self.libc.shmat(shmid, None, 0)
+        if shmaddr in (None, ctypes.c_void_p(-1).value):
+            self.libc.shmctl(shmid, IPC_RMID, None)
+            self.xlib.XDestroyImage(image)
+            raise OSError(ctypes.get_errno(), "shmat failed")
+
+        self.shm_info.shmid = shmid
+        self.shm_info.shmaddr = shmaddr
+        self.shm_info.readOnly = 0
+        image.contents.data = shmaddr
+        self.image = image
+
+        self.xext.XShmAttach(self.display, ctypes.byref(self.shm_info))
+        self.xlib.XSync(self.display, 0)
+
+        # The segment is freed once both processes detach it
+        self.libc.shmctl(shmid, IPC_RMID, None)
+        if X_ERRORS:
+            X_ERRORS.clear()
+            self.destroy_image()
+            raise OSError("XShmAttach failed, the X server may be remote")
+
+        # Pixels are stored as BGRX on little-endian servers, the view
+        # is updated in place by every XShmGetImage
+        buffer = (ctypes.c_ubyte * size).from_address(shmaddr)
+        self.bgra = np.ndarray(
+            (image.contents.height, image.contents.width, 4),
+            dtype=np.uint8,
+            buffer=buffer,
+            strides=(bytes_per_line, 4, 1),
+        )
+
+    def destroy_image(self):
+        """
+        Releases the shared memory image.
+        """
+        if self.image is None:
+            return
+        self.bgra = None
+        self.xext.XShmDetach(self.display, ctypes.byref(self.shm_info))
+        self.xlib.XSync(self.display, 0)
+
+        # XDestroyImage would free the shared memory as if it was malloc'd
+        self.image.contents.data = None
+        self.xlib.XDestroyImage(self.image)
+        self.libc.shmdt(self.shm_info.shmaddr)
+        self.image = None
+        X_ERRORS.clear()
+
+    def grab(self) -> Optional[np.ndarray]:
+        """
+        Captures the window.
+
+        The returned array is a view of the shared memory, overwritten by the
+        next call, copy it to keep it.
+
+        Returns:
+            Optional[np.ndarray]: The BGRX image, None if the window is not
+                visible or was closed, in which case self.closed is set.
+        """
+        attributes = XWindowAttributes()
+        if not self.xlib.XGetWindowAttributes(
+            self.display, self.window, ctypes.byref(attributes)
+        ):
+            X_ERRORS.clear()
+            self.closed = True
+            return None
+        if attributes.map_state != IS_VIEWABLE:
+            return None
+
+        if (
+            self.image is None
+            or self.image.contents.width != attributes.width
+            or self.image.contents.height != attributes.height
+        ):
+            self.create_image(attributes)
+
+        if not self.xext.XShmGetImage(
+            self.display, self.window, self.image, 0, 0, ALL_PLANES
+        ):
+            # The window was resized or unmapped since its attributes were read
+            X_ERRORS.clear()
+            return None
+
+        return self.bgra
+
+    def frames(self, fps: float = 0) -> Iterator[np.ndarray]:
+        """
+        Yields the captures of the window until it's closed.
+
+        Args:
+            fps (float, optional): The maximum number of captures per second,
+                0 captures as fast as possible. Defaults to 0.
+
+        Yields:
+            np.ndarray: The BGRX image, overwritten by the next capture.
+        """
+        period = 1 / fps if fps > 0 else 0
+        next_time = time.monotonic()
+        while True:
+            frame = self.grab()
+            if self.closed:
+                LOGGER.info("The window was closed")
+                return
+            if frame is not None:
+                yield frame
+            elif not period:
+                # Wait for the window to be visible again
+                time.sleep(0.1)
+
+            if period:
+                next_time += period
+                remaining = next_time - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                else:
+                    # Don't try to catch up after a slow frame
+                    next_time = time.monotonic()
+
+    def close(self):
+        """
+        Releases the shared memory and the connection to the X server.
+        """
+        if self.display:
+            self.destroy_image()
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
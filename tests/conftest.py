@@ -0,0 +1,78 @@
+import pytest
+
+HEADER = """
+#pragma once
+namespace ns {
+
+class A {
+    public:
+        void um();
+        void arr(int a[3]);
+        void callback(void (*cb)(int), int (&values)[4]);
+        void cmp(int a = (1 < 2), int b = 3);
+        void safe() const noexcept;
+        void maybe() noexcept(false);
+        virtual void pure() = 0;
+};
+
+} // namespace ns
+"""
+
+SOURCE = """
+#include "A.h"
+
+using namespace ns;
+
+void A::um() {
+}
+
+void A::arr(int b[3]) {
+}
+
+void A::callback(void (*f)(int), int (&v)[4]) {
+}
+
+void A::cmp(int x, int y) {
+}
+
+void A::safe() const noexcept {
+}
+
+void A::maybe() noexcept(false) {
+}
+"""
+
+# The source of A before any definition is added
+EMPTY_SOURCE = '#include "A.h"\n'
+
+
+@pytest.fixture(name="header_text")
+def fixture_header_text():
+    return HEADER
+
+
+@pytest.fixture(name="source_text")
+def fixture_source_text():
+    return SOURCE
+
+
+@pytest.fixture(name="class_files")
+def fixture_class_files(tmp_path):
+    """
+    Writes the header A.h and the source A.cpp defining all its members.
+    """
+    header_file = tmp_path / "A.h"
+    cpp_file = tmp_path / "A.cpp"
+    header_file.write_text(HEADER, encoding="utf-8")
+    cpp_file.write_text(SOURCE, encoding="utf-8")
+    return header_file, cpp_file
+
+
+@pytest.fixture(name="empty_class_files")
+def fixture_empty_class_files(class_files):
+    """
+    Same as class_files, with a source that defines none of the members.
+    """
+    header_file, cpp_file = class_files
+    cpp_file.write_text(EMPTY_SOURCE, encoding="utf-8")
+    return header_file, cpp_file
@@ -0,0 +1,58 @@
+import json
+from argparse import Namespace
+
+from myutils.cpp_benchmark import DEFAULT_SPEC, CppBenchmark, generate_tree
+
+STAGES = (
+    "get_functions_from_header",
+    "get_functions_definitions_from_cpp",
+    "compare_functions",
+    "call",
+)
+
+
+def small_spec() -> dict:
+    return {**DEFAULT_SPEC, "pairs": [6], "files_per_directory": 4}
+
+
+def test_generate_tree(tmp_path):
+    missing = generate_tree(str(tmp_path), 6, small_spec())
+    assert missing > 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "module_0",
+        "module_1",
+    ]
+    assert len(list(tmp_path.glob("*/*.h"))) == 6
+    assert len(list(tmp_path.glob("*/*.cpp"))) == 6
+
+
+def test_bench_tree_finds_the_missing_definitions():
+    result = CppBenchmark().bench_tree(6, small_spec(), 1, 1)
+    assert result["missing"] == result["expected_missing"] > 0
+    assert result["pairs"] == 6
+    assert result["files"] == 12
+    for stage in STAGES:
+        assert set(result[stage]) >= {"seconds", "files_per_second"}
+
+
+def test_report(tmp_path):
+    spec_file = tmp_path / "spec.json"
+    spec_file.write_text(json.dumps(small_spec()), encoding="utf-8")
+    output = tmp_path / "report.json"
+    args = Namespace(
+        sizes=[0.01], spec=str(spec_file), repeat=1, jobs=2, output=str(output)
+    )
+    CppBenchmark()(args)
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert set(report) == {
+        "spec",
+        "headers",
+        "trees",
+        "peak_rss_bytes",
+        "peak_rss_children_bytes",
+    }
+    assert report["headers"][0]["functions"] > 0
+    (tree,) = report["trees"]
+    assert tree["missing"] == tree["expected_missing"]
+    assert tree["call"]["jobs"] == 2
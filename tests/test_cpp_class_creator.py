@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+from myutils.cpp_class_creator import CreateCppClass
+
+
+def class_spec(name: str, directory: str) -> dict:
+    return {
+        "name": name,
+        "directory": directory,
+        "namespace": "",
+        "bases": [],
+        "methods": [],
+    }
+
+
+def test_equivalent_directories_share_existing_files(tmp_path, capsys):
+    directory = str(tmp_path / "src")
+    CreateCppClass().create_classes(
+        [
+            class_spec("foo_bar", directory),
+            class_spec("foo_bar", directory + "/"),
+            class_spec("foo_bar", str(tmp_path / "src" / ".." / "src")),
+        ],
+        1,
+    )
+    output = capsys.readouterr().out
+    assert output.count("File already exists for class FooBar") == 2
+    assert "Created 1 classes successfully" in output
+    assert sorted(p.name for p in (tmp_path / "src").iterdir()) == [
+        "FooBar.cpp",
+        "FooBar.h",
+    ]
+
+
+def test_render_class_with_namespace_bases_and_methods():
+    header, source = CreateCppClass().render_class(
+        "Foo",
+        "ns::sub",
+        ["public Base", "private Other"],
+        ["static int count();", "virtual void run(int x = 0) const"],
+    )
+    assert (
+        "namespace ns::sub {\n\nclass Foo : public Base, private Other {"
+        in header
+    )
+    assert "        static int count();\n" in header
+    assert "        virtual void run(int x = 0) const;\n" in header
+    assert header.endswith("};\n\n} // namespace ns::sub\n")
+
+    # Definitions drop the default values and the static/virtual specifiers
+    assert source.startswith('\n#include "Foo.h"\n\nnamespace ns::sub {\n\n')
+    assert "int Foo::count() {\n}\n" in source
+    assert "void Foo::run(int x) const {\n}\n" in source
+    assert "static" not in source and "virtual" not in source
+    assert source.endswith("} // namespace ns::sub\n")
+
+
+def test_render_class_without_namespace():
+    header, source = CreateCppClass().render_class("Foo")
+    assert "namespace" not in header + source
+    assert "class Foo {" in header
+    assert "Foo::Foo(){\n}" in source
+
+
+SPEC = {
+    "namespace": "ns",
+    "directory": "src",
+    "classes": [
+        "plain",
+        {"name": "Other", "directory": "lib", "methods": ["void f()"]},
+    ],
+}
+
+EXPECTED_CLASSES = [
+    {
+        "name": "plain",
+        "namespace": "ns",
+        "directory": "src",
+        "bases": [],
+        "methods": [],
+    },
+    {
+        "name": "Other",
+        "namespace": "ns",
+        "directory": "lib",
+        "bases": [],
+        "methods": ["void f()"],
+    },
+]
+
+
+def test_load_spec_json(tmp_path):
+    spec_file = tmp_path / "classes.json"
+    spec_file.write_text(json.dumps(SPEC), encoding="utf-8")
+    assert CreateCppClass().load_spec(str(spec_file)) == EXPECTED_CLASSES
+
+    # A list is a spec without defaults
+    spec_file.write_text(json.dumps(["Foo"]), encoding="utf-8")
+    assert CreateCppClass().load_spec(str(spec_file)) == [
+        {
+            "name": "Foo",
+            "namespace": "",
+            "directory": ".",
+            "bases": [],
+            "methods": [],
+        }
+    ]
+
+
+def test_load_spec_yaml(tmp_path):
+    yaml = pytest.importorskip("yaml")
+    spec_file = tmp_path / "classes.yaml"
+    spec_file.write_text(yaml.safe_dump(SPEC), encoding="utf-8")
+    assert CreateCppClass().load_spec(str(spec_file)) == EXPECTED_CLASSES
+
+
+def test_load_spec_yaml_without_pyyaml(tmp_path, monkeypatch):
+    spec_file = tmp_path / "classes.yml"
+    spec_file.write_text("classes: [Foo]\n", encoding="utf-8")
+    monkeypatch.setattr("myutils.cpp_class_creator.yaml", None)
+    with pytest.raises(ImportError, match="pyyaml"):
+        CreateCppClass().load_spec(str(spec_file))
+
+
+def test_existing_files_are_skipped(tmp_path, capsys):
+    directory = tmp_path / "src"
+    directory.mkdir()
+    (directory / "Foo.cpp").write_text("// mine\n", encoding="utf-8")
+
+    CreateCppClass().create_classes(
+        [class_spec("foo", str(directory)), class_spec("bar", str(directory))],
+        2,
+    )
+    output = capsys.readouterr().out
+    assert "File already exists for class Foo" in output
+    assert "Created 1 classes successfully" in output
+    assert (directory / "Foo.cpp").read_text(encoding="utf-8") == "// mine\n"
+    assert not (directory / "Foo.h").exists()
+    assert sorted(p.name for p in directory.iterdir()) == [
+        "Bar.cpp",
+        "Bar.h",
+        "Foo.cpp",
+    ]
@@ -0,0 +1,161 @@
+import os
+from argparse import Namespace
+
+import pytest
+
+from myutils.cpp_definition_adder import CppFunctionAdder
+from myutils.cpp_parse_cache import ParseCache
+
+
+def write_files(root, contents: dict[str, str]):
+    for rel_path, content in contents.items():
+        file_path = root / rel_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding="utf-8")
+
+
+def rel_paths(root, file_paths) -> list[str]:
+    return [os.path.relpath(file_path, root) for file_path in file_paths]
+
+
+@pytest.fixture(name="project")
+def fixture_project(tmp_path):
+    write_files(
+        tmp_path,
+        {
+            "src/a/A.hpp": "class A { void f(); void g(int x); };",
+            "src/a/A.cc": '#include "A.hpp"\nvoid A::f() {}\n',
+            "src/b/B.h": "class B { int h() const; };",
+            "src/b/B.cxx": '#include "B.h"\n',
+            "src/b/skip_me.h": "class Skip { void f(); };",
+            "src/c/C.hh": "class C { void f(); };",
+            "build/Gen.h": "class Gen { void f(); };",
+            "build/Gen.cpp": '#include "Gen.h"\n',
+            "README.md": "",
+        },
+    )
+    return tmp_path
+
+
+def test_adder_finds_no_missing_definitions(class_files):
+    header_file, cpp_file = class_files
+    source = cpp_file.read_text(encoding="utf-8")
+
+    adder = CppFunctionAdder()
+    assert not adder.get_missing_functions(str(header_file), str(cpp_file))
+
+    args = Namespace(
+        file=str(header_file),
+        path=None,
+        create_cpp=False,
+        index=False,
+        incremental=False,
+        yes=True,
+        watch=False,
+        jobs=1,
+    )
+    adder(args)
+    assert cpp_file.read_text(encoding="utf-8") == source
+
+
+def test_adder_writes_compilable_stubs(empty_class_files):
+    header_file, cpp_file = empty_class_files
+
+    adder = CppFunctionAdder()
+    stubs = {
+        str(function)
+        for function in adder.get_missing_functions(
+            str(header_file), str(cpp_file)
+        )
+    }
+    assert stubs == {
+        "void ns::A::um()",
+        "void ns::A::arr(int a[3])",
+        "void ns::A::callback(void(*cb)(int), int(&values)[4])",
+        "void ns::A::cmp(int a, int b)",
+        "void ns::A::safe() const noexcept",
+        "void ns::A::maybe() noexcept(false)",
+    }
+
+
+def test_find_files_is_recursive_and_filtered(project):
+    adder = CppFunctionAdder()
+    lst_files = adder.find_files(str(project), ["*"], ["build", "skip_*"])
+    assert rel_paths(project, lst_files) == [
+        "src/a/A.cc",
+        "src/a/A.hpp",
+        "src/b/B.cxx",
+        "src/b/B.h",
+        "src/c/C.hh",
+    ]
+
+    # Include patterns only select headers, sources are always kept
+    lst_files = adder.find_files(str(project), ["src/a/*"], ["build"])
+    assert rel_paths(project, lst_files) == [
+        "src/a/A.cc",
+        "src/a/A.hpp",
+        "src/b/B.cxx",
+    ]
+
+
+def test_headers_paired_with_any_source_extension(project):
+    adder = CppFunctionAdder()
+    lst_files = adder.find_files(str(project), ["*"], ["build", "skip_*"])
+    lst_headers = adder.find_header_pairs(lst_files, create_cpp=False)
+    assert [tuple(rel_paths(project, pair)) for pair in lst_headers] == [
+        ("src/a/A.hpp", "src/a/A.cc"),
+        ("src/b/B.h", "src/b/B.cxx"),
+    ]
+    assert not (project / "src/c/C.cpp").exists()
+
+
+def test_missing_source_created_next_to_header(project):
+    adder = CppFunctionAdder()
+    lst_files = adder.find_files(str(project), ["*"], ["build", "skip_*"])
+    lst_headers = adder.find_header_pairs(lst_files, create_cpp=True)
+    assert tuple(rel_paths(project, lst_headers[-1])) == (
+        "src/c/C.hh",
+        "src/c/C.cpp",
+    )
+    assert (project / "src/c/C.cpp").read_text(
+        encoding="utf-8"
+    ) == '#include "C.hh"\n'
+
+
+def test_serial_and_parallel_scans_match(project):
+    adder = CppFunctionAdder()
+    lst_files = adder.find_files(str(project), ["*"], [])
+    lst_headers = adder.find_header_pairs(lst_files, create_cpp=True)
+    serial = adder.scan_headers(lst_headers, 1)
+    assert {
+        os.path.basename(header_file): sorted(map(str, functions))
+        for header_file, _, functions in serial
+    } == {
+        "Gen.h": ["void Gen::f()"],
+        "A.hpp": ["void A::g(int x)"],
+        "B.h": ["int B::h() const"],
+        "skip_me.h": ["void Skip::f()"],
+        "C.hh": ["void C::f()"],
+    }
+    assert adder.scan_headers(lst_headers, 2) == serial
+
+
+def test_cached_pairs_are_not_sent_to_processes(project, monkeypatch):
+    adder = CppFunctionAdder()
+    lst_files = adder.find_files(str(project), ["*"], [])
+    lst_headers = adder.find_header_pairs(lst_files, create_cpp=False)
+    cache = ParseCache(str(project / "cache"))
+    expected = adder.scan_headers(lst_headers, 1, cache)
+
+    # A single changed pair is parsed without starting processes
+    (project / "src/b/B.cxx").write_text(
+        '#include "B.h"\nint B::h() const { return 0; }\n', encoding="utf-8"
+    )
+    monkeypatch.setattr(
+        "myutils.cpp_definition_adder.ProcessPoolExecutor",
+        lambda *args, **kwargs: pytest.fail("processes started"),
+    )
+    changes = adder.scan_headers(lst_headers, 4, cache)
+    assert changes == [
+        change for change in expected if not change[0].endswith("B.h")
+    ]
@@ -0,0 +1,136 @@
+import json
+import os
+import pickle
+
+from myutils.cpp_definition_adder import CppFunctionAdder
+from myutils.cpp_parse_cache import CACHE_VERSION, ParseCache
+from myutils.cpp_parser import PARSER_VERSION
+
+
+class CountingAdder(CppFunctionAdder):
+    """
+    Counts the pairs of files parsed, the ones found in the cache are not.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.parsed: list[str] = []
+
+    def get_missing_functions(self, header_file: str, cpp_file: str):
+        self.parsed.append(os.path.basename(header_file))
+        return super().get_missing_functions(header_file, cpp_file)
+
+
+def scan(adder, header_file, cpp_file, cache_file) -> set[str]:
+    cache = ParseCache(str(cache_file))
+    changes = adder.scan_headers([(str(header_file), str(cpp_file))], 1, cache)
+    cache.save()
+    return {str(function) for _, _, functions in changes for function in functions}
+
+
+def set_mtime(file_path, mtime_ns: int):
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, mtime_ns))
+
+
+def test_incremental_cache_is_json(empty_class_files, tmp_path):
+    header_file, cpp_file = empty_class_files
+    cache_file = tmp_path / "cache"
+    pair = [(str(header_file), str(cpp_file))]
+
+    # A pickle is ignored instead of being loaded
+    cache_file.write_bytes(pickle.dumps({"version": (0, 0)}))
+    cache = ParseCache(str(cache_file))
+    assert not cache.pairs
+
+    adder = CppFunctionAdder()
+    expected = adder.scan_headers(pair, 1, cache)
+    cache.save()
+    assert json.loads(cache_file.read_text(encoding="utf-8"))
+
+    cache = ParseCache(str(cache_file))
+    assert adder.scan_headers(pair, 1, cache) == expected
+    assert not cache.modified
+
+
+def test_touched_files_are_not_parsed_again(class_files, tmp_path):
+    header_file, cpp_file = class_files
+    cache_file = tmp_path / "cache"
+    adder = CountingAdder()
+    assert not scan(adder, header_file, cpp_file, cache_file)
+
+    set_mtime(cpp_file, os.stat(cpp_file).st_mtime_ns + 1_000_000_000)
+    assert not scan(adder, header_file, cpp_file, cache_file)
+    assert adder.parsed == ["A.h"]
+
+
+def test_edit_of_same_size_is_parsed_again(class_files, tmp_path):
+    header_file, cpp_file = class_files
+    cache_file = tmp_path / "cache"
+    adder = CountingAdder()
+    assert not scan(adder, header_file, cpp_file, cache_file)
+
+    mtime_ns = os.stat(cpp_file).st_mtime_ns
+    source = cpp_file.read_text(encoding="utf-8")
+    edited = source.replace("A::um()", "A::un()")
+    assert len(edited) == len(source)
+    cpp_file.write_text(edited, encoding="utf-8")
+    # File systems with a coarse mtime can keep the same one
+    set_mtime(cpp_file, mtime_ns + 1_000_000_000)
+
+    assert scan(adder, header_file, cpp_file, cache_file) == {"void ns::A::um()"}
+    assert adder.parsed == ["A.h", "A.h"]
+
+
+def test_file_replaced_by_rename_is_parsed_again(class_files, tmp_path):
+    header_file, cpp_file = class_files
+    cache_file = tmp_path / "cache"
+    adder = CountingAdder()
+    assert not scan(adder, header_file, cpp_file, cache_file)
+
+    # Editors often save by renaming a new file over the old one
+    new_file = tmp_path / "A.cpp.new"
+    new_file.write_text('#include "A.h"\n', encoding="utf-8")
+    os.replace(new_file, cpp_file)
+
+    assert len(scan(adder, header_file, cpp_file, cache_file)) == 6
+    assert adder.parsed == ["A.h", "A.h"]
+
+
+def test_renamed_pair_drops_old_entries(class_files, tmp_path):
+    header_file, cpp_file = class_files
+    cache_file = tmp_path / "cache"
+    adder = CountingAdder()
+    assert not scan(adder, header_file, cpp_file, cache_file)
+
+    renamed_header = tmp_path / "B.h"
+    renamed_cpp = tmp_path / "B.cpp"
+    os.rename(header_file, renamed_header)
+    os.rename(cpp_file, renamed_cpp)
+    assert not scan(adder, renamed_header, renamed_cpp, cache_file)
+    assert adder.parsed == ["A.h", "B.h"]
+
+    cache = ParseCache(str(cache_file))
+    assert list(cache.pairs) == [(str(renamed_header), str(renamed_cpp))]
+    assert set(cache.files) == {str(renamed_header), str(renamed_cpp)}
+
+
+def test_cache_of_another_parser_version_is_ignored(
+    empty_class_files, tmp_path, monkeypatch
+):
+    header_file, cpp_file = empty_class_files
+    cache_file = tmp_path / "cache"
+    adder = CountingAdder()
+    expected = scan(adder, header_file, cpp_file, cache_file)
+
+    monkeypatch.setattr(
+        "myutils.cpp_parse_cache.PARSER_VERSION", PARSER_VERSION + 1
+    )
+    cache = ParseCache(str(cache_file))
+    assert not cache.pairs
+    assert cache.modified
+
+    assert scan(adder, header_file, cpp_file, cache_file) == expected
+    assert adder.parsed == ["A.h", "A.h"]
+    data = json.loads(cache_file.read_text(encoding="utf-8"))
+    assert data["version"] == [CACHE_VERSION, PARSER_VERSION + 1]
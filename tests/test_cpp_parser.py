@@ -0,0 +1,125 @@
+from myutils.cpp_definition_adder import CppFunctionAdder
+from myutils.cpp_parser import (
+    candidate_keys,
+    function_key,
+    parse_arguments,
+    parse_functions,
+    split_top_level,
+)
+
+
+def keys(functions) -> set[str]:
+    return {function_key(function) for function in functions}
+
+
+def test_declarations(header_text):
+    assert keys(parse_functions(header_text)) == {
+        "ns::A::um()",
+        "ns::A::arr(int[3])",
+        "ns::A::callback(void(*)(int), int(&)[4])",
+        "ns::A::cmp(int, int)",
+        "ns::A::safe() const noexcept",
+        "ns::A::maybe() noexcept(false)",
+    }
+
+
+def test_using_namespace(source_text):
+    definitions = parse_functions(source_text, definitions=True)
+    assert all(function.class_name == "A" for function in definitions)
+    assert all(function.using_namespaces == ("ns",) for function in definitions)
+    assert candidate_keys(definitions[0]) == ["A::um()", "ns::A::um()"]
+
+
+def test_using_namespace_scope():
+    source = """
+    namespace other { using namespace ns; }
+    void A::f() {}
+    namespace other { void B::g() {} }
+    """
+    first, second = parse_functions(source, definitions=True)
+    assert first.using_namespaces == ()
+    assert second.class_name == "other::B"
+
+
+def test_array_and_function_pointer_names_stripped():
+    assert parse_arguments("int a[3]")[0] == ("int[3]",)
+    assert parse_arguments("int b[3]")[0] == ("int[3]",)
+    assert parse_arguments("void (*cb)(int)")[0] == ("void(*)(int)",)
+    assert parse_arguments("int (&values)[4]")[0] == ("int(&)[4]",)
+    assert parse_arguments("decltype(x) value")[0] == ("decltype(x)",)
+    assert parse_arguments("const std::map<int, int>& m")[0] == (
+        "const std::map<int, int>&",
+    )
+
+
+def test_comparison_in_default_value():
+    types, declarations = parse_arguments("int a = (1 < 2), int b = 3")
+    assert types == ("int", "int")
+    assert declarations == "int a, int b"
+    assert len(split_top_level(["a", "<", "b", ",", "c"], ",")) == 1
+    assert len(split_top_level(["(", "1", "<", "2", ")", ",", "c"], ",")) == 2
+
+
+MACROS_HEADER = """
+class Foo {
+    Q_OBJECT
+public:
+    Foo();
+    ~Foo();
+    explicit operator bool() const;
+private:
+    DISALLOW_COPY_AND_ASSIGN(Foo);
+    Q_DISABLE_COPY(Foo)
+    void bar();
+    MOCK_METHOD(void, mocked, (), (override));
+Q_SIGNALS:
+    void changed(int value);
+public Q_SLOTS:
+    void onChanged(int value);
+signals:
+    void other();
+public slots:
+    void onOther();
+};
+"""
+
+
+def test_function_like_macros_are_not_members():
+    assert keys(parse_functions(MACROS_HEADER)) == {
+        "Foo::Foo()",
+        "Foo::~Foo()",
+        "Foo::operator bool() const",
+        "Foo::bar()",
+        "Foo::onChanged(int)",
+        "Foo::onOther()",
+    }
+
+
+def test_macro_without_semicolon_keeps_next_declaration():
+    functions = parse_functions("class Foo { Q_DISABLE_COPY(Foo) void bar(); };")
+    assert [(f.return_type, f.function_name) for f in functions] == [
+        ("void", "bar")
+    ]
+
+
+def test_signals_sections_are_skipped():
+    functions = parse_functions(MACROS_HEADER)
+    assert all(":" not in function.return_type for function in functions)
+    names = {function.function_name for function in functions}
+    assert not names & {"changed", "other"}
+
+
+def test_adder_ignores_macros(tmp_path):
+    header_file = tmp_path / "Foo.h"
+    cpp_file = tmp_path / "Foo.cpp"
+    header_file.write_text(
+        "class Foo { public: Foo(); private: DISALLOW_COPY_AND_ASSIGN(Foo);"
+        " Q_DISABLE_COPY(Foo) void bar(); };",
+        encoding="utf-8",
+    )
+    cpp_file.write_text('#include "Foo.h"\nFoo::Foo() {}\n', encoding="utf-8")
+
+    missing = CppFunctionAdder().get_missing_functions(
+        str(header_file), str(cpp_file)
+    )
+    assert [str(function) for function in missing] == ["void Foo::bar()"]
@@ -0,0 +1,118 @@
+import json
+import os
+
+from myutils.cpp_parse_cache import CACHE_VERSION
+from myutils.cpp_parser import PARSER_VERSION
+from myutils.cpp_symbol_index import SymbolIndex
+
+
+def set_mtime(file_path, mtime_ns: int):
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, mtime_ns))
+
+
+def fail_parse(file_path: str):
+    raise AssertionError(f"{file_path} parsed again")
+
+
+def test_index_resolves_using_namespace(class_files):
+    header_file, cpp_file = class_files
+
+    index = SymbolIndex()
+    index.update([str(header_file), str(cpp_file)])
+    assert not index.get_undefined()
+    assert not index.get_orphaned()
+    assert index.is_defined("ns::A::um()")
+
+    index.remove_file(str(cpp_file))
+    assert not index.aliases
+    assert len(index.get_undefined()) == 6
+
+
+def test_index_file_is_json(class_files, tmp_path):
+    header_file, cpp_file = class_files
+    index_file = tmp_path / "index"
+
+    index = SymbolIndex(str(index_file))
+    index.update([str(header_file), str(cpp_file)])
+    index.save()
+    assert json.loads(index_file.read_text(encoding="utf-8"))
+
+    loaded = SymbolIndex(str(index_file))
+    assert loaded.files == index.files
+    assert loaded.symbols.keys() == index.symbols.keys()
+    assert not loaded.get_undefined()
+
+
+def test_touched_file_keeps_its_symbols(class_files, monkeypatch):
+    header_file, cpp_file = class_files
+    index = SymbolIndex()
+    index.update([str(header_file), str(cpp_file)])
+    symbols = index.files[str(cpp_file)]
+
+    set_mtime(cpp_file, os.stat(cpp_file).st_mtime_ns + 1_000_000_000)
+    monkeypatch.setattr(
+        "myutils.cpp_symbol_index.parse_file_symbols",
+        fail_parse,
+    )
+    index.refresh([str(cpp_file)])
+    assert index.files[str(cpp_file)].definitions == symbols.definitions
+    assert index.files[str(cpp_file)].mtime_ns != symbols.mtime_ns
+
+
+def test_edit_of_same_size_is_parsed_again(class_files):
+    header_file, cpp_file = class_files
+    index = SymbolIndex()
+    index.update([str(header_file), str(cpp_file)])
+
+    mtime_ns = os.stat(cpp_file).st_mtime_ns
+    source = cpp_file.read_text(encoding="utf-8")
+    edited = source.replace("A::um()", "A::un()")
+    assert len(edited) == len(source)
+    cpp_file.write_text(edited, encoding="utf-8")
+    # File systems with a coarse mtime can keep the same one
+    set_mtime(cpp_file, mtime_ns + 1_000_000_000)
+
+    index.refresh([str(cpp_file)])
+    assert not index.is_defined("ns::A::um()")
+    assert [str(symbol) for symbol in index.get_orphaned()] == ["A::un()"]
+
+
+def test_renamed_file_replaces_its_symbols(class_files, tmp_path):
+    header_file, cpp_file = class_files
+    index = SymbolIndex()
+    index.update([str(header_file), str(cpp_file)])
+
+    renamed_file = tmp_path / "B.cpp"
+    os.rename(cpp_file, renamed_file)
+    index.update([str(header_file), str(renamed_file)])
+    assert set(index.files) == {str(header_file), str(renamed_file)}
+    assert not index.get_undefined()
+    assert {
+        location.file_path
+        for symbol in index.symbols.values()
+        for location in symbol.definitions
+    } == {str(renamed_file)}
+
+
+def test_index_of_another_parser_version_is_ignored(
+    class_files, tmp_path, monkeypatch
+):
+    header_file, cpp_file = class_files
+    index_file = tmp_path / "index"
+    index = SymbolIndex(str(index_file))
+    index.update([str(header_file), str(cpp_file)])
+    index.save()
+
+    monkeypatch.setattr(
+        "myutils.cpp_symbol_index.PARSER_VERSION", PARSER_VERSION + 1
+    )
+    loaded = SymbolIndex(str(index_file))
+    assert not loaded.files
+    assert loaded.modified
+
+    loaded.update([str(header_file), str(cpp_file)])
+    loaded.save()
+    assert loaded.symbols.keys() == index.symbols.keys()
+    data = json.loads(index_file.read_text(encoding="utf-8"))
+    assert data["version"] == [CACHE_VERSION, PARSER_VERSION + 1]
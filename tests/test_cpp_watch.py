@@ -0,0 +1,94 @@
+import os
+from argparse import Namespace
+
+from myutils.cpp_definition_adder import CppFunctionAdder
+from myutils.file_watcher import FileWatcher
+
+
+class ScriptedWatcher(FileWatcher):
+    """
+    Returns the given batches of changed files, then stops the watch.
+    """
+
+    def __init__(self, path, dir_filter, batches):
+        super().__init__(path, dir_filter)
+        self.batches = list(batches)
+
+    def wait_debounced(self, debounce: float) -> set[str]:
+        if not self.batches:
+            raise KeyboardInterrupt()
+        return self.batches.pop(0)
+
+
+def test_declined_changes_still_watch(empty_class_files, monkeypatch):
+    header_file, cpp_file = empty_class_files
+
+    adder = CppFunctionAdder()
+    watched = []
+    monkeypatch.setattr("builtins.input", lambda prompt: "n")
+    monkeypatch.setattr(
+        adder, "watch", lambda args, index, lst_headers: watched.append(args)
+    )
+
+    args = Namespace(
+        file=str(header_file),
+        path=None,
+        create_cpp=False,
+        index=False,
+        incremental=False,
+        yes=False,
+        watch=True,
+        jobs=1,
+    )
+    adder(args)
+    assert cpp_file.read_text(encoding="utf-8") == '#include "A.h"\n'
+    assert watched == [args]
+
+
+def test_file_watches_only_its_pair(empty_class_files, tmp_path, monkeypatch):
+    header_file, cpp_file = empty_class_files
+    (tmp_path / "B.h").write_text("class B { void f(); };", encoding="utf-8")
+    (tmp_path / "B.cpp").write_text('#include "B.h"\n', encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "A.h").write_text(
+        "class A { void g(); };", encoding="utf-8"
+    )
+    directory = str(tmp_path)
+    batches = [
+        {
+            os.path.join(directory, "B.h"),
+            os.path.join(directory, "B.cpp"),
+            os.path.join(directory, "sub", "A.h"),
+        },
+        {os.path.join(directory, "A.cpp"), os.path.join(directory, "B.cpp")},
+    ]
+    watchers = []
+
+    def create_watcher(path, dir_filter):
+        watchers.append(ScriptedWatcher(path, dir_filter, batches))
+        return watchers[-1]
+
+    adder = CppFunctionAdder()
+    scanned = []
+    monkeypatch.setattr(
+        "myutils.cpp_definition_adder.create_watcher", create_watcher
+    )
+    monkeypatch.setattr(
+        adder,
+        "scan_headers",
+        lambda lst_headers, jobs: scanned.append(lst_headers) or [],
+    )
+
+    args = Namespace(
+        file=str(header_file),
+        path=".",
+        include=["*"],
+        exclude=[],
+        debounce=0.0,
+        yes=True,
+    )
+    adder.watch(args, None, [(str(header_file), str(cpp_file))])
+
+    assert [watcher.path for watcher in watchers] == [directory]
+    assert not watchers[0].dir_filter(str(tmp_path / "sub"))
+    assert scanned == [[(str(header_file), str(cpp_file))]]
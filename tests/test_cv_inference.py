@@ -0,0 +1,133 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("onnxruntime")
+
+from myutils.cv_inference import CVInference  # noqa: E402
+
+
+class FixedBatchSession:
+    """
+    Fakes an ONNX session of a YOLO model exported with a fixed batch size,
+    detecting one box per image with the mean of the image as score.
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.batches: list[int] = []
+
+    def run(self, outnames, feeds):
+        batch = feeds["images"]
+        if batch.shape[0] != self.batch_size:
+            raise ValueError(
+                f"expected {self.batch_size} got {batch.shape[0]}"
+            )
+        self.batches.append(batch.shape[0])
+        return [
+            np.array(
+                [
+                    [index, 10, 10, 30, 30, 0, image.mean()]
+                    for index, image in enumerate(batch)
+                ],
+                dtype=np.float32,
+            )
+        ]
+
+
+def create_inference(batch_size: int, rois=None) -> CVInference:
+    inference = CVInference()
+    inference.format = "yolo"
+    inference.session = FixedBatchSession(batch_size)
+    inference.outname = ["output"]
+    inference.inname = ["images"]
+    inference.input_shape = (64, 64)
+    inference.max_batch_size = batch_size
+    inference.conf_tresh = 0.0
+    inference.iou_tresh = 0.5
+    inference.rois = rois or []
+    inference.roi_polygons = []
+    inference.roi_mask = None
+    return inference
+
+
+def test_fixed_batch_pads_last_chunk():
+    inference = create_inference(2)
+    imgs = [
+        np.full((64, 64, 3), value, dtype=np.uint8) for value in (51, 102, 153)
+    ]
+
+    results = inference.run_inference_batch(imgs)
+    assert inference.session.batches == [2, 2]
+    assert [len(detections) for detections in results] == [1, 1, 1]
+    scores = [float(detections[0, 6]) for detections in results]
+    assert scores == pytest.approx([0.2, 0.4, 0.6], abs=1e-3)
+
+
+def test_fixed_batch_rois():
+    inference = create_inference(
+        2, rois=[(0, 0, 64, 64), (64, 0, 64, 64), (128, 0, 64, 64)]
+    )
+    img = np.full((64, 192, 3), 51, dtype=np.uint8)
+
+    detections = inference.run_inference_rois(img)
+    assert inference.session.batches == [2, 2]
+    assert sorted(detections[:, 1].tolist()) == [10, 74, 138]
+
+
+def test_preprocess_bgrx_matches_bgr():
+    inference = create_inference(1)
+    rng = np.random.default_rng(0)
+    bgrx = rng.integers(0, 256, (48, 80, 4), dtype=np.uint8)
+    bgr = np.ascontiguousarray(bgrx[:, :, :3])
+
+    for resize in (True, False):
+        from_bgrx, ratio, pad = inference.preprocess(bgrx, resize)
+        from_bgr, bgr_ratio, bgr_pad = inference.preprocess(bgr, resize)
+        assert np.array_equal(from_bgrx, from_bgr)
+        assert (ratio, pad) == (bgr_ratio, bgr_pad)
+
+
+class TwoClassSession(FixedBatchSession):
+    """
+    Fakes a model detecting the same object as class 0 and class 1, plus a
+    second overlapping box of class 0, in each image.
+    """
+
+    def run(self, outnames, feeds):
+        batch = feeds["images"]
+        self.batches.append(batch.shape[0])
+        rows = []
+        for index in range(batch.shape[0]):
+            rows.append([index, 10, 10, 30, 30, 0, 0.9])
+            rows.append([index, 10, 10, 30, 30, 1, 0.8])
+            rows.append([index, 12, 12, 30, 30, 0, 0.7])
+        return [np.array(rows, dtype=np.float32)]
+
+
+def test_rois_suppress_only_overlapping_regions_per_class():
+    # The first two regions overlap, the third one is apart
+    inference = create_inference(
+        None, rois=[(0, 0, 64, 64), (0, 0, 64, 64), (128, 0, 64, 64)]
+    )
+    inference.session = TwoClassSession(None)
+    img = np.zeros((64, 192, 3), dtype=np.uint8)
+
+    detections = inference.run_inference_rois(img)
+    overlapping = detections[detections[:, 1] < 64]
+    apart = detections[detections[:, 1] >= 64]
+    assert sorted(overlapping[:, 5].tolist()) == [0, 1]
+    assert len(apart) == 3
+
+
+def test_low_confidence_detections_are_dropped():
+    inference = create_inference(None)
+    inference.session = TwoClassSession(None)
+    inference.conf_tresh = 0.75
+    img = np.zeros((64, 64, 3), dtype=np.uint8)
+
+    (detections,) = inference.run_inference_batch([img])
+    assert detections[:, 6].tolist() == pytest.approx([0.9, 0.8])
+    assert inference.run_inference(img)[:, 6].tolist() == pytest.approx(
+        [0.9, 0.8]
+    )
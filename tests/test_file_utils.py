@@ -0,0 +1,45 @@
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from myutils.file_utils import write_file_atomic
+
+
+def test_write_file_atomic_replaces_the_file(tmp_path):
+    file_path = tmp_path / "Foo.h"
+    file_path.write_text("old", encoding="utf-8")
+    write_file_atomic(str(file_path), "new")
+    assert file_path.read_text(encoding="utf-8") == "new"
+    assert os.listdir(tmp_path) == ["Foo.h"]
+
+    # Created files get the usual permissions, not the private ones of
+    # temporary files
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(file_path.stat().st_mode) == 0o666 & ~umask
+
+
+def test_concurrent_writes_leave_one_whole_file(tmp_path):
+    file_path = str(tmp_path / "cache")
+    contents = [str(i) * 10000 for i in range(10)]
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(lambda c: write_file_atomic(file_path, c), contents))
+    with open(file_path, "r", encoding="utf-8") as file:
+        assert file.read() in contents
+    assert os.listdir(tmp_path) == ["cache"]
+
+
+def test_failed_write_keeps_the_file(tmp_path, monkeypatch):
+    file_path = tmp_path / "Foo.h"
+    file_path.write_text("old", encoding="utf-8")
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        write_file_atomic(str(file_path), "new")
+    assert file_path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["Foo.h"]
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from myutils.frame_ring_buffer import (  # noqa: E402
+    WRITER_PID,
+    FrameRingReader,
+    FrameRingWriter,
+)
+
+FRAME_SHAPE = (48, 64, 3)
+
+
+def ring_name(suffix: str) -> str:
+    return f"test_ring_{os.getpid()}_{suffix}"
+
+
+def make_frame(sequence: int) -> np.ndarray:
+    return np.full(FRAME_SHAPE, sequence % 256, dtype=np.uint8)
+
+
+def make_detections(sequence: int) -> np.ndarray:
+    return np.full((sequence % 5, 7), sequence, dtype=np.float32)
+
+
+def read_all(name: str, ready, results):
+    """
+    Reads the frames of a ring until its writer is closed, in another process.
+    """
+    with FrameRingReader(name) as reader:
+        ready.set()
+        sequences = []
+        invalid = 0
+        for slot in reader:
+            valid = (
+                (slot.frame == slot.sequence % 256).all()
+                and len(slot.detections) == slot.sequence % 5
+                and (slot.detections == slot.sequence).all()
+            )
+            invalid += not (valid and reader.is_valid(slot))
+            sequences.append(slot.sequence)
+            del slot
+        results.put((sequences, reader.dropped, invalid))
+
+
+def test_several_subscribers():
+    num_frames = 120
+    fps = 60
+    frame_shape = (480, 640, 3)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    name = ring_name("subscribers")
+
+    publish_times = []
+    with FrameRingWriter(name, frame_shape) as writer:
+        readers = []
+        for _ in range(3):
+            ready = context.Event()
+            process = context.Process(
+                target=read_all, args=(name, ready, results)
+            )
+            process.start()
+            assert ready.wait(30)
+            readers.append(process)
+
+        # Publish at the frame rate of a camera, the readers must keep up
+        # with the 8 slots of the default ring
+        next_time = time.perf_counter()
+        for sequence in range(1, num_frames + 1):
+            frame = np.full(frame_shape, sequence % 256, dtype=np.uint8)
+            start = time.perf_counter()
+            writer.publish(frame, make_detections(sequence))
+            publish_times.append(time.perf_counter() - start)
+
+            next_time += 1 / fps
+            time.sleep(max(next_time - time.perf_counter(), 0))
+
+    outputs = [results.get(timeout=30) for _ in readers]
+    for process in readers:
+        process.join(30)
+        assert process.exitcode == 0
+    for sequences, dropped, invalid in outputs:
+        assert sequences == list(range(1, num_frames + 1))
+        assert dropped == 0
+        assert invalid == 0
+
+    # Publishing never waits for the readers
+    assert sorted(publish_times)[len(publish_times) // 2] < 0.005
+    assert max(publish_times) < 0.05
+
+
+def test_reader_stops_when_writer_closes():
+    name = ring_name("closed")
+    writer = FrameRingWriter(name, FRAME_SHAPE, num_slots=4)
+    with FrameRingReader(name) as reader:
+        for sequence in range(1, 7):
+            writer.publish(make_frame(sequence), make_detections(sequence))
+        assert reader.read(timeout=0.01).sequence == 3
+        assert not reader.is_closed()
+
+        writer.close()
+        assert reader.is_closed()
+        assert [slot.sequence for slot in reader] == [4, 5, 6]
+        assert reader.dropped == 2
+        assert reader.read() is None
+
+
+def test_stale_ring_is_replaced():
+    name = ring_name("stale")
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+
+    # Pretend the writer crashed without removing the ring
+    stale = FrameRingWriter(name, FRAME_SHAPE)
+    stale.header[WRITER_PID] = process.pid
+    stale.release()
+    stale.shm.close()
+
+    with FrameRingWriter(name, FRAME_SHAPE, num_slots=2):
+        with FrameRingReader(name) as reader:
+            assert reader.num_slots == 2
+
+
+def test_running_writer_is_not_replaced():
+    name = ring_name("running")
+    with FrameRingWriter(name, FRAME_SHAPE):
+        with pytest.raises(FileExistsError):
+            FrameRingWriter(name, FRAME_SHAPE)
+
+
+def test_other_shared_memory_is_not_replaced():
+    name = ring_name("other")
+    shm = shared_memory.SharedMemory(name=name, create=True, size=256)
+    try:
+        with pytest.raises(FileExistsError):
+            FrameRingWriter(name, FRAME_SHAPE)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,109 @@
+import logging
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+
+import pytest
+
+from myutils import main as main_module
+from myutils.script_interface import ScriptInterface, get_peak_rss
+
+
+class DummyScript(ScriptInterface):
+    def __init__(self):
+        super().__init__("dummy", "A script for the tests")
+        self.calls: list[Namespace] = []
+
+    def add_subparser_args(self, parser: ArgumentParser):
+        parser.add_argument("--value", type=int, default=0)
+
+    def __call__(self, args: Namespace):
+        with self.stage("work"):
+            sum(range(1000))
+        self.calls.append(args)
+        if getattr(args, "fail", False):
+            raise RuntimeError("script failed")
+
+
+class DummySpec:
+    name = "dummy"
+    description = "A script for the tests"
+
+    def __init__(self):
+        self.script = DummyScript()
+
+    def load(self) -> DummyScript:
+        return self.script
+
+
+def test_stage_accumulates_runs():
+    script = DummyScript()
+    for _ in range(3):
+        with script.stage("step"):
+            pass
+    with pytest.raises(ValueError):
+        with script.stage("step"):
+            raise ValueError()
+
+    timing = script.stages["step"]
+    assert timing.count == 4
+    assert timing.wall_time >= 0
+    assert timing.cpu_time >= 0
+
+
+def test_run_without_global_arguments():
+    script = DummyScript()
+    args = Namespace()
+    script.run(args)
+    assert script.calls == [args]
+    assert script.stages["work"].count == 1
+
+
+def test_run_profile_without_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    DummyScript().run(Namespace(profile=True))
+    assert (tmp_path / "dummy.prof").is_file()
+
+
+def test_run_logs_timings_on_error(caplog):
+    caplog.set_level(logging.INFO)
+    with pytest.raises(RuntimeError):
+        DummyScript().run(Namespace(timings=True, fail=True))
+    assert "peak rss of the workers" in caplog.text
+    assert "work: 1 calls" in caplog.text
+
+
+def test_run_trace_malloc(caplog):
+    caplog.set_level(logging.INFO)
+    DummyScript().run(Namespace(trace_malloc=True))
+    assert "Peak of traced memory" in caplog.text
+    assert not tracemalloc.is_tracing()
+
+
+def test_peak_rss():
+    assert get_peak_rss() > 0
+    assert get_peak_rss(children=True) >= 0
+
+
+def test_main_parses_global_arguments(tmp_path, monkeypatch, caplog):
+    spec = DummySpec()
+    monkeypatch.setattr(main_module, "get_scripts", lambda: [spec])
+    caplog.set_level(logging.INFO)
+    output = tmp_path / "out.prof"
+
+    # The value of --profile-output is not taken for the script name
+    main_module.main(
+        [
+            "--profile-output",
+            str(output),
+            "--timings",
+            "--profile",
+            "dummy",
+            "--value",
+            "3",
+        ]
+    )
+    (args,) = spec.script.calls
+    assert args.value == 3
+    assert args.timings and args.profile
+    assert output.is_file()
+    assert "--TIMINGS--" in caplog.text
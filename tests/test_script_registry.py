@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+from myutils.script_registry import BUILTIN_SCRIPTS
+
+HEAVY_MODULES = ("cv2", "onnxruntime", "numpy")
+
+CHECK_IMPORTS = """
+import sys
+from myutils.main import main
+
+try:
+    main([{script!r}, "-h"])
+except SystemExit:
+    pass
+print(",".join(name for name in {modules!r} if name in sys.modules))
+"""
+
+
+@pytest.mark.parametrize("script", ["create_cpp_class", "add_cpp_definitions"])
+def test_cpp_scripts_do_not_import_inference_modules(script):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            CHECK_IMPORTS.format(script=script, modules=HEAVY_MODULES),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    assert "usage:" in output
+    assert output.splitlines()[-1] == ""
+
+
+@pytest.mark.parametrize(
+    "spec", BUILTIN_SCRIPTS, ids=[spec.name for spec in BUILTIN_SCRIPTS]
+)
+def test_builtin_scripts_match_their_spec(spec):
+    if spec.target.startswith(("myutils.cv_inference", "myutils.video_inf")):
+        pytest.importorskip("cv2")
+        pytest.importorskip("onnxruntime")
+
+    script = spec.load()
+    assert script.get_name() == spec.name
+    assert script.get_description() == spec.description
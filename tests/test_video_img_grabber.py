@@ -0,0 +1,119 @@
+import os
+from argparse import Namespace
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from myutils import video_img_grabber  # noqa: E402
+from myutils.video_img_grabber import VideoImgSplit  # noqa: E402
+
+
+def write_video(path: str, fps: int, num_frames: int):
+    """
+    Writes a video where each frame has a different color, so the
+    extracted frames can be told apart.
+    """
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48)
+    )
+    for index in range(num_frames):
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:, :, 0] = index % 256
+        frame[:, :, 1] = index // 256 * 40
+        writer.write(frame)
+    writer.release()
+
+
+def read_images(path: str) -> dict[str, np.ndarray]:
+    return {
+        name: cv2.imread(os.path.join(path, name))
+        for name in os.listdir(path)
+    }
+
+
+@pytest.mark.parametrize(
+    "fps, num_frames, delay",
+    [(25, 1000, 0.5), (30, 600, 0.05), (25, 1000, 0.02)],
+)
+def test_parallel_matches_serial(tmp_path, fps, num_frames, delay):
+    video_file = str(tmp_path / "video.avi")
+    write_video(video_file, fps, num_frames)
+
+    script = VideoImgSplit()
+    results = {}
+    for workers in (1, 4):
+        save_path = tmp_path / f"workers_{workers}"
+        save_path.mkdir()
+        args = Namespace(
+            video_file=video_file,
+            save_images_path=str(save_path),
+            delay=delay,
+            workers=workers,
+        )
+        if workers > 1:
+            counter = script.run_parallel(args)
+        else:
+            counter = script.run_serial(args)
+        results[workers] = read_images(str(save_path))
+        assert counter == len(results[workers])
+
+    serial, parallel = results[1], results[4]
+    assert serial.keys() == parallel.keys()
+    assert len(serial) == int((num_frames / fps - 0.5 / fps) / delay)
+    for name, image in serial.items():
+        assert np.array_equal(image, parallel[name]), name
+
+
+class UnderReportedCapture:
+    """
+    Wraps a capture of a container reporting less frames than it has.
+    """
+
+    def __init__(self, capture_class, divisor: int, *args):
+        self.video = capture_class(*args)
+        self.divisor = divisor
+
+    def get(self, prop: int) -> float:
+        value = self.video.get(prop)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return value // self.divisor
+        return value
+
+    def __getattr__(self, name: str):
+        return getattr(self.video, name)
+
+
+@pytest.mark.parametrize("divisor", [2, 100])
+def test_parallel_with_under_reported_frame_count(
+    tmp_path, monkeypatch, divisor
+):
+    video_file = str(tmp_path / "video.avi")
+    write_video(video_file, 25, 200)
+    capture_class = cv2.VideoCapture
+    monkeypatch.setattr(
+        video_img_grabber.cv2,
+        "VideoCapture",
+        lambda *args: UnderReportedCapture(capture_class, divisor, *args),
+    )
+
+    script = VideoImgSplit()
+    results = {}
+    for workers in (1, 4):
+        save_path = tmp_path / f"workers_{workers}"
+        save_path.mkdir()
+        args = Namespace(
+            video_file=video_file,
+            save_images_path=str(save_path),
+            delay=0.25,
+            workers=workers,
+        )
+        if workers > 1:
+            script.run_parallel(args)
+        else:
+            script.run_serial(args)
+        results[workers] = read_images(str(save_path))
+
+    assert len(results[1]) == 31
+    assert results[1].keys() == results[4].keys()
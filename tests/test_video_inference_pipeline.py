@@ -0,0 +1,121 @@
+import queue
+import threading
+from argparse import Namespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("onnxruntime")
+
+from myutils import video_inference_pipeline  # noqa: E402
+from myutils.video_inference_pipeline import (  # noqa: E402
+    END_OF_STREAM,
+    VideoInferencePipeline,
+)
+
+
+class FakeInference:
+    """
+    Fakes CVInference, detecting one box in every frame.
+    """
+
+    def __init__(self):
+        self.class_names: list[str] = []
+        self.stages: dict = {}
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def run_inference_batch(self, imgs):
+        return [
+            np.array([[0, 1, 2, 3, 4, 0, 0.9]], dtype=np.float32)
+            for _ in imgs
+        ]
+
+
+def start_writer(pipeline, results, detections_file, errors):
+    writer = threading.Thread(
+        target=pipeline.write_results,
+        args=(results, None, detections_file, [], errors),
+        daemon=True,
+    )
+    writer.start()
+    return writer
+
+
+def test_writer_error_does_not_block(tmp_path):
+    pipeline = VideoInferencePipeline()
+    results: "queue.Queue" = queue.Queue(maxsize=1)
+    errors: list[Exception] = []
+    writer = start_writer(
+        pipeline, results, str(tmp_path / "missing" / "d.csv"), errors
+    )
+
+    result = (0.0, None, np.zeros((1, 7), dtype=np.float32))
+    for _ in range(5):
+        if not pipeline.put_result(results, result, writer):
+            break
+    assert not pipeline.put_result(results, END_OF_STREAM, writer)
+    writer.join()
+    assert isinstance(errors[0], FileNotFoundError)
+
+
+def test_writer_writes_until_end_of_stream(tmp_path):
+    pipeline = VideoInferencePipeline()
+    results: "queue.Queue" = queue.Queue(maxsize=1)
+    errors: list[Exception] = []
+    detections_file = tmp_path / "d.csv"
+    writer = start_writer(pipeline, results, str(detections_file), errors)
+
+    detections = np.array([[0, 1, 2, 3, 4, 0, 0.5]], dtype=np.float32)
+    for index in range(5):
+        assert pipeline.put_result(results, (index, None, detections), writer)
+    assert pipeline.put_result(results, END_OF_STREAM, writer)
+    writer.join()
+    assert not errors
+    assert len(detections_file.read_text().splitlines()) == 6
+
+
+def test_reader_error_is_raised(tmp_path, monkeypatch):
+    video_file = str(tmp_path / "video.avi")
+    writer = cv2.VideoWriter(
+        video_file, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 24)
+    )
+    for _ in range(20):
+        writer.write(np.zeros((24, 32, 3), dtype=np.uint8))
+    writer.release()
+
+    sample_frames = video_inference_pipeline.iter_sampled_frames
+
+    def failing_frames(video, delay):
+        for index, frame in enumerate(sample_frames(video, delay)):
+            if index == 3:
+                raise RuntimeError("decoding failed")
+            yield frame
+
+    monkeypatch.setattr(video_inference_pipeline, "CVInference", FakeInference)
+    monkeypatch.setattr(
+        video_inference_pipeline, "iter_sampled_frames", failing_frames
+    )
+
+    detections_file = tmp_path / "d.csv"
+    args = Namespace(
+        video_file=video_file,
+        model_weights_path="model.onnx",
+        delay=0.1,
+        model_format="yolo",
+        batch_size=2,
+        queue_size=2,
+        save_images_path=None,
+        detections_file=str(detections_file),
+        conf_tresh=None,
+        iou_tresh=None,
+        cpu=True,
+        nc_path=None,
+    )
+    with pytest.raises(RuntimeError, match="decoding failed"):
+        VideoInferencePipeline()(args)
+
+    # The frames decoded before the error are still written
+    assert len(detections_file.read_text().splitlines()) == 4
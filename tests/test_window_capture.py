@@ -0,0 +1,63 @@
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+if shutil.which("Xvfb") is None:
+    pytest.skip("Xvfb is not installed", allow_module_level=True)
+
+from myutils.window_capture import WindowCapture  # noqa: E402
+
+DISPLAY = ":97"
+
+
+@pytest.fixture(name="display")
+def fixture_display():
+    # -wr paints the root window white
+    server = subprocess.Popen(
+        [
+            "Xvfb",
+            DISPLAY,
+            "-screen",
+            "0",
+            "320x240x24",
+            "-wr",
+            "-nolisten",
+            "tcp",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    socket = f"/tmp/.X11-unix/X{DISPLAY[1:]}"
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket):
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            pytest.skip("Xvfb did not start")
+        time.sleep(0.05)
+    try:
+        yield DISPLAY
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_grab_returns_shared_memory_view(display):
+    try:
+        capture = WindowCapture(display_name=display)
+    except OSError as error:
+        pytest.skip(str(error))
+
+    with capture:
+        frame = capture.grab()
+        assert frame.shape == (240, 320, 4)
+        assert frame.dtype == np.uint8
+        assert np.shares_memory(frame, capture.bgra)
+        assert (frame[:, :, :3] == 255).all()
+
+        frames = capture.frames(fps=100)
+        assert next(frames) is capture.bgra